@@ -3,79 +3,96 @@ Module d'analyse des cycles financiers - VERSION COMPLÈTE
 Implémente tous les graphiques avec analyses avancées
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
-from statsmodels.tsa.seasonal import seasonal_decompose
-from datetime import datetime, timedelta
+from datetime import datetime
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
+import logging
+import os
+import threading
 import time
-from scipy import signal
-from scipy.fft import fft, fftfreq
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
-# Configuration yfinance
-yf.set_tz_cache_location("cache")
+from price_store import get_price_store
+from result_cache import get_result_cache
+from singleflight import SingleFlight
+from serialization import dumps
+from observability import STAGE_SECONDS, timed
+from downsampling import select_points
+from hurst import ESTIMATORS, hurst_exponent, rolling_hurst
+from volatility import (
+    VOL_WINDOW, EWMA_LAMBDA, OnlineVolatility, get_volatility_store,
+    simple_returns, volatility_outlook
+)
+from spectral import (
+    MIN_PERIOD as SPECTRAL_MIN_PERIOD, MAX_PERIOD as SPECTRAL_MAX_PERIOD, CORONA_FLOOR_DB,
+    power_spectrum, top_peaks, sliding_spectrum, corona_levels
+)
+from features import FeatureFrame
+from decomposition import DECOMPOSITION_METHOD, choose_period, get_decomposition_cache
+from cycles import (
+    KITCHIN_LENGTH, CYCLE_BAND_PERCENTILES,
+    parse_cycle_lengths, cycle_name, fold_cycles
+)
+
+logger = logging.getLogger(__name__)
+
+# Version des calculs : à incrémenter quand un graphique ou une stat change,
+# pour invalider les résultats déjà en cache
+ANALYSIS_VERSION = "10"
+
+# Exécution des étapes : 'serial', 'thread' ou 'process'
+ANALYSIS_EXECUTOR = os.environ.get('ANALYSIS_EXECUTOR', 'serial')
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 2))
+
+# Analyses en cours, partagées entre threads du même worker
+_inflight = SingleFlight()
 
 # ========================================
 # FONCTION PRINCIPALE - POINT D'ENTRÉE
 # ========================================
 
-def analyze_stock(ticker: str) -> dict:
+def analyze_stock(ticker: str, mode: str = 'full', cycles=None, on_stage=None) -> dict:
     """
     Fonction principale d'analyse d'un actif boursier
+    mode='stats' : statistiques uniquement, sans graphiques Plotly
+    cycles : longueurs de cycle à analyser (défaut : DEFAULT_CYCLE_LENGTHS)
+    on_stage(nom, outputs) : appelé à la fin de chaque étape (mode 'full')
     """
     try:
         ticker = ticker.upper().strip()
-        print(f"\n{'='*60}")
-        print(f"🚀 ANALYSE DE {ticker}")
-        print(f"{'='*60}\n")
+        cycles = parse_cycle_lengths(cycles)
+        logger.info(f"🚀 ANALYSE DE {ticker}")
         
-        # Appeler la fonction d'analyse complète
-        result = analyze_market_cycles(ticker)
+        # Appeler la fonction d'analyse complète (ou statistiques seules)
+        if mode == 'stats':
+            result = analyze_market_stats(ticker, cycles)
+        else:
+            result = analyze_market_cycles(ticker, cycles=cycles, on_stage=on_stage)
         
         # Si erreur dans l'analyse
         if "error" in result:
-            print(f"❌ Erreur: {result['error']}")
+            logger.error(f"❌ Erreur: {result['error']}")
             return {
                 'success': False,
                 'error': result['error'],
                 'ticker': ticker
             }
         
-        # Extraire les statistiques clés
-        kitchin_stats = result['stats']['kitchin']
-        vol_stats = result['stats']['volatility']
+        summary = format_analysis_result(ticker, result)
         
-        print(f"\n✅ ANALYSE TERMINÉE AVEC SUCCÈS !")
-        print(f"   Prix actuel: ${kitchin_stats['cours_actuel']}")
-        print(f"   Cycle Kitchin: Jour {kitchin_stats['jour_actuel']}/894")
-        print(f"   Volatilité: {vol_stats['current_vol']}%\n")
+        logger.info(
+            f"✅ Analyse de {ticker} terminée : prix {summary['current_price']} $, "
+            f"{summary['prediction']}, volatilité {summary['volatility']}%"
+        )
         
-        # Formater la réponse pour le dashboard
-        return {
-            'success': True,
-            'ticker': ticker,
-            'prediction': f"Cycle Kitchin: Jour {kitchin_stats['jour_actuel']}/894",
-            'confidence': 0.85,
-            'next_cycle': f"{894 - kitchin_stats['jour_actuel']} jours restants",
-            'current_price': kitchin_stats['cours_actuel'],
-            'deviation': kitchin_stats['ecart_pct'],
-            'volatility': vol_stats['current_vol'],
-            'volatility_outlook': vol_stats['proj_12m'],
-            'volatility_level': vol_stats['label'],
-            'timestamp': datetime.utcnow().isoformat(),
-            'full_analysis': result
-        }
+        return summary
         
     except Exception as e:
-        import traceback
         error_msg = str(e)
-        traceback_msg = traceback.format_exc()
-        print(f"❌ ERREUR: {error_msg}")
-        print(f"{traceback_msg}")
+        logger.exception(f"❌ ERREUR: {error_msg}")
         return {
             'success': False,
             'error': f"Erreur d'analyse: {error_msg}",
@@ -83,166 +100,201 @@ def analyze_stock(ticker: str) -> dict:
         }
 
 
-# ========================================
-# TÉLÉCHARGEMENT AMÉLIORÉ (FIX YFINANCE)
-# ========================================
+def format_analysis_result(ticker, result):
+    """Formate le résultat de analyze_market_cycles pour le dashboard"""
+    kitchin_stats = result['stats']['kitchin']
+    vol_stats = result['stats']['volatility']
+    history = result['stats']['history']
+    length = kitchin_stats.get('longueur', KITCHIN_LENGTH)
+    
+    return {
+        'success': True,
+        'ticker': ticker,
+        'prediction': f"Cycle {cycle_name(length)}: Jour {kitchin_stats['jour_actuel']}/{length}",
+        'confidence': 0.85,
+        'next_cycle': f"{length - kitchin_stats['jour_actuel']} jours restants",
+        'current_price': kitchin_stats['cours_actuel'],
+        'deviation': kitchin_stats['ecart_pct'],
+        'volatility': vol_stats['current_vol'],
+        'volatility_outlook': vol_stats['proj_12m'],
+        'volatility_level': vol_stats['label'],
+        'history_bars': history['bars'],
+        'limited_history': history['limited'],
+        'timestamp': datetime.utcnow().isoformat(),
+        'full_analysis': result
+    }
+
+
+def analysis_cache_key(ticker, last_bar, mode='full', cycles=None):
+    """Clé du cache de résultats : (ticker, dernière barre, version, mode, cycles)"""
+    return (ticker, last_bar, ANALYSIS_VERSION, mode, parse_cycle_lengths(cycles))
 
-def download_stock_data_fixed(ticker_symbol):
+
+def analyze_stock_cached(ticker: str, cache=None, mode: str = 'full', cycles=None):
     """
-    Télécharge les données avec gestion des erreurs yfinance
+    analyze_stock avec cache des résultats sérialisés.
+    Clé : (ticker, date de la dernière barre, version d'analyse, mode, cycles).
+    Les requêtes simultanées sur un même ticker partagent un seul calcul.
+    Retourne (payload_json, success, cache_hit).
     """
-    ticker_symbol = ticker_symbol.upper().strip()
-    print(f"📥 Téléchargement des données pour {ticker_symbol}...")
+    ticker = ticker.upper().strip()
+    cache = cache or get_result_cache()
+    cycles = parse_cycle_lengths(cycles)
+    
+    outcome, shared = _inflight.do(
+        (ticker, mode, cycles), _analyze_stock_cached, ticker, cache, mode, cycles
+    )
+    if shared:
+        logger.info(f"🤝 Résultat partagé avec une analyse en cours pour {ticker}")
+    return outcome
+
+
+def peek_cached_analysis(ticker: str, cache=None, mode: str = 'full', cycles=None):
+    """
+    Retourne le résultat en cache sans aucun téléchargement ni calcul,
+    ou None si le ticker n'est pas à jour dans le store ou pas en cache.
+    """
+    key = fresh_cache_key(ticker, mode, cycles)
+    if key is None:
+        return None
+    return (cache or get_result_cache()).get(key)
+
+
+def fresh_cache_key(ticker: str, mode: str = 'full', cycles=None):
+    """
+    Clé du résultat en cache pour la dernière barre du store, sans
+    téléchargement, ou None si le ticker n'est pas à jour dans le store.
+    """
+    ticker = ticker.upper().strip()
+    store = get_price_store()
     
+    if not store.is_fresh(ticker):
+        return None
+    return analysis_cache_key(ticker, store.last_bar_date(ticker), mode, cycles)
+
+
+def _analyze_stock_cached(ticker, cache, mode, cycles):
     try:
-        # Créer l'objet Ticker
-        ticker_obj = yf.Ticker(ticker_symbol)
-        
-        # Méthode 1: Essayer avec period="max"
-        print(f"   Tentative 1: period='max'...")
-        data = ticker_obj.history(
-            period="max",
-            auto_adjust=True,
-            actions=False,
-            timeout=10
-        )
-        
-        if data is not None and not data.empty and len(data) > 100:
-            print(f"✅ Succès ! {len(data)} jours de données")
-            return data, None
-        
-        # Méthode 2: Dates spécifiques avec période plus courte
-        print(f"   Tentative 2: 20 dernières années...")
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365*20)
-        
-        data = ticker_obj.history(
-            start=start_date,
-            end=end_date,
-            auto_adjust=True,
-            actions=False,
-            timeout=10
-        )
-        
-        if data is not None and not data.empty and len(data) > 100:
-            print(f"✅ Succès ! {len(data)} jours (20 ans)")
-            return data, None
-        
-        # Méthode 3: 5 ans minimum
-        print(f"   Tentative 3: 5 dernières années...")
-        start_date = end_date - timedelta(days=365*5)
-        
-        data = ticker_obj.history(
-            start=start_date,
-            end=end_date,
-            auto_adjust=True,
-            actions=False,
-            timeout=10
-        )
-        
-        if data is not None and not data.empty and len(data) > 100:
-            print(f"⚠️  Succès limité: {len(data)} jours (5 ans)")
-            return data, "Données limitées (5 ans)"
-        
-        # Si tout échoue
-        error_msg = (
-            f"Impossible de récupérer les données pour '{ticker_symbol}'. "
-            f"Vérifiez le symbole ou réessayez plus tard."
-        )
-        print(f"❌ {error_msg}")
-        return None, error_msg
-        
+        last_bar = get_price_store().sync(ticker)
     except Exception as e:
-        error_msg = f"Erreur de téléchargement pour {ticker_symbol}: {str(e)}"
-        print(f"❌ {error_msg}")
-        return None, error_msg
+        logger.warning(f"⚠️  Synchronisation impossible pour {ticker}: {e}")
+        last_bar = None
+    
+    key = analysis_cache_key(ticker, last_bar, mode, cycles)
+    if last_bar is not None:
+        payload = cache.get(key)
+        if payload is not None:
+            logger.info(f"⚡ Cache HIT pour {ticker} ({last_bar})")
+            return payload, True, True
+    
+    # Les flux SSE du worker suivent les étapes de ce calcul (stream_analysis)
+    feed = _open_stage_feed(ticker, cycles) if mode == 'full' else None
+    try:
+        result = analyze_stock(ticker, mode=mode, cycles=cycles,
+                               on_stage=feed.publish if feed else None)
+    finally:
+        if feed is not None:
+            _close_stage_feed(ticker, cycles, feed)
+    with timed('serialize'):
+        payload = dumps(result)
+    
+    if result.get('success') and last_bar is not None:
+        cache.set(key, payload)
+    
+    return payload, bool(result.get('success')), False
 
 
 # ========================================
 # ANALYSE COMPLÈTE DES CYCLES
 # ========================================
 
-def analyze_market_cycles(ticker_symbol):
-    """Analyse complète des cycles de marché"""
-    try:
-        ticker_symbol = ticker_symbol.upper().strip()
-
-        # Télécharger les données
-        data, error = download_stock_data_fixed(ticker_symbol)
-        
-        if error and data is None:
-            return {"error": error}
-        
-        if data is None or data.empty:
-            return {"error": f"Aucune donnée trouvée pour {ticker_symbol}"}
-
-        # Nettoyer les données
-        print("🧹 Nettoyage des données...")
-        data = data.reset_index()
-        
-        if 'Close' not in data.columns:
-            return {"error": "Colonne 'Close' manquante"}
-        
-        if 'Volume' not in data.columns:
-            data['Volume'] = 0
-        
-        data['Close'] = pd.to_numeric(data['Close'], errors='coerce')
-        data['Volume'] = pd.to_numeric(data['Volume'], errors='coerce').fillna(0)
-        data = data.dropna(subset=['Close'])
+def prepare_market_data(ticker_symbol, cycles=None):
+    """
+    Charge l'historique nettoyé d'un ticker (archive mmap du store,
+    mise à jour depuis la base si de nouvelles barres sont arrivées).
+    Retourne (PriceSeries, None) ou (None, message d'erreur).
+    Avertit si l'historique est plus court que le plus long cycle analysé.
+    """
+    ticker_symbol = ticker_symbol.upper().strip()
+    logger.info(f"📥 Chargement des données pour {ticker_symbol}...")
 
-        if len(data) < 100:
-            return {"error": f"Pas assez de données ({len(data)} jours)"}
+    try:
+        with timed('download'):
+            prices = get_price_store().get_series(ticker_symbol)
+    except Exception as e:
+        error_msg = f"Erreur de téléchargement pour {ticker_symbol}: {str(e)}"
+        logger.error(f"❌ {error_msg}")
+        return None, error_msg
 
-        print(f"✅ {len(data)} jours de données nettoyées")
+    if prices is None:
+        error_msg = (
+            f"Impossible de récupérer les données pour '{ticker_symbol}'. "
+            f"Vérifiez le symbole ou réessayez plus tard."
+        )
+        logger.error(f"❌ {error_msg}")
+        return None, error_msg
 
-        # Extraire les séries
-        close_prices = pd.Series(data["Close"].values, dtype=np.float64)
-        volumes = pd.Series(data["Volume"].values, dtype=np.float64)
-        data['Date'] = pd.to_datetime(data['Date'])
-        data['Date_str'] = data['Date'].dt.strftime('%d-%m-%Y')
+    if len(prices) < 100:
+        return None, f"Pas assez de données ({len(prices)} jours)"
 
-        # Générer les analyses
-        print("\n📊 Génération des analyses...\n")
-        graphs = {}
+    logger.info(f"✅ {len(prices)} jours de données")
+    history = history_stats(prices, cycles)
+    if history['limited']:
+        logger.warning(
+            f"⚠️  Historique limité pour {ticker_symbol} : {history['bars']} jours, "
+            f"moins qu'un cycle de {history['window']} jours"
+        )
+    return prices, None
 
-        print("   [1/9] Prix + Volume...")
-        graphs['price_volume'] = create_price_volume_chart(data, close_prices, volumes, ticker_symbol)
 
-        print("   [2/9] Cycle de Kitchin...")
-        graphs['kitchin'], kitchin_stats = create_kitchin_cycle(data, close_prices, ticker_symbol)
+def history_stats(prices, cycles=None):
+    """Profondeur de l'historique : limitée s'il couvre moins que le plus long cycle analysé"""
+    window = max(parse_cycle_lengths(cycles))
+    return {'bars': len(prices), 'window': window, 'limited': len(prices) < window}
 
-        print("   [3/9] Cycle Annuel...")
-        graphs['annual'], annual_stats = create_annual_cycle(data, close_prices, ticker_symbol)
 
-        print("   [4/9] Décomposition STL...")
-        graphs['returns'] = create_returns_decomposition(data, close_prices, ticker_symbol)
+def analyze_market_cycles(ticker_symbol, executor=None, cycles=None, on_stage=None):
+    """
+    Analyse complète des cycles de marché
+    executor : 'serial', 'thread' ou 'process' (défaut : ANALYSIS_EXECUTOR)
+    cycles : longueurs de cycle (la première alimente le graphique Kitchin)
+    on_stage(nom, outputs) : appelé dès qu'une étape se termine
+    """
+    try:
+        ticker_symbol = ticker_symbol.upper().strip()
 
-        print("   [5/9] Volatilité...")
-        graphs['volatility'], graphs['vol_gauge'], vol_stats = create_volatility_analysis(data, close_prices, ticker_symbol)
+        prices, error = prepare_market_data(ticker_symbol, cycles)
+        if error:
+            return {"error": error}
 
-        print("   [6/9] Coefficient de Hurst...")
-        graphs['hurst'] = create_hurst_analysis(data, close_prices, ticker_symbol)
+        # Générer les analyses (en série ou en parallèle selon ANALYSIS_EXECUTOR)
+        logger.info("📊 Génération des analyses...")
+        graphs = {}
+        stats = {}
 
-        print("   [7/9] FFT Corona Spectrum...")
-        graphs['corona'], graphs['dominant_cycles'] = create_fft_analysis(data, close_prices, ticker_symbol)
+        for name, outputs in iter_analysis_stages(prices, ticker_symbol, executor, cycles):
+            for (section, key), value in outputs:
+                (graphs if section == 'graphs' else stats)[key] = value
+            if on_stage is not None:
+                on_stage(name, outputs)
 
-        print("\n✅ Tous les graphiques générés avec succès !\n")
+        logger.info("✅ Tous les graphiques générés avec succès !")
 
         return {
             "success": True,
             "ticker": ticker_symbol,
             "graphs": graphs,
             "stats": {
-                "kitchin": kitchin_stats,
-                "annual": annual_stats,
-                "volatility": vol_stats
+                "kitchin": stats['kitchin'],
+                "cycles": stats['cycles'],
+                "annual": stats['annual'],
+                "volatility": stats['volatility'],
+                "history": history_stats(prices, cycles)
             }
         }
 
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"❌ Erreur complète:\n{error_details}")
+        logger.exception(f"❌ Erreur d'analyse de {ticker_symbol}")
         return {"error": f"Erreur: {str(e)}"}
 
 
@@ -250,9 +302,17 @@ def analyze_market_cycles(ticker_symbol):
 # GRAPHIQUE 1: PRIX + VOLUME
 # ========================================
 
-def create_price_volume_chart(data, close_prices, volumes, ticker):
-    """Graphique prix historique + volume"""
+def create_price_volume_chart(prices, ticker, max_points=None, date_range=None):
+    """
+    Graphique prix historique + volume
+    max_points : budget de points par trace (LTTB, défaut CHART_MAX_POINTS, 0 = tout)
+    date_range : (début, fin) pour ne tracer qu'une plage de dates
+    """
     try:
+        # Points retenus (LTTB sur le prix, mêmes positions pour le volume)
+        idx = select_points(prices.close, max_points, date_mask(prices.dates, date_range))
+        dates = prices.date_labels(idx)
+        
         fig = make_subplots(
             rows=2, cols=1,
             row_heights=[0.7, 0.3],
@@ -264,23 +324,22 @@ def create_price_volume_chart(data, close_prices, volumes, ticker):
         # Prix
         fig.add_trace(
             go.Scatter(
-                x=data["Date_str"],
-                y=close_prices,
+                x=dates,
+                y=prices.close[idx],
                 name="Prix",
                 line=dict(color='#667eea', width=2)
             ),
             row=1, col=1
         )
         
-        # Volume
-        colors = ['red' if close_prices.iloc[i] < close_prices.iloc[i-1] else 'green' 
-                  for i in range(1, len(close_prices))]
-        colors = ['green'] + colors
+        # Volume (rouge si la clôture baisse par rapport à la veille)
+        down = (idx > 0) & (prices.close[idx] < prices.close[np.maximum(idx - 1, 0)])
+        colors = np.where(down, 'red', 'green')
         
         fig.add_trace(
             go.Bar(
-                x=data["Date_str"],
-                y=volumes,
+                x=dates,
+                y=prices.volume[idx],
                 name="Volume",
                 marker_color=colors,
                 opacity=0.5
@@ -298,58 +357,77 @@ def create_price_volume_chart(data, close_prices, volumes, ticker):
         fig.update_yaxes(title_text="Prix ($)", row=1, col=1)
         fig.update_yaxes(title_text="Volume", row=2, col=1)
         
-        return json.loads(fig.to_json())
+        return figure_to_dict(fig)
     except Exception as e:
-        print(f"⚠️  Erreur Prix+Volume: {e}")
+        logger.warning(f"⚠️  Erreur Prix+Volume: {e}")
         return {}
 
 
 # ========================================
-# GRAPHIQUE 2: CYCLE DE KITCHIN (894j)
+# GRAPHIQUE 2: CYCLES (KITCHIN 894j ET LONGUEURS CONFIGURABLES)
 # ========================================
 
-def create_kitchin_cycle(data, close_prices, ticker):
-    """Analyse du cycle de Kitchin (894 jours)"""
-    try:
-        kitchin_length = 894
-        
-        # Calculer cycle actuel
-        remaining = len(close_prices) % kitchin_length
-        if remaining == 0:
-            remaining = kitchin_length
-        
-        start_idx = len(close_prices) - remaining
-        current_cycle = close_prices.iloc[start_idx:].reset_index(drop=True)
-        
-        # Calculer moyenne des cycles précédents
-        all_cycles = []
-        for i in range(0, len(close_prices) - kitchin_length, kitchin_length):
-            cycle = close_prices.iloc[i:i+kitchin_length]
-            if len(cycle) == kitchin_length:
-                # Normaliser
-                cycle_norm = (cycle / cycle.iloc[0]) * 100
-                all_cycles.append(cycle_norm.values)
-        
-        if len(all_cycles) > 0:
-            avg_cycle = np.mean(all_cycles, axis=0)
-        else:
-            avg_cycle = None
-        
-        # Normaliser cycle actuel
-        current_norm = (current_cycle / current_cycle.iloc[0]) * 100
-        
-        # Stats
-        jour_actuel = remaining
-        cours_actuel = round(float(close_prices.iloc[-1]), 2)
+def calculate_cycles(prices, lengths=None):
+    """
+    Analyse de plusieurs longueurs de cycle sur la même série.
+    Retourne {longueur: {'current_norm', 'avg_cycle', 'bands', 'stats'}}
+    (cycle actuel normalisé base 100, moyenne des cycles précédents,
+    enveloppe de dispersion et statistiques de position).
+    """
+    lengths = parse_cycle_lengths(lengths)
+    folded_cycles = fold_cycles(prices.close, lengths)
+    cours_actuel = round(float(prices.close[-1]), 2)
+    
+    cycles = {}
+    for length, folded in folded_cycles.items():
+        start_idx = folded['start_idx']
         
-        if avg_cycle is not None and jour_actuel <= len(avg_cycle):
-            prix_attendu = avg_cycle[jour_actuel-1]
-            cours_attendu = round(float(current_cycle.iloc[0] * prix_attendu / 100), 2)
+        if folded['expected'] is not None:
+            cours_attendu = round(float(prices.close[start_idx] * folded['expected'] / 100), 2)
             ecart_pct = round(((cours_actuel - cours_attendu) / cours_attendu) * 100, 2)
         else:
             cours_attendu = cours_actuel
             ecart_pct = 0.0
         
+        stats = {
+            'longueur': length,
+            'jour_actuel': len(folded['current_norm']),
+            'cours_actuel': cours_actuel,
+            'prix_moyen_attendu': cours_attendu,
+            'ecart_pct': ecart_pct,
+            'cycles_passes': folded['n_cycles'],
+            'debut_cycle': prices.date_label(start_idx)
+        }
+        
+        cycles[length] = {
+            'current_norm': folded['current_norm'],
+            'avg_cycle': folded['avg_cycle'],
+            'bands': folded['bands'],
+            'stats': stats
+        }
+    
+    return cycles
+
+
+def calculate_kitchin_cycle(prices, kitchin_length=KITCHIN_LENGTH):
+    """Cycle de Kitchin seul (voir calculate_cycles)"""
+    return calculate_cycles(prices, [kitchin_length])[kitchin_length]
+
+
+def create_kitchin_cycle(prices, ticker, cycles=None):
+    """
+    Graphique du cycle principal (premier de la liste, Kitchin par défaut).
+    Retourne (figure, stats du cycle principal, stats de tous les cycles).
+    """
+    try:
+        all_cycles = calculate_cycles(prices, cycles)
+        length = next(iter(all_cycles))
+        kitchin = all_cycles[length]
+        current_norm = kitchin['current_norm']
+        avg_cycle = kitchin['avg_cycle']
+        stats = kitchin['stats']
+        jour_actuel = stats['jour_actuel']
+        
         # Graphique
         fig = go.Figure()
         
@@ -361,6 +439,29 @@ def create_kitchin_cycle(data, close_prices, ticker):
             line=dict(color='#667eea', width=3)
         ))
         
+        bands = kitchin['bands']
+        if bands is not None:
+            low_pct, high_pct = CYCLE_BAND_PERCENTILES
+            days = list(range(1, len(bands['upper'])+1))
+            fig.add_trace(go.Scatter(
+                x=days,
+                y=bands['upper'],
+                mode='lines',
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo='skip'
+            ))
+            fig.add_trace(go.Scatter(
+                x=days,
+                y=bands['lower'],
+                mode='lines',
+                line=dict(width=0),
+                fill='tonexty',
+                fillcolor='rgba(255, 165, 0, 0.15)',
+                name=f'Enveloppe P{low_pct}-P{high_pct}',
+                hoverinfo='skip'
+            ))
+        
         if avg_cycle is not None:
             fig.add_trace(go.Scatter(
                 x=list(range(1, len(avg_cycle)+1)),
@@ -378,66 +479,105 @@ def create_kitchin_cycle(data, close_prices, ticker):
             annotation_position="top"
         )
         
+        title = f"Cycle de Kitchin ({length}j)" if length == KITCHIN_LENGTH else f"Cycle de {length}j"
         fig.update_layout(
-            title=f"Cycle de Kitchin (894j) - {ticker}",
+            title=f"{title} - {ticker}",
             xaxis_title="Jour du cycle",
             yaxis_title="Prix normalisé (base 100)",
             height=450,
             hovermode='x unified'
         )
         
-        stats = {
-            'jour_actuel': jour_actuel,
-            'cours_actuel': cours_actuel,
-            'prix_moyen_attendu': cours_attendu,
-            'ecart_pct': ecart_pct,
-            'debut_cycle': data['Date'].iloc[start_idx].strftime('%d-%m-%Y')
-        }
-        
-        return json.loads(fig.to_json()), stats
+        return figure_to_dict(fig), stats, [c['stats'] for c in all_cycles.values()]
         
     except Exception as e:
-        print(f"⚠️  Erreur Kitchin: {e}")
-        return {}, {'jour_actuel': 0, 'cours_actuel': 0, 'ecart_pct': 0}
-
+        logger.warning(f"⚠️  Erreur Kitchin: {e}")
+        return {}, {'jour_actuel': 0, 'cours_actuel': 0, 'ecart_pct': 0}, []
 
 # ========================================
 # GRAPHIQUE 3: VOLATILITÉ
 # ========================================
 
-def create_volatility_analysis(data, close_prices, ticker):
-    """Analyse complète de la volatilité"""
+def volatility_stats(prices, ticker=None, returns=None):
+    """
+    Volatilité courante, médiane, moyenne (%), structure par terme, EWMA
+    et projection 12 mois GARCH(1,1) (repli : moyenne des 60 dernières valeurs).
+    Avec ticker, l'état en ligne persisté du ticker est repris et seules
+    les nouvelles barres sont traitées ; sinon l'état est construit sur
+    tout l'historique.
+    """
+    engine = None
+    if ticker is not None:
+        try:
+            engine = get_volatility_store().update(ticker, prices.dates, prices.close)
+        except Exception as e:
+            logger.warning(f"⚠️  État de volatilité indisponible pour {ticker}: {e}")
+    if engine is None:
+        engine = OnlineVolatility.from_history(None, prices.close)
+    
+    stats = engine.stats()
+    if returns is None:
+        returns = simple_returns(prices.close)
+    
+    outlook = volatility_outlook(returns)
+    stats.update(outlook)
+    if outlook['garch'] is not None:
+        stats['proj_12m'] = outlook['garch']['forecast_vol']
+    return stats
+
+
+def calculate_volatility(prices, ticker=None, features=None):
+    """
+    Volatilité glissante 30j et EWMA annualisées (%), alignées sur les
+    barres 1..n-1, et statistiques associées, toutes calculées à partir
+    des rendements du FeatureFrame de l'analyse
+    """
+    if features is None:
+        features = FeatureFrame(prices)
+    
+    return {
+        'rolling_vol': features.rolling_volatility(VOL_WINDOW),
+        'ewma_vol': features.ewma_volatility,
+        'stats': volatility_stats(prices, ticker, features.returns)
+    }
+
+
+def create_volatility_analysis(prices, ticker, max_points=None, date_range=None, features=None):
+    """
+    Analyse complète de la volatilité
+    max_points / date_range : voir create_price_volume_chart
+    features : séries dérivées partagées de l'analyse (FeatureFrame)
+    """
     try:
-        returns = close_prices.pct_change().dropna()
-        rolling_vol = returns.rolling(window=30).std() * np.sqrt(252) * 100
-        
-        current_vol = round(float(rolling_vol.iloc[-1]), 2)
-        median_vol = round(float(rolling_vol.median()), 2)
-        mean_vol = round(float(rolling_vol.mean()), 2)
-        
-        # Projection 12 mois
-        recent_vol = rolling_vol.iloc[-60:].mean()
-        proj_12m = round(float(recent_vol), 2)
-        
-        # Niveau
-        if current_vol > median_vol * 1.5:
-            label = "High"
-        elif current_vol < median_vol * 0.7:
-            label = "Low"
-        else:
-            label = "Normal"
+        volatility = calculate_volatility(prices, ticker, features)
+        rolling_vol = volatility['rolling_vol']
+        stats = volatility['stats']
+        current_vol = stats['current_vol']
+        median_vol = stats['median_vol']
         
         # Graphique 1: Courbe volatilité
+        offset = len(prices) - len(rolling_vol)
+        idx = select_points(rolling_vol, max_points, date_mask(prices.dates[offset:], date_range))
+        dates = prices.date_labels(idx + offset)
+        
         fig1 = go.Figure()
         
         fig1.add_trace(go.Scatter(
-            x=data["Date_str"].iloc[len(data)-len(rolling_vol):],
-            y=rolling_vol,
+            x=dates,
+            y=rolling_vol[idx],
             mode='lines',
             name='Volatilité 30j',
             line=dict(color='#667eea', width=2)
         ))
         
+        fig1.add_trace(go.Scatter(
+            x=dates,
+            y=volatility['ewma_vol'][idx],
+            mode='lines',
+            name=f'EWMA (λ={EWMA_LAMBDA})',
+            line=dict(color='#48bb78', width=1)
+        ))
+        
         fig1.add_hline(
             y=median_vol,
             line_dash="dash",
@@ -453,15 +593,18 @@ def create_volatility_analysis(data, close_prices, ticker):
             hovermode='x unified'
         )
         
-        # Graphique 2: Gauge
+        # Graphique 2: Gauge (aiguille rouge : projection 12 mois)
+        proj_12m = stats['proj_12m']
+        terms = " · ".join(f"{t['window']}j {t['vol']}%" for t in stats['term_structure'])
         fig2 = go.Figure(go.Indicator(
             mode="gauge+number+delta",
             value=current_vol,
             domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': f"Volatilité Actuelle - {ticker}"},
+            title={'text': f"Volatilité Actuelle - {ticker}<br>"
+                           f"<sub>Projection 12m : {proj_12m}% · {terms}</sub>"},
             delta={'reference': median_vol, 'suffix': '% vs médiane'},
             gauge={
-                'axis': {'range': [None, median_vol * 2]},
+                'axis': {'range': [None, max(median_vol * 2, current_vol, proj_12m)]},
                 'bar': {'color': "#667eea"},
                 'steps': [
                     {'range': [0, median_vol * 0.7], 'color': "lightgreen"},
@@ -471,25 +614,17 @@ def create_volatility_analysis(data, close_prices, ticker):
                 'threshold': {
                     'line': {'color': "red", 'width': 4},
                     'thickness': 0.75,
-                    'value': current_vol
+                    'value': proj_12m
                 }
             }
         ))
         
         fig2.update_layout(height=400)
         
-        stats = {
-            'current_vol': current_vol,
-            'median_vol': median_vol,
-            'mean_vol': mean_vol,
-            'proj_12m': proj_12m,
-            'label': label
-        }
-        
-        return json.loads(fig1.to_json()), json.loads(fig2.to_json()), stats
+        return figure_to_dict(fig1), figure_to_dict(fig2), stats
         
     except Exception as e:
-        print(f"⚠️  Erreur Volatilité: {e}")
+        logger.warning(f"⚠️  Erreur Volatilité: {e}")
         return {}, {}, {'current_vol': 0, 'proj_12m': 0, 'label': 'N/A'}
 
 
@@ -497,21 +632,34 @@ def create_volatility_analysis(data, close_prices, ticker):
 # GRAPHIQUE 4: CYCLE ANNUEL (SAISONNALITÉ)
 # ========================================
 
-def create_annual_cycle(data, close_prices, ticker):
+MONTHS = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Jun', 
+          'Jul', 'Aoû', 'Sep', 'Oct', 'Nov', 'Déc']
+
+
+def calculate_annual_cycle(prices, features=None):
+    """Rendement moyen (%) par mois sur les 10 dernières années"""
+    if features is None:
+        features = FeatureFrame(prices)
+    
+    # Moyenne des rendements par mois sur les 10 dernières années
+    months, means = features.monthly_mean_returns(years=10)
+    monthly_returns = pd.Series(means, index=months)
+    
+    stats = {
+        'best_month': MONTHS[monthly_returns.idxmax() - 1],
+        'worst_month': MONTHS[monthly_returns.idxmin() - 1]
+    }
+    
+    return {'monthly_returns': monthly_returns, 'stats': stats}
+
+
+def create_annual_cycle(prices, ticker, features=None):
     """Analyse de la saisonnalité annuelle"""
     try:
-        df_temp = data.copy()
-        df_temp['Close'] = close_prices
-        df_temp['Month'] = df_temp['Date'].dt.month
-        df_temp['Year'] = df_temp['Date'].dt.year
-        df_temp['Returns'] = close_prices.pct_change() * 100
-        
-        # Moyenne des rendements par mois sur les 10 dernières années
-        recent_years = df_temp[df_temp['Year'] >= df_temp['Year'].max() - 10]
-        monthly_returns = recent_years.groupby('Month')['Returns'].mean()
-        
-        months = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Jun', 
-                  'Jul', 'Aoû', 'Sep', 'Oct', 'Nov', 'Déc']
+        annual = calculate_annual_cycle(prices, features)
+        monthly_returns = annual['monthly_returns']
+        stats = annual['stats']
+        months = [MONTHS[m - 1] for m in monthly_returns.index]
         
         fig = go.Figure()
         
@@ -535,48 +683,36 @@ def create_annual_cycle(data, close_prices, ticker):
         
         fig.add_hline(y=0, line_dash="dash", line_color="gray")
         
-        stats = {
-            'best_month': months[monthly_returns.idxmax() - 1],
-            'worst_month': months[monthly_returns.idxmin() - 1]
-        }
-        
-        return json.loads(fig.to_json()), stats
+        return figure_to_dict(fig), stats
         
     except Exception as e:
-        print(f"⚠️  Erreur Cycle Annuel: {e}")
+        logger.warning(f"⚠️  Erreur Cycle Annuel: {e}")
         return {}, {}
 
 
 # ========================================
-# GRAPHIQUE 5: DÉCOMPOSITION STL
+# GRAPHIQUE 5: DÉCOMPOSITION SAISONNIÈRE (STL)
 # ========================================
 
-def create_returns_decomposition(data, close_prices, ticker):
-    """Décomposition STL des rendements"""
+def create_returns_decomposition(prices, ticker, max_points=None, date_range=None, features=None):
+    """
+    Décomposition saisonnière des rendements (STL robuste ou moyennes mobiles,
+    selon DECOMPOSITION_METHOD), réutilisée d'une requête à l'autre
+    max_points / date_range : voir create_price_volume_chart
+    features : séries dérivées partagées de l'analyse (FeatureFrame)
+    """
     try:
-        returns = close_prices.pct_change().dropna() * 100
-        
-        # Déterminer la période optimale
-        # Pour la bourse : 252 jours ouvrés = 1 an
-        # Nécessite au moins 2 cycles complets (2*252 = 504 jours)
-        if len(returns) >= 504:
-            period = 252  # Cycle annuel
-            print("      → Utilisation période annuelle (252j)")
-        elif len(returns) >= 126:
-            period = 63  # Cycle trimestriel
-            print("      → Utilisation période trimestrielle (63j)")
-        elif len(returns) >= 60:
-            period = 30  # Cycle mensuel
-            print("      → Utilisation période mensuelle (30j)")
-        else:
-            raise ValueError("Pas assez de données pour STL (minimum 60 jours)")
+        if features is None:
+            features = FeatureFrame(prices)
+        returns = features.returns_pct
         
-        decomposition = seasonal_decompose(
-            returns,
-            model='additive',
-            period=period,
-            extrapolate_trend='freq'
-        )
+        # Période : annuelle (252j), trimestrielle (63j) ou mensuelle (30j),
+        # avec au moins 2 cycles complets
+        period = choose_period(len(returns))
+        logger.debug(f"→ Période de décomposition : {period}j")
+        
+        decomposition = get_decomposition_cache().get(ticker, prices.last_bar, returns, period)
+        method_label = "STL robuste" if DECOMPOSITION_METHOD == 'stl' else "moyennes mobiles"
         
         fig = make_subplots(
             rows=4, cols=1,
@@ -585,21 +721,25 @@ def create_returns_decomposition(data, close_prices, ticker):
             subplot_titles=('Rendements', 'Tendance', 'Saisonnier', 'Résidu')
         )
         
-        dates = data["Date_str"].iloc[len(data)-len(returns):]
+        # Mêmes positions pour les 4 traces (axe des dates partagé),
+        # choisies par LTTB sur les rendements, la série la plus heurtée
+        offset = len(prices) - len(returns)
+        idx = select_points(returns, max_points, date_mask(prices.dates[offset:], date_range))
+        dates = prices.date_labels(idx + offset)
         
-        fig.add_trace(go.Scatter(x=dates, y=returns, name='Rendements', 
+        fig.add_trace(go.Scatter(x=dates, y=returns[idx], name='Rendements', 
                                  line=dict(color='blue')), row=1, col=1)
-        fig.add_trace(go.Scatter(x=dates, y=decomposition.trend, name='Tendance',
+        fig.add_trace(go.Scatter(x=dates, y=decomposition['trend'][idx], name='Tendance',
                                  line=dict(color='green')), row=2, col=1)
-        fig.add_trace(go.Scatter(x=dates, y=decomposition.seasonal, name='Saisonnier',
+        fig.add_trace(go.Scatter(x=dates, y=decomposition['seasonal'][idx], name='Saisonnier',
                                  line=dict(color='orange')), row=3, col=1)
-        fig.add_trace(go.Scatter(x=dates, y=decomposition.resid, name='Résidu',
+        fig.add_trace(go.Scatter(x=dates, y=decomposition['resid'][idx], name='Résidu',
                                  line=dict(color='red')), row=4, col=1)
         
         fig.update_layout(
             height=800,
             showlegend=False,
-            title_text=f"Décomposition STL (période: {period}j) - {ticker}"
+            title_text=f"Décomposition {method_label} (période: {period}j) - {ticker}"
         )
         
         fig.update_yaxes(title_text="Rendement (%)", row=1, col=1)
@@ -608,10 +748,10 @@ def create_returns_decomposition(data, close_prices, ticker):
         fig.update_yaxes(title_text="Résidu", row=4, col=1)
         fig.update_xaxes(title_text="Date", row=4, col=1)
         
-        return json.loads(fig.to_json())
+        return figure_to_dict(fig)
         
     except Exception as e:
-        print(f"⚠️  Erreur Décomposition: {e}")
+        logger.warning(f"⚠️  Erreur Décomposition: {e}")
         return {}
 
 
@@ -619,57 +759,80 @@ def create_returns_decomposition(data, close_prices, ticker):
 # GRAPHIQUE 6: COEFFICIENT DE HURST
 # ========================================
 
-def calculate_hurst_exponent(ts):
-    """Calcule le coefficient de Hurst"""
-    lags = range(2, min(100, len(ts)//2))
-    tau = []
-    
-    for lag in lags:
-        # Calculer les différences
-        pp = np.subtract(ts[lag:], ts[:-lag])
-        tau.append(np.std(pp))
-    
-    # Régression linéaire en log-log
-    lags_log = np.log(lags)
-    tau_log = np.log(tau)
+# Estimateur utilisé pour le graphique et la stat principale : 'variance', 'rs' ou 'dfa'
+HURST_METHOD = os.environ.get('HURST_METHOD', 'variance')
+
+# Fenêtre du Hurst glissant (≈ 1 an de séances)
+HURST_ROLLING_WINDOW = 252
+
+def calculate_hurst_exponent(prices, method=None, features=None):
+    """
+    Coefficient de Hurst sur les log-prix : estimateur principal,
+    comparaison des trois estimateurs et dernière valeur glissante
+    """
+    if features is None:
+        features = FeatureFrame(prices)
+    log_prices = features.log_prices
+    method = method or HURST_METHOD
     
-    poly = np.polyfit(lags_log, tau_log, 1)
-    hurst = poly[0]
+    fit = hurst_exponent(log_prices, method)
+    estimators = {
+        name: round(fit['hurst'] if name == method else hurst_exponent(log_prices, name)['hurst'], 3)
+        for name in ESTIMATORS
+    }
+    rolling = rolling_hurst(log_prices, HURST_ROLLING_WINDOW)
+    current = rolling[-1] if len(rolling) else np.nan
     
-    return hurst, lags, tau
+    return {
+        'fit': fit,
+        'method': method,
+        'stats': {
+            'hurst': round(fit['hurst'], 3),
+            'interpretation': interpret_hurst(fit['hurst']),
+            'estimators': estimators,
+            'rolling_1y': round(float(current), 3) if np.isfinite(current) else None
+        }
+    }
 
-def create_hurst_analysis(data, close_prices, ticker):
+def interpret_hurst(hurst):
+    """Interprétation textuelle du coefficient de Hurst"""
+    if hurst > 0.5:
+        return "Tendance persistante (mémoire long terme)"
+    elif hurst < 0.5:
+        return "Retour à la moyenne (anti-persistance)"
+    else:
+        return "Marche aléatoire"
+
+def create_hurst_analysis(prices, ticker, features=None):
     """Analyse du coefficient de Hurst"""
     try:
-        # Calculer Hurst sur prix
-        hurst, lags, tau = calculate_hurst_exponent(close_prices.values)
+        # Calculer Hurst sur log-prix
+        result = calculate_hurst_exponent(prices, features=features)
+        fit = result['fit']
+        hurst = fit['hurst']
+        labels = ESTIMATORS[result['method']]
         
         # Interprétation
-        if hurst > 0.5:
-            interpretation = "Tendance persistante (mémoire long terme)"
-        elif hurst < 0.5:
-            interpretation = "Retour à la moyenne (anti-persistance)"
-        else:
-            interpretation = "Marche aléatoire"
+        interpretation = result['stats']['interpretation']
         
         fig = go.Figure()
         
         # Scatter des valeurs
         fig.add_trace(go.Scatter(
-            x=np.log(lags),
-            y=np.log(tau),
+            x=fit['x'],
+            y=fit['y'],
             mode='markers',
             name='Données',
             marker=dict(size=6, color='blue')
         ))
         
         # Ligne de régression
-        poly = np.polyfit(np.log(lags), np.log(tau), 1)
+        poly = np.polyfit(fit['x'], fit['y'], 1)
         fit_line = np.poly1d(poly)
         
         fig.add_trace(go.Scatter(
-            x=np.log(lags),
-            y=fit_line(np.log(lags)),
+            x=fit['x'],
+            y=fit_line(fit['x']),
             mode='lines',
             name=f'Régression (H={hurst:.3f})',
             line=dict(color='red', dash='dash')
@@ -677,8 +840,8 @@ def create_hurst_analysis(data, close_prices, ticker):
         
         fig.update_layout(
             title=f"Coefficient de Hurst - {ticker}<br><sub>{interpretation}</sub>",
-            xaxis_title="log(lag)",
-            yaxis_title="log(std)",
+            xaxis_title=labels['x'],
+            yaxis_title=labels['y'],
             height=450,
             annotations=[
                 dict(
@@ -693,10 +856,10 @@ def create_hurst_analysis(data, close_prices, ticker):
             ]
         )
         
-        return json.loads(fig.to_json())
+        return figure_to_dict(fig)
         
     except Exception as e:
-        print(f"⚠️  Erreur Hurst: {e}")
+        logger.warning(f"⚠️  Erreur Hurst: {e}")
         return {}
 
 
@@ -704,52 +867,58 @@ def create_hurst_analysis(data, close_prices, ticker):
 # GRAPHIQUE 7 & 8: ANALYSE FFT
 # ========================================
 
-def create_fft_analysis(data, close_prices, ticker):
-    """Analyse FFT - Corona Spectrum + Cycles Dominants"""
+def calculate_fft_spectrum(prices, top_n=5, features=None):
+    """
+    Spectre moyenné des rendements et cycles dominants (périodes < 500 jours) :
+    pics locaux du spectre de Welch, position affinée par interpolation
+    """
+    if features is None:
+        features = FeatureFrame(prices)
+    returns = features.returns
+    freqs, power = power_spectrum(returns)
+    
+    # Bande utile : cycles de 2 à 500 jours
+    band = (freqs >= 1 / SPECTRAL_MAX_PERIOD) & (freqs <= 1 / SPECTRAL_MIN_PERIOD)
+    top_periods, top_powers = top_peaks(freqs, power, top_n)
+    
+    return {
+        'returns': returns,
+        'power': power[band],
+        'periods': 1 / freqs[band],
+        'top_periods': top_periods,
+        'top_powers': top_powers
+    }
+
+
+def create_fft_analysis(prices, ticker, features=None):
+    """Analyse spectrale - Corona (spectre glissant) + Cycles Dominants"""
     try:
-        # Préparer les données
-        returns = close_prices.pct_change().dropna()
-        N = len(returns)
-        
-        # FFT
-        yf = fft(returns.values)
-        xf = fftfreq(N, 1)[:N//2]
-        power = 2.0/N * np.abs(yf[:N//2])
+        spectrum = calculate_fft_spectrum(prices, features=features)
+        top_periods = spectrum['top_periods']
+        top_powers = spectrum['top_powers']
         
-        # Filtrer les basses fréquences (trop longues)
-        mask = xf > 1/500  # Cycles < 500 jours
-        xf_filtered = xf[mask]
-        power_filtered = power[mask]
+        logger.debug(f"→ Cycles détectés : {', '.join([f'{int(p)}j' for p in top_periods])}")
         
-        # Convertir fréquences en périodes (jours)
-        periods = 1 / xf_filtered
+        # GRAPHIQUE 1: Corona (carte temps-fréquence du spectre glissant)
+        ends, periods, power = sliding_spectrum(spectrum['returns'])
         
-        # Top 5 cycles
-        top_indices = np.argsort(power_filtered)[-5:][::-1]
-        top_periods = periods[top_indices]
-        top_powers = power_filtered[top_indices]
-        
-        print(f"      → Cycles détectés : {', '.join([f'{int(p)}j' for p in top_periods])}")
-        
-        # GRAPHIQUE 1: Corona Spectrum (polaire)
         fig1 = go.Figure()
         
-        theta = np.linspace(0, 360, len(power_filtered))
-        
-        fig1.add_trace(go.Scatterpolar(
-            r=power_filtered,
-            theta=theta,
-            mode='lines',
-            fill='toself',
-            name='Spectre FFT',
-            line=dict(color='#667eea')
+        fig1.add_trace(go.Heatmap(
+            x=prices.date_labels(ends + 1),
+            y=periods,
+            z=corona_levels(power).T,
+            colorscale='Hot',
+            zmin=CORONA_FLOOR_DB,
+            zmax=0,
+            colorbar=dict(title='dB'),
+            hovertemplate='%{x}<br>Période: %{y:.0f}j<br>%{z} dB<extra></extra>'
         ))
         
         fig1.update_layout(
-            title=f"Corona Spectrum FFT - {ticker}",
-            polar=dict(
-                radialaxis=dict(visible=True)
-            ),
+            title=f"Corona Spectrum - {ticker}",
+            xaxis_title="Date",
+            yaxis=dict(title="Période (jours)", type='log'),
             height=450
         )
         
@@ -766,7 +935,7 @@ def create_fft_analysis(data, close_prices, ticker):
             y_title = "Puissance"
         
         fig2.add_trace(go.Bar(
-            x=[f"{int(p)}j" for p in top_periods],
+            x=[f"{p:.0f}j" for p in top_periods],
             y=top_powers,
             marker_color='#667eea',
             text=text_format,
@@ -782,21 +951,428 @@ def create_fft_analysis(data, close_prices, ticker):
             showlegend=False
         )
         
-        return json.loads(fig1.to_json()), json.loads(fig2.to_json())
+        return figure_to_dict(fig1), figure_to_dict(fig2)
         
     except Exception as e:
-        print(f"⚠️  Erreur FFT: {e}")
+        logger.warning(f"⚠️  Erreur FFT: {e}")
         return {}, {}
 
 
+# ========================================
+# ORCHESTRATION DES ÉTAPES
+# ========================================
+
+# Chaque étape ne fait que lire l'historique (PriceSeries) : elles sont indépendantes
+# et peuvent tourner en parallèle. outputs = emplacement de chaque valeur retournée.
+# 'features' : l'étape reçoit le FeatureFrame partagé (rendements calculés une fois).
+ANALYSIS_STAGES = [
+    {'name': 'price_volume', 'label': "Prix + Volume", 'fn': create_price_volume_chart,
+     'outputs': [('graphs', 'price_volume')]},
+    {'name': 'kitchin', 'label': "Cycle de Kitchin", 'fn': create_kitchin_cycle,
+     'cycles': True,
+     'outputs': [('graphs', 'kitchin'), ('stats', 'kitchin'), ('stats', 'cycles')]},
+    {'name': 'annual', 'label': "Cycle Annuel", 'fn': create_annual_cycle,
+     'features': True, 'outputs': [('graphs', 'annual'), ('stats', 'annual')]},
+    {'name': 'returns', 'label': "Décomposition STL", 'fn': create_returns_decomposition,
+     'features': True, 'outputs': [('graphs', 'returns')]},
+    {'name': 'volatility', 'label': "Volatilité", 'fn': create_volatility_analysis,
+     'features': True,
+     'outputs': [('graphs', 'volatility'), ('graphs', 'vol_gauge'), ('stats', 'volatility')]},
+    {'name': 'hurst', 'label': "Coefficient de Hurst", 'fn': create_hurst_analysis,
+     'features': True, 'outputs': [('graphs', 'hurst')]},
+    {'name': 'fft', 'label': "FFT Corona Spectrum", 'fn': create_fft_analysis,
+     'features': True, 'outputs': [('graphs', 'corona'), ('graphs', 'dominant_cycles')]},
+]
+
+STAGES_BY_NAME = {stage['name']: stage for stage in ANALYSIS_STAGES}
+
+EXECUTOR_MODES = ('serial', 'thread', 'process')
+
+# Pools partagés, créés au premier usage (après le fork des workers gunicorn)
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def run_stage(name, prices, ticker, cycles=None, features=None):
+    """Exécute une étape et retourne [((section, clé), valeur), ...]"""
+    stage = STAGES_BY_NAME[name]
+    options = {}
+    if stage.get('cycles'):
+        options['cycles'] = cycles
+    if stage.get('features'):
+        options['features'] = features
+    values = stage['fn'](prices, ticker, **options)
+    
+    if len(stage['outputs']) == 1:
+        values = (values,)
+    return list(zip(stage['outputs'], values))
+
+
+def run_stage_timed(name, prices, ticker, cycles=None, features=None):
+    """
+    run_stage chronométré : retourne (outputs, durée en s). La durée est
+    enregistrée par l'appelant, y compris quand l'étape tourne dans un
+    processus du pool (les métriques du sous-processus seraient perdues).
+    """
+    start = time.perf_counter()
+    outputs = run_stage(name, prices, ticker, cycles, features)
+    return outputs, time.perf_counter() - start
+
+
+def get_executor(mode, name='stages'):
+    """
+    Retourne le pool correspondant au mode (None pour 'serial').
+    name sépare les pools d'usages différents : une tâche ne doit jamais
+    attendre un pool qu'elle occupe elle-même.
+    """
+    if mode not in EXECUTOR_MODES:
+        logger.warning(f"⚠️  Mode d'exécution inconnu '{mode}', exécution en série")
+        return None
+    if mode == 'serial':
+        return None
+    
+    with _executors_lock:
+        pool = _executors.get((name, mode))
+        if pool is None:
+            pool_class = ThreadPoolExecutor if mode == 'thread' else ProcessPoolExecutor
+            pool = pool_class(max_workers=ANALYSIS_WORKERS)
+            _executors[(name, mode)] = pool
+    return pool
+
+
+def iter_analysis_stages(prices, ticker, executor=None, cycles=None):
+    """
+    Exécute toutes les étapes et produit (nom, outputs) au fur et à mesure
+    qu'elles se terminent. Une étape qui échoue dans le pool est relancée
+    localement (chaque create_* isole déjà ses propres erreurs).
+    """
+    pool = get_executor(executor or ANALYSIS_EXECUTOR)
+    total = len(ANALYSIS_STAGES)
+    features = FeatureFrame(prices)
+    
+    if pool is None:
+        for i, stage in enumerate(ANALYSIS_STAGES, 1):
+            logger.debug(f"[{i}/{total}] {stage['label']}...")
+            outputs, seconds = run_stage_timed(stage['name'], prices, ticker, cycles, features)
+            STAGE_SECONDS.observe(seconds, stage=stage['name'])
+            yield stage['name'], outputs
+        return
+    
+    futures = {
+        pool.submit(run_stage_timed, stage['name'], prices, ticker, cycles, features): (i, stage)
+        for i, stage in enumerate(ANALYSIS_STAGES, 1)
+    }
+    for future in as_completed(futures):
+        i, stage = futures[future]
+        try:
+            outputs, seconds = future.result()
+        except Exception as e:
+            logger.warning(f"⚠️  Étape '{stage['label']}' en échec dans le pool ({e}), relance locale")
+            outputs, seconds = run_stage_timed(stage['name'], prices, ticker, cycles, features)
+        STAGE_SECONDS.observe(seconds, stage=stage['name'])
+        logger.debug(f"[{i}/{total}] {stage['label']} ✓ ({seconds:.2f} s)")
+        yield stage['name'], outputs
+
+
+# ========================================
+# MODE STATISTIQUES (SANS GRAPHIQUES)
+# ========================================
+
+# 'full' : graphiques + stats ; 'stats' : statistiques seules
+ANALYSIS_MODES = ('full', 'stats')
+
+
+def compute_market_stats(prices, cycles=None, ticker=None):
+    """Toutes les statistiques de l'analyse, sans construire aucune figure Plotly"""
+    stats = {'history': history_stats(prices, cycles)}
+    features = FeatureFrame(prices)
+    
+    try:
+        stats['cycles'] = [c['stats'] for c in calculate_cycles(prices, cycles).values()]
+        stats['kitchin'] = stats['cycles'][0]
+    except Exception as e:
+        logger.warning(f"⚠️  Erreur Kitchin: {e}")
+        stats['kitchin'] = {'jour_actuel': 0, 'cours_actuel': 0, 'ecart_pct': 0}
+        stats['cycles'] = []
+    
+    try:
+        stats['annual'] = calculate_annual_cycle(prices, features)['stats']
+    except Exception as e:
+        logger.warning(f"⚠️  Erreur Cycle Annuel: {e}")
+        stats['annual'] = {}
+    
+    try:
+        stats['volatility'] = volatility_stats(prices, ticker, features.returns)
+    except Exception as e:
+        logger.warning(f"⚠️  Erreur Volatilité: {e}")
+        stats['volatility'] = {'current_vol': 0, 'proj_12m': 0, 'label': 'N/A'}
+    
+    try:
+        stats['hurst'] = calculate_hurst_exponent(prices, features=features)['stats']
+    except Exception as e:
+        logger.warning(f"⚠️  Erreur Hurst: {e}")
+        stats['hurst'] = {}
+    
+    try:
+        spectrum = calculate_fft_spectrum(prices, features=features)
+        stats['fft'] = {
+            'dominant_cycles': [int(p) for p in spectrum['top_periods']],
+            'powers': [float(p) for p in spectrum['top_powers']]
+        }
+    except Exception as e:
+        logger.warning(f"⚠️  Erreur FFT: {e}")
+        stats['fft'] = {}
+    
+    return stats
+
+
+def analyze_market_stats(ticker_symbol, cycles=None):
+    """Équivalent de analyze_market_cycles limité aux statistiques"""
+    try:
+        ticker_symbol = ticker_symbol.upper().strip()
+        
+        prices, error = prepare_market_data(ticker_symbol, cycles)
+        if error:
+            return {"error": error}
+        
+        logger.info("📊 Calcul des statistiques (sans graphiques)...")
+        
+        with timed('stats'):
+            stats = compute_market_stats(prices, cycles, ticker_symbol)
+        
+        return {
+            "success": True,
+            "ticker": ticker_symbol,
+            "stats": stats
+        }
+    
+    except Exception as e:
+        logger.exception(f"❌ Erreur d'analyse de {ticker_symbol}")
+        return {"error": f"Erreur: {str(e)}"}
+
+
+# ========================================
+# GRAPHIQUES À LA DEMANDE (ZOOM)
+# ========================================
+
+# Graphiques sous-échantillonnés, disponibles en pleine résolution sur une plage
+ZOOMABLE_CHARTS = ('price_volume', 'volatility', 'returns')
+
+
+def build_chart(ticker, chart, date_range=None, max_points=0):
+    """
+    Reconstruit un seul graphique, sur une plage de dates et avec un budget
+    de points donné (0 = pleine résolution). Les calculs (volatilité glissante,
+    décomposition) restent faits sur tout l'historique avant découpage.
+    """
+    if chart not in ZOOMABLE_CHARTS:
+        return {'success': False, 'error': f"Graphique inconnu '{chart}'"}
+    
+    prices, error = prepare_market_data(ticker)
+    if error:
+        return {'success': False, 'error': error}
+    ticker = ticker.upper().strip()
+    
+    with timed(f'zoom_{chart}'):
+        if chart == 'price_volume':
+            figure = create_price_volume_chart(prices, ticker, max_points, date_range)
+        elif chart == 'volatility':
+            figure = create_volatility_analysis(prices, ticker, max_points, date_range)[0]
+        else:
+            figure = create_returns_decomposition(prices, ticker, max_points, date_range)
+    
+    return {'success': True, 'ticker': ticker, 'chart': chart, 'figure': figure}
+
+
+# ========================================
+# STREAMING PAR ÉTAPE
+# ========================================
+
+class StageFeed:
+    """
+    Étapes terminées d'une analyse en cours, publiées par le calcul
+    (leader du single-flight) et suivies par les flux SSE du même worker.
+    """
+    
+    def __init__(self):
+        self.events = []
+        self.finished = False
+        self._condition = threading.Condition()
+    
+    def publish(self, name, outputs):
+        with self._condition:
+            self.events.append((name, outputs))
+            self._condition.notify_all()
+    
+    def close(self):
+        with self._condition:
+            self.finished = True
+            self._condition.notify_all()
+    
+    def follow(self, deadline):
+        """
+        Produit (nom, outputs) depuis la première étape, puis au fil de
+        l'analyse ; s'arrête à la fin du calcul ou à deadline (time.monotonic).
+        """
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self.events) and not self.finished:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self._condition.wait(remaining)
+                if index >= len(self.events):
+                    return
+                event = self.events[index]
+            index += 1
+            yield event
+
+
+# Flux d'étapes des analyses complètes en cours dans ce worker
+_stage_feeds = {}
+_stage_feeds_lock = threading.Lock()
+
+
+def _open_stage_feed(ticker, cycles):
+    feed = StageFeed()
+    with _stage_feeds_lock:
+        _stage_feeds[(ticker, cycles)] = feed
+    return feed
+
+
+def _close_stage_feed(ticker, cycles, feed):
+    # Retiré avant d'être clos : un flux qui le voit terminé ne le retrouve plus
+    with _stage_feeds_lock:
+        if _stage_feeds.get((ticker, cycles)) is feed:
+            del _stage_feeds[(ticker, cycles)]
+    feed.close()
+
+
+def get_stage_feed(ticker, cycles=None):
+    """Flux d'étapes de l'analyse complète en cours pour ce ticker, ou None"""
+    with _stage_feeds_lock:
+        return _stage_feeds.get((ticker.upper().strip(), parse_cycle_lengths(cycles)))
+
+
+# Durée maximale d'un flux SSE (s) : au-delà, le client suit le job.
+# Reste sous le timeout gunicorn (30 s par défaut) d'un worker synchrone.
+STREAM_TIMEOUT = float(os.environ.get('STREAM_TIMEOUT', 20))
+STREAM_POLL_INTERVAL = 0.2
+
+
+def _stage_event(stage_name, outputs, done, total):
+    event = {'stage': stage_name, 'done': done, 'total': total, 'graphs': {}, 'stats': {}}
+    for (section, key), value in outputs:
+        event[section][key] = value
+    return event
+
+
+def _replay_analysis(payload, sent=()):
+    """Événements d'un résultat sérialisé, hors étapes déjà envoyées"""
+    total = len(ANALYSIS_STAGES)
+    result = json.loads(payload)
+    full = result.pop('full_analysis')
+    done = len(sent)
+    for stage in ANALYSIS_STAGES:
+        if stage['name'] in sent:
+            continue
+        done += 1
+        outputs = [((section, key), full[section][key]) for section, key in stage['outputs']]
+        yield 'stage', _stage_event(stage['name'], outputs, done, total)
+    yield 'summary', result
+
+
+def stream_analysis(ticker: str, cycles=None, timeout=STREAM_TIMEOUT):
+    """
+    Analyse produite étape par étape : génère des (événement, données)
+    - 'stage'   : graphiques/stats d'une étape dès qu'elle se termine
+    - 'summary' : résumé du dashboard (sans full_analysis)
+    - 'pending' : analyse inachevée après timeout s ({'job_id', 'ticker',
+                  'status'}) : le résultat se récupère via GET /analyze/<job_id>
+    - 'error'   : message d'erreur, fin du flux
+    Le calcul tourne dans le pool de jobs, via analyze_stock_cached : les
+    flux simultanés sur un même ticker partagent un seul calcul et le
+    résultat est mis en cache. Un job exécuté par un autre worker (backend
+    SQLite) n'est suivi qu'à sa fin.
+    """
+    from jobs import get_job_manager, JobQueueFull, DONE, FAILED
+    
+    ticker = ticker.upper().strip()
+    cycles = parse_cycle_lengths(cycles)
+    total = len(ANALYSIS_STAGES)
+    
+    # Résultat déjà en cache : rejouer les étapes immédiatement
+    cached = peek_cached_analysis(ticker, cycles=cycles)
+    if cached is not None:
+        yield from _replay_analysis(cached)
+        return
+    
+    manager = get_job_manager()
+    try:
+        job_id = manager.submit(ticker, cycles=list(cycles))
+    except JobQueueFull:
+        yield 'error', {'error': "Trop d'analyses en cours, réessayez dans quelques secondes", 'ticker': ticker}
+        return
+    
+    deadline = time.monotonic() + timeout
+    sent = []
+    while True:
+        job = manager.get(job_id)
+        if job is None:
+            yield 'error', {'error': 'Job introuvable ou expiré', 'ticker': ticker}
+            return
+        if job['status'] == DONE:
+            yield from _replay_analysis(job['payload'], sent)
+            return
+        if job['status'] == FAILED:
+            yield 'error', {'error': job['error'], 'ticker': ticker}
+            return
+        if time.monotonic() >= deadline:
+            logger.info(f"⏳ Flux de {ticker} rendu au suivi du job {job_id[:8]}")
+            yield 'pending', {'job_id': job_id, 'ticker': ticker, 'status': job['status']}
+            return
+        
+        feed = get_stage_feed(ticker, cycles)
+        if feed is None:
+            time.sleep(STREAM_POLL_INTERVAL)
+            continue
+        for name, outputs in feed.follow(deadline):
+            if name not in sent:
+                sent.append(name)
+                yield 'stage', _stage_event(name, outputs, len(sent), total)
+
+
 # ========================================
 # FONCTIONS UTILITAIRES
 # ========================================
 
+def date_mask(dates, date_range):
+    """Masque booléen des dates comprises dans date_range=(début, fin), ou None"""
+    if not date_range:
+        return None
+    
+    start, end = date_range
+    dates = pd.DatetimeIndex(dates)
+    mask = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start)
+    if end is not None:
+        mask &= dates <= pd.Timestamp(end)
+    return mask
+
+def figure_to_dict(fig):
+    """
+    Figure Plotly → dict (tableaux NumPy conservés).
+    Pas d'aller-retour JSON ici : la réponse est encodée une seule fois
+    par serialization.dumps.
+    """
+    return fig.to_plotly_json()
+
 def validate_ticker(ticker: str) -> bool:
-    """Vérifie si un ticker est valide"""
+    """Vérifie si un ticker est valide (métadonnées seules, sans l'historique)"""
     try:
-        data, error = download_stock_data_fixed(ticker)
-        return data is not None and not data.empty
-    except:
+        return get_price_store().lookup(ticker) is not None
+    except Exception as e:
+        logger.warning(f"⚠️  Vérification impossible pour {ticker}: {e}")
         return False
\ No newline at end of file
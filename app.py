@@ -1,15 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+import json
 import os
 from datetime import datetime
 
+from observability import configure_logging, render as render_metrics, timed, PAYLOAD_BYTES, PROMETHEUS_CONTENT_TYPE
+
+configure_logging()
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'votre-cle-secrete-changez-moi')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///trading_app.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///trading_app.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Jeton exigé par /metrics (Authorization: Bearer ...) ; vide = accès libre
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 db = SQLAlchemy(app)
 
 # ==================== MODÈLES ====================
@@ -51,6 +59,44 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# ==================== COMPRESSION ====================
+@app.after_request
+def compress_response(response):
+    """
+    Compression gzip/brotli des réponses JSON volumineuses (taille envoyée mesurée).
+    Les réponses déjà compressées (analysis_response) sont laissées telles quelles.
+    """
+    from serialization import choose_encoding, compress, MIN_COMPRESS_SIZE
+    
+    if (response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    body = response.get_data()
+    encoding = None
+    if len(body) >= MIN_COMPRESS_SIZE:
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+    
+    if encoding is not None:
+        body = compress(body, encoding)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    
+    PAYLOAD_BYTES.observe(len(body), endpoint=request.endpoint or 'unknown',
+                          encoding=encoding or 'identity')
+    return response
+
+# ==================== MÉTRIQUES ====================
+@app.route('/metrics')
+def metrics():
+    """Métriques du worker au format texte Prometheus"""
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return jsonify({'error': 'Accès refusé'}), 403
+    return app.response_class(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 # ==================== ROUTES PUBLIQUES ====================
 @app.route('/')
 def index():
@@ -124,30 +170,236 @@ def dashboard():
     user = User.query.get(session['user_id'])
     return render_template('dashboard.html', user=user)
 
+def analysis_response(payload, cache_hit, cache_key=None):
+    """
+    Réponse JSON à partir d'un résultat d'analyse déjà sérialisé.
+    Avec cache_key, le corps compressé est pris dans le cache de résultats
+    (compressé une seule fois par encodage) au lieu de passer par compress_response.
+    """
+    from result_cache import get_result_cache
+    from serialization import choose_encoding, MIN_COMPRESS_SIZE
+    
+    response = app.response_class(payload, mimetype='application/json')
+    response.headers['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+    
+    if cache_key is None or len(payload) < MIN_COMPRESS_SIZE:
+        return response
+    
+    encoding = choose_encoding(request.accept_encodings)
+    body = get_result_cache().get_encoded(cache_key, encoding) if encoding else None
+    if body is not None:
+        response.set_data(body)
+        response.vary.add('Accept-Encoding')
+        response.headers['Content-Encoding'] = encoding
+        PAYLOAD_BYTES.observe(len(body), endpoint=request.endpoint or 'unknown', encoding=encoding)
+    return response
+
 @app.route('/analyze', methods=['POST'])
 @login_required
 def analyze():
-    """Route pour l'analyse des actifs boursiers"""
+    """
+    Route pour l'analyse des actifs boursiers.
+    Résultat en cache → 200 immédiat ; sinon un job est créé → 202 + job_id.
+    sync=1 conserve l'ancien comportement (analyse dans la requête).
+    mode=stats retourne uniquement les statistiques, calculées dans la requête.
+    cycles=894,365,180 : longueurs de cycle analysées (la première est le cycle principal).
+    """
     try:
         ticker = request.form.get('ticker', '').upper()
+        mode = request.values.get('mode', 'full')
         
         if not ticker:
             return jsonify({'error': 'Veuillez entrer un symbole boursier'}), 400
         
         # Importer le module d'analyse
-        from analysis import analyze_stock
+        from analysis import analyze_stock_cached, fresh_cache_key, ANALYSIS_MODES
+        from result_cache import get_result_cache
+        from cycles import parse_cycle_lengths
+        
+        if mode not in ANALYSIS_MODES:
+            return jsonify({'error': f"Mode inconnu '{mode}' (valeurs possibles : {', '.join(ANALYSIS_MODES)})"}), 400
         
-        # Effectuer l'analyse
-        result = analyze_stock(ticker)
+        try:
+            cycles = parse_cycle_lengths(request.values.get('cycles'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Résultat déjà calculé : pas besoin de passer par la file
+        cache_key = fresh_cache_key(ticker, mode=mode, cycles=cycles)
+        payload = get_result_cache().get(cache_key) if cache_key is not None else None
+        if payload is not None:
+            return analysis_response(payload, cache_hit=True, cache_key=cache_key)
+        
+        # Les statistiques seules sont assez rapides pour rester synchrones
+        if request.form.get('sync') == '1' or mode == 'stats':
+            payload, success, cache_hit = analyze_stock_cached(ticker, mode=mode, cycles=cycles)
+            
+            if not success:
+                result = json.loads(payload)
+                return jsonify({'error': result.get('error', 'Erreur lors de l\'analyse')}), 400
+            
+            return analysis_response(payload, cache_hit, cache_key=fresh_cache_key(ticker, mode=mode, cycles=cycles))
+        
+        # Analyse en arrière-plan
+        from jobs import get_job_manager, JobQueueFull
+        
+        try:
+            job_id = get_job_manager().submit(ticker, cycles=list(cycles))
+        except JobQueueFull:
+            response = jsonify({'error': 'Trop d\'analyses en cours, réessayez dans quelques secondes'})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        
+        return jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': url_for('analyze_status', job_id=job_id)
+        }), 202
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze/batch', methods=['POST'])
+@login_required
+def analyze_batch_route():
+    """
+    Analyse groupée d'une liste de tickers.
+    JSON {"tickers": [...], "figures": false} ou formulaire tickers="AAPL,MSFT".
+    Jusqu'à BATCH_SYNC_MAX_TICKERS symboles sans graphiques : tableau de
+    statistiques dans la réponse. Au-delà, ou avec figures, un job est
+    créé → 202 + job_id (résultat via GET /analyze/<job_id>).
+    """
+    try:
+        from batch import analyze_batch, dumps_batch, parse_tickers, BATCH_MAX_TICKERS, BATCH_SYNC_MAX_TICKERS
+        
+        body = request.get_json(silent=True) or {}
+        tickers = parse_tickers(body.get('tickers') or request.form.get('tickers', ''))
+        figures = bool(body.get('figures')) or request.form.get('figures') == '1'
+        
+        if not tickers:
+            return jsonify({'error': 'Veuillez fournir au moins un symbole boursier'}), 400
+        
+        if len(tickers) > BATCH_MAX_TICKERS:
+            return jsonify({'error': f'Maximum {BATCH_MAX_TICKERS} symboles par requête'}), 400
+        
+        if figures or len(tickers) > BATCH_SYNC_MAX_TICKERS:
+            from jobs import get_job_manager, JobQueueFull
+            
+            try:
+                job_id = get_job_manager().submit(','.join(tickers), batch=True, figures=figures)
+            except JobQueueFull:
+                response = jsonify({'error': 'Trop d\'analyses en cours, réessayez dans quelques secondes'})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+            
+            return jsonify({
+                'job_id': job_id,
+                'status': 'queued',
+                'count': len(tickers),
+                'status_url': url_for('analyze_status', job_id=job_id)
+            }), 202
+        
+        result = analyze_batch(tickers)
+        with timed('serialize'):
+            payload = dumps_batch(result)
+        return app.response_class(payload, mimetype='application/json')
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze/stream', methods=['GET'])
+@login_required
+def analyze_stream():
+    """
+    Analyse en Server-Sent Events : chaque graphique est envoyé
+    dès que son étape se termine. Paramètre optionnel : cycles.
+    Le calcul tourne dans le pool de jobs ; après STREAM_TIMEOUT secondes
+    le flux se termine par un événement 'pending' (job à interroger).
+    """
+    ticker = request.args.get('ticker', '').upper()
+    
+    if not ticker:
+        return jsonify({'error': 'Veuillez entrer un symbole boursier'}), 400
+    
+    from analysis import stream_analysis
+    from cycles import parse_cycle_lengths
+    from serialization import dumps
+    
+    try:
+        cycles = parse_cycle_lengths(request.args.get('cycles'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        for event, data in stream_analysis(ticker, cycles=cycles):
+            if event == 'pending':
+                data['status_url'] = url_for('analyze_status', job_id=data['job_id'])
+            with timed('serialize'):
+                chunk = f"event: {event}\ndata: {dumps(data)}\n\n"
+            PAYLOAD_BYTES.observe(len(chunk), endpoint='analyze_stream', encoding='identity')
+            yield chunk
+        yield "event: done\ndata: {}\n\n"
+    
+    response = app.response_class(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/analyze/chart', methods=['GET'])
+@login_required
+def analyze_chart():
+    """
+    Un graphique en pleine résolution sur une plage de dates (zoom du dashboard).
+    Paramètres : ticker, chart, start, end (JJ-MM-AAAA ou AAAA-MM-JJ), max_points.
+    """
+    try:
+        import pandas as pd
+        from analysis import build_chart
+        from serialization import dumps
+        
+        ticker = request.args.get('ticker', '').upper()
+        chart = request.args.get('chart', '')
+        max_points = request.args.get('max_points', 0, type=int)
+        
+        if not ticker:
+            return jsonify({'error': 'Veuillez entrer un symbole boursier'}), 400
+        
+        date_range = tuple(
+            pd.to_datetime(value, dayfirst='-' in value[:3]) if value else None
+            for value in (request.args.get('start'), request.args.get('end'))
+        )
+        
+        result = build_chart(ticker, chart, date_range, max_points)
         
         if not result.get('success'):
-            return jsonify({'error': result.get('error', 'Erreur lors de l\'analyse')}), 400
+            return jsonify({'error': result.get('error')}), 400
         
-        return jsonify(result)
+        with timed('serialize'):
+            payload = dumps(result)
+        return app.response_class(payload, mimetype='application/json')
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/analyze/<job_id>', methods=['GET'])
+@login_required
+def analyze_status(job_id):
+    """Statut d'un job d'analyse, ou son résultat une fois terminé"""
+    from jobs import get_job_manager, DONE, FAILED
+    
+    job = get_job_manager().get(job_id)
+    
+    if job is None:
+        return jsonify({'error': 'Job introuvable ou expiré'}), 404
+    
+    if job['status'] == DONE:
+        return analysis_response(job['payload'], cache_hit=False)
+    
+    if job['status'] == FAILED:
+        return jsonify({'error': job['error'], 'job_id': job_id, 'status': FAILED}), 400
+    
+    return jsonify({'job_id': job_id, 'status': job['status'], 'ticker': job['ticker']}), 202
+
 # ==================== ROUTES ADMIN ====================
 @app.route('/admin')
 @admin_required
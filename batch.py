@@ -0,0 +1,165 @@
+"""
+Analyse groupée d'une liste de tickers (watchlists)
+Téléchargement groupé via le store, puis statistiques calculées
+en parallèle, sans construire de graphiques par défaut.
+Les listes longues et les analyses avec graphiques passent par la
+file de jobs (voir run_job) ; seules les petites listes de
+statistiques sont calculées dans la requête.
+"""
+
+import logging
+import os
+
+from analysis import (
+    prepare_market_data,
+    calculate_kitchin_cycle,
+    volatility_stats,
+    calculate_fft_spectrum,
+    analyze_stock_cached,
+    get_executor,
+    history_stats,
+)
+from features import FeatureFrame
+from price_store import get_price_store
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_TICKERS = int(os.environ.get('BATCH_MAX_TICKERS', 500))
+
+# Au-delà (ou avec figures), l'analyse groupée part dans la file de jobs :
+# la requête doit rester bien en dessous du timeout gunicorn
+BATCH_SYNC_MAX_TICKERS = int(os.environ.get('BATCH_SYNC_MAX_TICKERS', 20))
+BATCH_EXECUTOR = os.environ.get('BATCH_EXECUTOR', 'thread')
+
+
+def parse_tickers(raw):
+    """Accepte une liste ou une chaîne 'AAPL, MSFT TSLA' et retourne des symboles uniques"""
+    if isinstance(raw, str):
+        raw = raw.replace(',', ' ').split()
+    tickers = [str(t).upper().strip() for t in raw or []]
+    return list(dict.fromkeys(t for t in tickers if t))
+
+
+def compute_ticker_stats(ticker):
+    """Ligne de statistiques compacte pour un ticker (sans graphique)"""
+    try:
+        prices, error = prepare_market_data(ticker)
+        if error:
+            return {'ticker': ticker, 'success': False, 'error': error}
+
+        features = FeatureFrame(prices)
+        kitchin = calculate_kitchin_cycle(prices)['stats']
+        volatility = volatility_stats(prices, ticker, features.returns)
+        spectrum = calculate_fft_spectrum(prices, features=features)
+
+        return {
+            'ticker': ticker,
+            'success': True,
+            'current_price': kitchin['cours_actuel'],
+            'kitchin_day': kitchin['jour_actuel'],
+            'deviation': kitchin['ecart_pct'],
+            'volatility': volatility['current_vol'],
+            'volatility_level': volatility['label'],
+            'dominant_cycles': [int(p) for p in spectrum['top_periods']],
+            'limited_history': history_stats(prices)['limited']
+        }
+
+    except Exception as e:
+        logger.warning(f"⚠️  Erreur stats {ticker}: {e}")
+        return {'ticker': ticker, 'success': False, 'error': f"Erreur d'analyse: {str(e)}"}
+
+
+class SerializedRow(str):
+    """Résultat d'analyse déjà sérialisé en JSON, avec son statut"""
+
+    def __new__(cls, payload, success):
+        row = super().__new__(cls, payload)
+        row.success = bool(success)
+        return row
+
+
+def compute_ticker_analysis(ticker):
+    """
+    Analyse complète (avec graphiques) d'un ticker, via le cache de résultats.
+    Retourne le JSON déjà sérialisé (SerializedRow) : dumps_batch l'insère tel quel.
+    """
+    payload, success, _ = analyze_stock_cached(ticker)
+    return SerializedRow(payload, success)
+
+
+def _row_success(row):
+    if isinstance(row, SerializedRow):
+        return row.success
+    return bool(row.get('success'))
+
+
+def analyze_batch(tickers, figures=False, executor=None):
+    """
+    Analyse une liste de tickers.
+    figures=False : tableau de statistiques uniquement (défaut)
+    figures=True  : résultat complet d'analyze_stock pour chaque ticker,
+                    déjà sérialisé (SerializedRow) ; à encoder avec dumps_batch
+    """
+    tickers = parse_tickers(tickers)
+    logger.info(f"📋 ANALYSE GROUPÉE : {len(tickers)} ticker(s)")
+
+    # Un seul téléchargement groupé pour toute la liste
+    try:
+        last_bars = get_price_store().sync_many(tickers)
+    except Exception as e:
+        logger.warning(f"⚠️  Synchronisation groupée impossible: {e}")
+        last_bars = {}
+
+    rows = {}
+    available = []
+    for ticker in tickers:
+        if last_bars.get(ticker) is None:
+            rows[ticker] = {
+                'ticker': ticker,
+                'success': False,
+                'error': f"Aucune donnée trouvée pour {ticker}"
+            }
+        else:
+            available.append(ticker)
+
+    compute = compute_ticker_analysis if figures else compute_ticker_stats
+    pool = get_executor(executor or BATCH_EXECUTOR, name='batch')
+
+    if pool is None:
+        for ticker in available:
+            rows[ticker] = compute(ticker)
+    else:
+        futures = {ticker: pool.submit(compute, ticker) for ticker in available}
+        for ticker, future in futures.items():
+            try:
+                rows[ticker] = future.result()
+            except Exception as e:
+                rows[ticker] = {'ticker': ticker, 'success': False, 'error': str(e)}
+
+    results = [rows[ticker] for ticker in tickers]
+    succeeded = sum(1 for row in results if _row_success(row))
+    logger.info(f"✅ Analyse groupée terminée : {succeeded}/{len(tickers)} ticker(s)")
+
+    return {
+        'success': True,
+        'count': len(results),
+        'succeeded': succeeded,
+        'results': results
+    }
+
+
+def dumps_batch(result):
+    """
+    JSON d'un résultat d'analyze_batch : les analyses complètes, déjà
+    sérialisées par le cache de résultats, sont insérées telles quelles
+    au lieu d'être décodées puis réencodées.
+    """
+    rows = ','.join(row if isinstance(row, SerializedRow) else dumps(row) for row in result['results'])
+    head = dumps({key: value for key, value in result.items() if key != 'results'})
+    return f'{head[:-1]},"results":[{rows}]}}'
+
+
+def run_batch_job(tickers, figures=False):
+    """Analyse groupée exécutée par un job → (payload_json, succès, cache_hit)"""
+    return dumps_batch(analyze_batch(tickers, figures=figures)), True, False
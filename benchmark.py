@@ -0,0 +1,279 @@
+"""
+Benchmark du pipeline d'analyse sur des cours synthétiques (sans yfinance)
+Pour chaque taille de série : durée, pic mémoire et taille du JSON produit
+- de chaque étape (create_*), avec son propre FeatureFrame
+- du pipeline complet (analyze_market_cycles + sérialisation)
+- du mode statistiques (analyze_market_stats)
+- de la sérialisation de la réponse : ancien chemin (json.loads(fig.to_json())
+  puis jsonify) contre dumps, puis compression gzip / brotli du JSON brut et
+  lecture d'une variante compressée déjà en cache (ResultCache.get_encoded)
+
+Le store et l'état de volatilité sont chauds (premier passage non mesuré),
+le cache de décomposition est vidé avant chaque mesure : on mesure le
+calcul, pas les caches.
+
+    python benchmark.py                            # rapport JSON sur la sortie
+    python benchmark.py --sizes 1000,10000 -o base.json
+    python benchmark.py --baseline base.json       # code 1 si régression
+
+Les durées dépendent de la machine : comparer à une référence mesurée
+sur le même hôte.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_REPEAT = 3
+
+# Écart relatif toléré avant de signaler une régression
+DEFAULT_TOLERANCE = 0.25
+
+# Durées trop courtes pour être comparées de façon fiable (s)
+MIN_COMPARABLE_SECONDS = 0.02
+
+BENCH_TICKER = 'BENCH'
+
+
+# ========================================
+# MESURES
+# ========================================
+
+def measure(fn, repeat=DEFAULT_REPEAT, setup=None):
+    """
+    Exécute fn() `repeat` fois (meilleure durée), puis une fois sous
+    tracemalloc pour le pic mémoire. setup() est appelé avant chaque
+    exécution, hors chronomètre. fn retourne le JSON produit (str/bytes).
+    """
+    from serialization import dumps
+
+    timings = []
+    payload = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        payload = fn()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    if not isinstance(payload, (str, bytes)):
+        payload = dumps(payload)
+    return {
+        'seconds': round(min(timings), 6),
+        'peak_mb': round(peak / 1e6, 3),
+        'payload_bytes': len(payload),
+    }
+
+
+def _bench_store(bars, tmp):
+    """Store et état de volatilité jetables servant la série synthétique"""
+    import price_store
+    import volatility
+    from synthetic import synthetic_fetcher
+
+    price_store.set_price_store(price_store.PriceStore(
+        os.path.join(tmp, f'prices-{bars}.db'), fetcher=synthetic_fetcher(bars, seed=bars)
+    ))
+    volatility.set_volatility_store(
+        volatility.VolatilityStateStore(os.path.join(tmp, f'volatility-{bars}.db'))
+    )
+
+
+def legacy_dumps(result):
+    """
+    Ancien encodage de la réponse : figures converties par
+    json.loads(fig.to_json()), puis le tout réencodé par jsonify (json standard)
+    """
+    import plotly.io.json as plotly_json
+    return json.dumps(json.loads(plotly_json.to_json_plotly(result)), separators=(',', ':'))
+
+
+def bench_serialization(result, repeat=DEFAULT_REPEAT):
+    """
+    Sérialisation et compression d'une réponse d'analyse.
+    payload_bytes : taille du JSON (legacy, dumps) ou du corps compressé
+    (gzip, br, cached_gzip).
+    """
+    from result_cache import ResultCache
+    from serialization import brotli, compress, dumps
+
+    report = {
+        'legacy': measure(lambda: legacy_dumps(result), repeat),
+        'dumps': measure(lambda: dumps(result), repeat),
+    }
+
+    raw = dumps(result).encode()
+    for encoding in ('gzip', 'br') if brotli is not None else ('gzip',):
+        report[encoding] = measure(lambda: compress(raw, encoding), repeat)
+
+    # Succès du cache : les octets compressés sont servis sans recompression
+    cache = ResultCache()
+    cache.set(BENCH_TICKER, raw)
+    cache.get_encoded(BENCH_TICKER, 'gzip')
+    report['cached_gzip'] = measure(lambda: cache.get_encoded(BENCH_TICKER, 'gzip'), repeat)
+    return report
+
+
+def bench_size(bars, repeat=DEFAULT_REPEAT, tmp=None):
+    """
+    Mesures d'une taille de série :
+    {'stages': {...}, 'pipeline': {...}, 'stats': {...}, 'serialization': {...}}
+    """
+    import analysis
+    from features import FeatureFrame
+    from serialization import dumps
+
+    tmp = tmp or tempfile.mkdtemp()
+    _bench_store(bars, tmp)
+    clear_caches = analysis.get_decomposition_cache().clear
+
+    # Premier passage : téléchargement synthétique, archive, état de volatilité
+    prices, error = analysis.prepare_market_data(BENCH_TICKER)
+    if error:
+        raise RuntimeError(error)
+    analysis.analyze_market_cycles(BENCH_TICKER, executor='serial')
+
+    report = {'stages': {}}
+    for stage in analysis.ANALYSIS_STAGES:
+        name = stage['name']
+        report['stages'][name] = measure(
+            lambda: dumps(analysis.run_stage(name, prices, BENCH_TICKER, features=FeatureFrame(prices))),
+            repeat, setup=clear_caches
+        )
+
+    report['pipeline'] = measure(
+        lambda: dumps(analysis.analyze_market_cycles(BENCH_TICKER, executor='serial')),
+        repeat, setup=clear_caches
+    )
+    report['stats'] = measure(
+        lambda: dumps(analysis.analyze_market_stats(BENCH_TICKER)),
+        repeat, setup=clear_caches
+    )
+
+    result = analysis.format_analysis_result(
+        BENCH_TICKER, analysis.analyze_market_cycles(BENCH_TICKER, executor='serial')
+    )
+    report['serialization'] = bench_serialization(result, repeat)
+    return report
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT):
+    """Rapport complet (sérialisable en JSON)"""
+    from analysis import ANALYSIS_VERSION
+
+    tmp = tempfile.mkdtemp()
+    results = {}
+    for bars in sizes:
+        start = time.perf_counter()
+        results[str(bars)] = bench_size(bars, repeat, tmp)
+        print(f"⏱️  {bars} barres mesurées en {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    return {
+        'analysis_version': ANALYSIS_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+# ========================================
+# RÉGRESSIONS
+# ========================================
+
+def _targets(entry):
+    """(nom, mesures) de chaque cible d'une taille : étapes, pipeline, stats, sérialisation"""
+    for name, values in entry.get('stages', {}).items():
+        yield f"stage:{name}", values
+    for name, values in entry.get('serialization', {}).items():
+        yield f"serialization:{name}", values
+    for name in ('pipeline', 'stats'):
+        if name in entry:
+            yield name, entry[name]
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare un rapport à une référence (mêmes tailles et cibles uniquement).
+    Retourne la liste des régressions
+    [{'bars', 'target', 'metric', 'baseline', 'current', 'change'}, ...] :
+    durée ou pic mémoire en hausse de plus de `tolerance`, taille du JSON
+    différente de plus de `tolerance` (dans un sens ou dans l'autre).
+    """
+    regressions = []
+    for bars, entry in report['results'].items():
+        reference = dict(_targets(baseline.get('results', {}).get(bars, {})))
+        for target, values in _targets(entry):
+            base = reference.get(target)
+            if base is None:
+                continue
+            for metric in ('seconds', 'peak_mb', 'payload_bytes'):
+                old, new = base.get(metric), values.get(metric)
+                if not old or new is None:
+                    continue
+                if metric == 'seconds' and max(old, new) < MIN_COMPARABLE_SECONDS:
+                    continue
+                change = new / old - 1
+                worse = abs(change) > tolerance if metric == 'payload_bytes' else change > tolerance
+                if worse:
+                    regressions.append({'bars': int(bars), 'target': target, 'metric': metric,
+                                        'baseline': old, 'current': new, 'change': round(change, 3)})
+    return regressions
+
+
+# ========================================
+# LIGNE DE COMMANDE
+# ========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline d'analyse (données synthétiques)")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="tailles de série en barres, séparées par des virgules")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="exécutions mesurées par cible")
+    parser.add_argument('-o', '--output', help="écrit le rapport JSON dans ce fichier")
+    parser.add_argument('--baseline', help="rapport de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="écart relatif toléré (0.25 = 25 %%)")
+    args = parser.parse_args(argv)
+
+    from observability import configure_logging
+    configure_logging('WARNING')
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = run_benchmark(sizes, args.repeat)
+    text = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text + '\n')
+    else:
+        print(text)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as handle:
+        regressions = compare(report, json.load(handle), args.tolerance)
+    for r in regressions:
+        print(f"❌ {r['bars']} barres, {r['target']} : {r['metric']} "
+              f"{r['baseline']} → {r['current']} ({r['change']:+.0%})", file=sys.stderr)
+    if not regressions:
+        print(f"✅ Aucune régression (tolérance {args.tolerance:.0%})", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Moteur de cycles à longueurs multiples (Kitchin 894j, annuel, etc.)
+Pour chaque longueur : phase actuelle, trajectoire moyenne des cycles
+passés (base 100), bandes de dispersion et écart au chemin moyen.
+Les cycles sont repliés par reshape (vue sans copie), sans boucle par cycle.
+"""
+
+import os
+
+import numpy as np
+
+# Cycle de Kitchin (séances)
+KITCHIN_LENGTH = 894
+
+MAX_CYCLES = 10
+MIN_CYCLE_LENGTH = 5
+
+# Percentiles (bas, haut) de l'enveloppe des cycles passés
+CYCLE_BAND_PERCENTILES = (10, 90)
+
+
+def _validate_cycle_lengths(raw):
+    """
+    Tuple de longueurs uniques (ordre conservé) d'une liste ou d'une chaîne
+    '894, 365 180' ; tuple vide si raw est vide. Lève ValueError pour une
+    valeur invalide.
+    """
+    if isinstance(raw, str):
+        raw = raw.replace(',', ' ').split()
+
+    try:
+        lengths = tuple(dict.fromkeys(int(v) for v in raw))
+    except (TypeError, ValueError):
+        raise ValueError("Les longueurs de cycle doivent être des entiers")
+
+    if len(lengths) > MAX_CYCLES:
+        raise ValueError(f"Maximum {MAX_CYCLES} longueurs de cycle")
+    if lengths and min(lengths) < MIN_CYCLE_LENGTH:
+        raise ValueError(f"Longueur de cycle minimale : {MIN_CYCLE_LENGTH} jours")
+    return lengths
+
+
+def _default_cycle_lengths(raw):
+    """Longueurs par défaut lues dans CYCLE_LENGTHS (vide → Kitchin), validées comme une requête"""
+    try:
+        return _validate_cycle_lengths(raw) or (KITCHIN_LENGTH,)
+    except ValueError as e:
+        raise ValueError(f"CYCLE_LENGTHS invalide ({raw!r}) : {e}") from None
+
+
+# Longueurs analysées par défaut ; la première est le cycle principal du dashboard
+DEFAULT_CYCLE_LENGTHS = _default_cycle_lengths(os.environ.get('CYCLE_LENGTHS', ''))
+
+
+def parse_cycle_lengths(raw):
+    """
+    Accepte une liste ou une chaîne '894, 365 180' et retourne un tuple de
+    longueurs uniques (ordre conservé). Vide → DEFAULT_CYCLE_LENGTHS.
+    Lève ValueError pour une valeur invalide.
+    """
+    if raw is None:
+        return DEFAULT_CYCLE_LENGTHS
+    return _validate_cycle_lengths(raw) or DEFAULT_CYCLE_LENGTHS
+
+
+def cycle_name(length):
+    """Nom affiché d'un cycle"""
+    return "Kitchin" if length == KITCHIN_LENGTH else f"{length}j"
+
+
+def fold_cycles(prices, lengths, percentiles=CYCLE_BAND_PERCENTILES):
+    """
+    Replie la série de prix pour chaque longueur de cycle.
+    Retourne {longueur: {'start_idx', 'current_norm', 'avg_cycle', 'bands',
+    'n_cycles', 'expected'}} où expected est la valeur moyenne (base 100)
+    au jour courant du cycle, ou None sans cycle passé complet.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n = len(prices)
+    folded_cycles = {}
+
+    for length in lengths:
+        # Jour courant dans le cycle en cours (1..length)
+        day = n % length or length
+        start_idx = n - day
+        current = prices[start_idx:]
+
+        # Cycles passés complets, empilés en une vue (n_cycles, length)
+        n_cycles = max(0, -(-(n - length) // length))
+        folded = prices[:n_cycles * length].reshape(n_cycles, length)
+
+        avg_cycle = None
+        bands = None
+        expected = None
+        if n_cycles > 0:
+            cycles_norm = folded / folded[:, :1] * 100
+            avg_cycle = cycles_norm.mean(axis=0)
+            expected = float(avg_cycle[day - 1])
+            if n_cycles > 1:
+                lower, upper = np.percentile(cycles_norm, percentiles, axis=0)
+                bands = {'lower': lower, 'upper': upper}
+
+        folded_cycles[length] = {
+            'start_idx': start_idx,
+            'current_norm': current / current[0] * 100,
+            'avg_cycle': avg_cycle,
+            'bands': bands,
+            'n_cycles': n_cycles,
+            'expected': expected
+        }
+
+    return folded_cycles
@@ -0,0 +1,239 @@
+"""
+Décomposition saisonnière des rendements (tendance + saisonnier + résidu)
+- 'stl' : STL robuste (LOESS, statsmodels), avec les sauts d'évaluation
+          recommandés par Cleveland et al. pour les longues fenêtres
+- 'ma'  : décomposition classique par moyennes mobiles, vectorisée
+Les résultats sont gardés en mémoire par (ticker, période, méthode) avec la
+date de la dernière barre : à l'arrivée de nouvelles barres ou à la révision
+de la barre en cours, seule la fin de série est recalculée (STL), puis
+raccordée aux composantes existantes.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from observability import CACHE_REQUESTS
+
+DECOMPOSITION_METHODS = ('stl', 'ma')
+DECOMPOSITION_METHOD = os.environ.get('DECOMPOSITION_METHOD', 'stl')
+
+# Itérations de robustesse STL (15 par défaut dans statsmodels : ~3x plus lent
+# pour des poids quasi identiques sur des rendements journaliers)
+STL_ROBUST_ITERATIONS = 5
+
+# Fenêtre recalculée en fin de série, en nombre de périodes : le lissage
+# saisonnier STL couvre 7 cycles, 8 périodes redonnent la fin d'une STL
+# complète (à 1e-4 près hors robustesse ; les poids robustes, eux, sont
+# estimés sur la fenêtre). Marge (en périodes) remplacée avant les
+# nouvelles barres : les bords de la décomposition sont les moins stables.
+TAIL_PERIODS = 8
+TAIL_MARGIN_PERIODS = 1
+
+DECOMPOSITION_CACHE_SIZE = int(os.environ.get('DECOMPOSITION_CACHE_SIZE', 64))
+
+
+def choose_period(n):
+    """Période saisonnière selon la longueur de l'historique (au moins 2 cycles)"""
+    # Pour la bourse : 252 jours ouvrés = 1 an
+    if n >= 504:
+        return 252  # Cycle annuel
+    elif n >= 126:
+        return 63  # Cycle trimestriel
+    elif n >= 60:
+        return 30  # Cycle mensuel
+    raise ValueError("Pas assez de données pour la décomposition (minimum 60 jours)")
+
+
+# ========================================
+# MOYENNES MOBILES (VECTORISÉ)
+# ========================================
+
+def _centered_moving_average(x, period):
+    """Moyenne mobile centrée (2 x period si period est pair), NaN aux bords"""
+    n = len(x)
+    half = period // 2
+    trend = np.full(n, np.nan)
+    if n <= 2 * half:
+        return trend
+
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    t = np.arange(half, n - half)
+    if period % 2:
+        trend[t] = (c[t + half + 1] - c[t - half]) / period
+    else:
+        window_sum = c[t + half + 1] - c[t - half]
+        trend[t] = (window_sum - 0.5 * (x[t - half] + x[t + half])) / period
+    return trend
+
+
+def _extrapolate_trend(trend, npoints):
+    """Prolonge la tendance aux bords par moindres carrés sur npoints valeurs"""
+    valid = np.flatnonzero(~np.isnan(trend))
+    front, back = valid[0], valid[-1]
+
+    front_last = min(front + npoints, back)
+    slope, intercept = np.polyfit(np.arange(front, front_last), trend[front:front_last], 1)
+    trend[:front] = slope * np.arange(front) + intercept
+
+    back_first = max(front, back - npoints)
+    slope, intercept = np.polyfit(np.arange(back_first, back), trend[back_first:back], 1)
+    trend[back + 1:] = slope * np.arange(back + 1, len(trend)) + intercept
+    return trend
+
+
+def ma_decompose(x, period):
+    """
+    Décomposition additive classique (équivalent de seasonal_decompose avec
+    extrapolate_trend='freq') : moyenne mobile centrée par sommes cumulées,
+    moyennes saisonnières par phase avec np.bincount
+    """
+    x = np.asarray(x, dtype=np.float64)
+    trend = _extrapolate_trend(_centered_moving_average(x, period), period)
+    detrended = x - trend
+
+    phase = np.arange(len(x)) % period
+    averages = np.bincount(phase, weights=detrended, minlength=period) / np.bincount(phase, minlength=period)
+    averages -= averages.mean()
+    seasonal = averages[phase]
+
+    return {'trend': trend, 'seasonal': seasonal, 'resid': detrended - seasonal}
+
+
+# ========================================
+# STL ROBUSTE
+# ========================================
+
+def _jump(window):
+    """Pas d'évaluation LOESS : ~10 % de la fenêtre (interpolation linéaire entre points)"""
+    return max(1, int(np.ceil(window / 10)))
+
+
+def stl_decompose(x, period):
+    """STL robuste (statsmodels) avec sauts d'évaluation sur tendance et passe-bas"""
+    from statsmodels.tsa.seasonal import STL
+
+    model = STL(np.asarray(x, dtype=np.float64), period=period, robust=True)
+    config = model.config
+    model = STL(
+        np.asarray(x, dtype=np.float64),
+        period=period,
+        robust=True,
+        trend_jump=_jump(config['trend']),
+        low_pass_jump=_jump(config['low_pass'])
+    )
+    result = model.fit(outer_iter=STL_ROBUST_ITERATIONS)
+    return {'trend': result.trend, 'seasonal': result.seasonal, 'resid': result.resid}
+
+
+_DECOMPOSERS = {
+    'stl': stl_decompose,
+    'ma': ma_decompose,
+}
+
+
+def decompose(x, period, method=None):
+    """Décomposition complète de la série selon la méthode choisie"""
+    method = method or DECOMPOSITION_METHOD
+    if method not in _DECOMPOSERS:
+        raise ValueError(f"Méthode de décomposition inconnue '{method}'")
+    return _DECOMPOSERS[method](x, period)
+
+
+# ========================================
+# CACHE ET RECALCUL DE FIN DE SÉRIE
+# ========================================
+
+class DecompositionCache:
+    """
+    Dernière décomposition de chaque (ticker, période, méthode), avec la
+    série décomposée et la date de sa dernière barre (LRU borné).
+    """
+
+    def __init__(self, max_entries=DECOMPOSITION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.tail_updates = 0
+        self.misses = 0
+
+    def get(self, ticker, last_bar, x, period, method=None):
+        """
+        Composantes de la série x (rendements jusqu'à last_bar) :
+        - même dernière barre → résultat en cache
+        - nouvelles barres et/ou dernière barre révisée sur une série connue
+          → recalcul de la fin (STL)
+        - sinon → décomposition complète
+        """
+        method = method or DECOMPOSITION_METHOD
+        x = np.asarray(x, dtype=np.float64)
+        key = (ticker, period, method)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and entry['last_bar'] == last_bar and np.array_equal(entry['x'], x):
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache='decomposition', result='hit')
+            return entry['components']
+
+        components = None
+        if entry is not None and method == 'stl':
+            components = self._tail_update(entry, x, period, method)
+        if components is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache='decomposition', result='miss')
+            components = decompose(x, period, method)
+        else:
+            self.tail_updates += 1
+            CACHE_REQUESTS.inc(cache='decomposition', result='tail')
+
+        with self._lock:
+            self._entries[key] = {'last_bar': last_bar, 'x': x, 'components': components}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return components
+
+    @staticmethod
+    def _tail_update(entry, x, period, method):
+        """
+        Recalcule la décomposition sur les TAIL_PERIODS dernières périodes
+        (plus les nouvelles barres) et remplace la fin des composantes en
+        cache. La dernière observation en cache (barre en cours, révisée
+        en séance) est exclue de la comparaison : elle tombe dans la marge
+        remplacée. None si le reste de la série en cache n'est pas un
+        préfixe de x ou si la fin à recalculer couvre presque tout l'historique.
+        """
+        old = entry['x']
+        added = len(x) - len(old)
+        if added < 0 or len(old) < 2 or not np.array_equal(old[:-1], x[:len(old) - 1]):
+            return None
+
+        window = TAIL_PERIODS * period + added
+        if window >= len(x) // 2:
+            return None
+
+        replaced = added + TAIL_MARGIN_PERIODS * period
+        tail = decompose(x[-window:], period, method)
+        return {
+            name: np.concatenate((values[:len(x) - replaced], tail[name][-replaced:]))
+            for name, values in entry['components'].items()
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = DecompositionCache()
+
+
+def get_decomposition_cache():
+    """Cache partagé des décompositions du worker"""
+    return _cache
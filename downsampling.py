@@ -0,0 +1,76 @@
+"""
+Sous-échantillonnage des séries longues avant construction des graphiques
+Largest-Triangle-Three-Buckets (LTTB) : conserve la forme visuelle
+(pics, creux) d'une série avec un nombre de points borné.
+"""
+
+import os
+
+import numpy as np
+
+# Nombre maximum de points par trace (0 = pleine résolution)
+CHART_MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 2000))
+
+
+def lttb_indices(values, n_out):
+    """
+    Indices des n_out points retenus par LTTB (le premier et le dernier
+    sont toujours conservés). Les valeurs non finies sont ignorées.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(values))
+    n = len(finite)
+
+    if n_out >= n or n_out < 3:
+        return finite
+
+    x = finite.astype(np.float64)
+    y = values[finite]
+    every = (n - 2) / (n_out - 2)
+
+    sampled = np.empty(n_out, dtype=np.int64)
+    sampled[0] = 0
+    a = 0
+
+    for i in range(n_out - 2):
+        # Bucket courant
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+
+        # Moyenne du bucket suivant (le dernier point pour le dernier bucket)
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        if next_start >= next_end:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+
+        # Point du bucket formant le plus grand triangle avec a et la moyenne suivante
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        sampled[i + 1] = a
+
+    sampled[-1] = n - 1
+    return finite[sampled]
+
+
+def select_points(values, max_points=None, mask=None):
+    """
+    Positions à tracer pour une série : filtre optionnel (masque booléen,
+    ex. plage de dates) puis LTTB si la série dépasse max_points.
+    """
+    if max_points is None:
+        max_points = CHART_MAX_POINTS
+
+    values = np.asarray(values, dtype=np.float64)
+    positions = np.arange(len(values))
+    if mask is not None:
+        positions = positions[np.asarray(mask)]
+
+    if max_points and len(positions) > max_points:
+        positions = positions[lttb_indices(values[positions], max_points)]
+    return positions
@@ -0,0 +1,158 @@
+"""
+Séries dérivées partagées par les graphiques d'une même analyse
+(rendements, log-prix, champs calendaires, volatilités glissantes).
+Chaque série est calculée une seule fois, à la première demande,
+puis réutilisée par toutes les étapes qui reçoivent le même FeatureFrame.
+
+Benchmark contre les calculs dupliqués par graphique : python features.py
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from volatility import EWMA_LAMBDA, simple_returns, rolling_volatility, ewma_volatility
+
+
+class FeatureFrame:
+    """
+    Vue paresseuse sur l'historique (PriceSeries) d'une analyse.
+    Les rendements sont alignés sur les barres 1..n-1 (rendement de la
+    veille à la barre), comme pct_change().dropna().
+    """
+
+    def __init__(self, prices):
+        self.prices = prices
+        self._rolling = {}
+
+    def __len__(self):
+        return len(self.prices)
+
+    # ---------- Prix et rendements ----------
+
+    @cached_property
+    def returns(self):
+        """Rendements simples (fraction)"""
+        return simple_returns(self.prices.close)
+
+    @cached_property
+    def returns_pct(self):
+        """Rendements simples en %"""
+        return self.returns * 100
+
+    @cached_property
+    def log_prices(self):
+        return np.log(self.prices.close)
+
+    @cached_property
+    def log_returns(self):
+        return np.diff(self.log_prices)
+
+    # ---------- Champs calendaires ----------
+
+    @cached_property
+    def months(self):
+        """Mois (1..12) de chaque barre"""
+        return self.prices.dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+
+    @cached_property
+    def years(self):
+        return self.prices.dates.astype('datetime64[Y]').astype(np.int64) + 1970
+
+    # ---------- Statistiques glissantes ----------
+
+    def rolling_volatility(self, window):
+        """Volatilité glissante annualisée (%) des rendements, mémorisée par fenêtre"""
+        if window not in self._rolling:
+            self._rolling[window] = rolling_volatility(self.returns, window)
+        return self._rolling[window]
+
+    @cached_property
+    def ewma_volatility(self):
+        """Volatilité EWMA annualisée (%) (λ = EWMA_LAMBDA)"""
+        return ewma_volatility(self.returns, EWMA_LAMBDA)
+
+    # ---------- Agrégats ----------
+
+    def monthly_mean_returns(self, years=10):
+        """
+        Rendement moyen (%) par mois sur les `years` dernières années,
+        par np.bincount sur les mois (sans copie du DataFrame).
+        Retourne (mois présents 1..12, moyennes).
+        """
+        months = self.months[1:]
+        recent = self.years[1:] >= self.years.max() - years
+        counts = np.bincount(months[recent], minlength=13)
+        sums = np.bincount(months[recent], weights=self.returns_pct[recent], minlength=13)
+        present = np.flatnonzero(counts)
+        return present, sums[present] / counts[present]
+
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    import pandas as pd
+
+    from price_series import PriceSeries
+    from volatility import VOL_WINDOW
+
+    def legacy_features(data, close_prices):
+        """Séries dérivées telles que recalculées par chaque graphique avant le FeatureFrame"""
+        # Cycle annuel : copie complète + colonnes calendaires
+        df_temp = data.copy()
+        df_temp['Close'] = close_prices
+        df_temp['Month'] = df_temp['Date'].dt.month
+        df_temp['Year'] = df_temp['Date'].dt.year
+        df_temp['Returns'] = close_prices.pct_change() * 100
+        recent_years = df_temp[df_temp['Year'] >= df_temp['Year'].max() - 10]
+        recent_years.groupby('Month')['Returns'].mean()
+        # Volatilité, décomposition, FFT : un pct_change chacun
+        returns = close_prices.pct_change().dropna()
+        rolling_volatility(returns.values, VOL_WINDOW)
+        ewma_volatility(returns.values)
+        close_prices.pct_change().dropna() * 100
+        simple_returns(close_prices.values)
+        np.log(close_prices.values)
+
+    def shared_features(prices):
+        features = FeatureFrame(prices)
+        features.monthly_mean_returns()
+        features.rolling_volatility(VOL_WINDOW)
+        features.ewma_volatility
+        features.returns_pct
+        features.log_prices
+
+    def measure(fn, *args, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return min(timings) * 1000, peak / 1e6
+
+    print("=" * 60)
+    print("⏱️  BENCHMARK SÉRIES DÉRIVÉES (meilleur de 5)")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    for n in (3_000, 30_000, 100_000):
+        dates = pd.date_range('1800-01-01', periods=n, freq='D')
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        data = pd.DataFrame({'Date': dates, 'Close': closes, 'Volume': rng.integers(0, 10**6, n)})
+        data['Date_str'] = data['Date'].dt.strftime('%d-%m-%Y')
+        close_prices = pd.Series(closes)
+
+        t_legacy, m_legacy = measure(legacy_features, data, close_prices)
+        t_shared, m_shared = measure(shared_features, PriceSeries.from_frame(data))
+        print(f"\n📏 {n} barres")
+        print(f"   par graphique  : {t_legacy:8.2f} ms  pic {m_legacy:7.2f} Mo")
+        print(f"   FeatureFrame   : {t_shared:8.2f} ms  pic {m_shared:7.2f} Mo")
@@ -0,0 +1,21 @@
+"""
+Configuration gunicorn (chargée automatiquement par `gunicorn app:app`)
+L'application et la pile d'analyse sont chargées une fois dans le master,
+puis partagées par les workers forkés (copie sur écriture).
+PRELOAD_ANALYSIS=off revient au chargement paresseux dans chaque worker.
+"""
+
+import os
+
+preload_app = os.environ.get('PRELOAD_ANALYSIS', 'full') != 'off'
+
+# Recyclage des workers (0 = jamais) : le fork depuis le master préchargé reste rapide
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    """Master prêt, workers pas encore forkés : préchargement de l'analyse"""
+    if preload_app:
+        from startup import warm_up
+        warm_up()
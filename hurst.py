@@ -0,0 +1,217 @@
+"""
+Estimateurs vectorisés du coefficient de Hurst
+- 'variance' : écart-type des différences à plusieurs lags (ex-calculate_hurst_exponent)
+- 'rs'       : rescaled range (R/S) de Hurst-Mandelbrot
+- 'dfa'      : Detrended Fluctuation Analysis
+Toutes les fonctions attendent une série de log-prix.
+
+Benchmark contre l'ancienne boucle Python : python hurst.py
+"""
+
+import numpy as np
+from scipy.fft import next_fast_len, rfft, irfft
+
+# Libellés des axes du graphique log-log de chaque estimateur
+ESTIMATORS = {
+    'variance': {'label': "Variance des lags", 'x': "log(lag)", 'y': "log(std)"},
+    'rs': {'label': "Rescaled range (R/S)", 'x': "log(fenêtre)", 'y': "log(R/S)"},
+    'dfa': {'label': "DFA", 'x': "log(échelle)", 'y': "log(F)"},
+}
+
+
+def _slope(x, y):
+    """Pente de la régression linéaire de y sur x"""
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def _window_sizes(n, min_size, count):
+    """Tailles de fenêtre log-espacées entre min_size et n // 2"""
+    sizes = np.geomspace(min_size, max(min_size + 1, n // 2), count).astype(int)
+    return np.unique(sizes)
+
+
+# ========================================
+# ESTIMATEURS
+# ========================================
+
+def lag_std(ts, lags):
+    """
+    Écart-type (population) de ts[lag:] - ts[:-lag] pour tous les lags en une passe.
+    Sommes cumulées pour les moyennes, autocorrélation par FFT pour le terme croisé.
+    """
+    x = np.asarray(ts, dtype=np.float64)
+    x = x - x.mean()
+    n = len(x)
+    lags = np.asarray(lags, dtype=np.int64)
+
+    s1 = np.concatenate(([0.0], np.cumsum(x)))
+    s2 = np.concatenate(([0.0], np.cumsum(x * x)))
+
+    nfft = next_fast_len(2 * n)
+    spectrum = rfft(x, nfft)
+    autocorr = irfft(spectrum * np.conj(spectrum), nfft)[:n]
+
+    m = n - lags
+    mean_d = (s1[n] - s1[lags] - s1[n - lags]) / m
+    mean_d2 = (s2[n] - s2[lags] + s2[n - lags] - 2 * autocorr[lags]) / m
+    return np.sqrt(np.maximum(mean_d2 - mean_d ** 2, 0.0))
+
+
+def hurst_variance(ts, max_lag=100):
+    """Estimateur par variance des lags (lags 2..max_lag-1)"""
+    lags = np.arange(2, min(max_lag, len(ts) // 2))
+    tau = lag_std(ts, lags)
+    valid = tau > 0
+    x, y = np.log(lags[valid]), np.log(tau[valid])
+    return {'hurst': _slope(x, y), 'scales': lags, 'fluctuations': tau, 'x': x, 'y': y}
+
+
+def hurst_rescaled_range(ts, min_window=8, n_windows=20):
+    """Estimateur R/S sur les rendements, fenêtres découpées par reshape"""
+    returns = np.diff(np.asarray(ts, dtype=np.float64))
+    n = len(returns)
+    windows = _window_sizes(n, min_window, n_windows)
+
+    rs = np.empty(len(windows))
+    for i, w in enumerate(windows):
+        segments = returns[:(n // w) * w].reshape(-1, w)
+        deviations = np.cumsum(segments - segments.mean(axis=1, keepdims=True), axis=1)
+        ranges = deviations.max(axis=1) - deviations.min(axis=1)
+        stds = segments.std(axis=1)
+        valid = stds > 0
+        rs[i] = np.mean(ranges[valid] / stds[valid]) if valid.any() else np.nan
+
+    valid = np.isfinite(rs) & (rs > 0)
+    x, y = np.log(windows[valid]), np.log(rs[valid])
+    return {'hurst': _slope(x, y), 'scales': windows, 'fluctuations': rs, 'x': x, 'y': y}
+
+
+def hurst_dfa(ts, min_scale=8, n_scales=20):
+    """DFA d'ordre 1 : tendance linéaire retirée par segment, en forme fermée"""
+    returns = np.diff(np.asarray(ts, dtype=np.float64))
+    profile = np.cumsum(returns - returns.mean())
+    n = len(profile)
+    scales = _window_sizes(n, min_scale, n_scales)
+
+    fluct = np.empty(len(scales))
+    for i, s in enumerate(scales):
+        segments = profile[:(n // s) * s].reshape(-1, s)
+        t = np.arange(s) - (s - 1) / 2
+        slopes = segments @ t / (t @ t)
+        residuals = segments - segments.mean(axis=1, keepdims=True) - slopes[:, None] * t
+        fluct[i] = np.sqrt(np.mean(residuals ** 2))
+
+    valid = fluct > 0
+    x, y = np.log(scales[valid]), np.log(fluct[valid])
+    return {'hurst': _slope(x, y), 'scales': scales, 'fluctuations': fluct, 'x': x, 'y': y}
+
+
+_METHODS = {
+    'variance': hurst_variance,
+    'rs': hurst_rescaled_range,
+    'dfa': hurst_dfa,
+}
+
+
+def hurst_exponent(ts, method='variance'):
+    """
+    Coefficient de Hurst selon l'estimateur choisi.
+    Retourne {'hurst', 'scales', 'fluctuations', 'x', 'y'} (x, y : points log-log).
+    """
+    if method not in _METHODS:
+        raise ValueError(f"Estimateur de Hurst inconnu '{method}'")
+    return _METHODS[method](ts)
+
+
+# ========================================
+# HURST GLISSANT
+# ========================================
+
+def rolling_hurst(ts, window=252, lags=None):
+    """
+    Hurst (variance des lags) sur une fenêtre glissante, pour toutes les fins
+    de fenêtre en une passe : les moyennes des différences de chaque lag sont
+    obtenues par sommes cumulées, puis toutes les régressions log-log sont
+    résolues ensemble. Les window-1 premières valeurs valent NaN.
+    """
+    x = np.asarray(ts, dtype=np.float64)
+    n = len(x)
+    result = np.full(n, np.nan)
+    if n < window:
+        return result
+
+    if lags is None:
+        lags = np.unique(np.geomspace(2, max(3, window // 4), 12).astype(int))
+    lags = np.asarray(lags)
+
+    ends = np.arange(window - 1, n)
+    log_tau = np.empty((len(lags), len(ends)))
+
+    for i, lag in enumerate(lags):
+        d = x[lag:] - x[:-lag]
+        count = window - lag
+        c1 = np.concatenate(([0.0], np.cumsum(d)))
+        c2 = np.concatenate(([0.0], np.cumsum(d * d)))
+        # Différence d[j] = x[j+lag] - x[j] ; fenêtre finissant en t → j ∈ [t-window+1, t-lag]
+        hi = ends - lag + 1
+        lo = hi - count
+        mean = (c1[hi] - c1[lo]) / count
+        var = (c2[hi] - c2[lo]) / count - mean ** 2
+        log_tau[i] = 0.5 * np.log(np.maximum(var, 1e-300))
+
+    log_lags = np.log(lags) - np.log(lags).mean()
+    centered = log_tau - log_tau.mean(axis=0)
+    result[ends] = log_lags @ centered / (log_lags @ log_lags)
+    return result
+
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def _legacy_hurst(ts):
+    """Ancienne implémentation (boucle Python), conservée pour le benchmark"""
+    lags = range(2, min(100, len(ts)//2))
+    tau = [np.std(np.subtract(ts[lag:], ts[:-lag])) for lag in lags]
+    return np.polyfit(np.log(lags), np.log(tau), 1)[0]
+
+
+def _legacy_rolling(ts, window):
+    out = np.full(len(ts), np.nan)
+    for t in range(window - 1, len(ts)):
+        out[t] = _legacy_hurst(ts[t - window + 1:t + 1])
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    def best_of(fn, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = fn()
+            timings.append(time.perf_counter() - start)
+        return value, min(timings) * 1000
+
+    print("=" * 60)
+    print("⏱️  BENCHMARK HURST (meilleur de 5, en ms)")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    for n in (10_000, 30_000, 100_000):
+        log_prices = np.cumsum(rng.normal(0, 0.01, n)) + 4.6
+
+        legacy, t_legacy = best_of(lambda: _legacy_hurst(log_prices))
+        print(f"\n📏 {n} points")
+        print(f"   boucle Python  : {t_legacy:8.2f} ms  H={legacy:.4f}")
+        for method in _METHODS:
+            value, elapsed = best_of(lambda: hurst_exponent(log_prices, method)['hurst'])
+            print(f"   {method:<14} : {elapsed:8.2f} ms  H={value:.4f}")
+
+        window = 252
+        sample = log_prices[:2000]
+        _, t_roll_legacy = best_of(lambda: _legacy_rolling(sample, window), repeat=1)
+        _, t_roll = best_of(lambda: rolling_hurst(log_prices, window))
+        print(f"   rolling {window}j : {t_roll:8.2f} ms "
+              f"(boucle : ~{t_roll_legacy * n / len(sample):.0f} ms extrapolé)")
@@ -0,0 +1,423 @@
+"""
+Jobs d'analyse asynchrones
+File bornée + pool de threads : POST /analyze retourne immédiatement
+un identifiant de job, le résultat est récupéré via GET /analyze/<job_id>.
+Deux backends sans broker externe : SQLite (par défaut, partagé entre
+les workers gunicorn) ou mémoire (un seul process).
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.environ.get('JOB_BACKEND', 'sqlite')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 32))
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 3600))
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH', os.path.join('cache', 'jobs.db'))
+
+# Bail d'un job SQLite en cours (s) : passé ce délai, son worker est
+# considéré comme mort et le job est remis en file (au plus JOB_MAX_ATTEMPTS fois)
+JOB_LEASE = int(os.environ.get('JOB_LEASE', 600))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+
+# Workers gunicorn : la file mémoire d'un worker est invisible des autres
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Statuts possibles d'un job
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """La file d'attente est pleine : le client doit réessayer plus tard"""
+
+
+def _new_job(ticker, options):
+    now = time.time()
+    return {
+        'id': uuid.uuid4().hex,
+        'ticker': ticker,
+        'options': options or {},
+        'status': QUEUED,
+        'payload': None,
+        'error': None,
+        'attempts': 0,
+        'started_at': None,
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+# ========================================
+# BACKEND MÉMOIRE
+# ========================================
+
+class MemoryJobBackend:
+    """File en mémoire, propre au process"""
+
+    # Pas de bail : les jobs disparaissent avec le process
+    lease = None
+
+    def __init__(self, maxsize=JOB_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job):
+        with self._lock:
+            self._jobs[job['id']] = job
+        try:
+            self._queue.put_nowait(job['id'])
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job['id']]
+            raise JobQueueFull()
+
+    def claim(self, timeout=1.0):
+        """Retourne le prochain job à exécuter (passé en 'running') ou None"""
+        try:
+            job_id = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status=RUNNING, attempts=job['attempts'] + 1,
+                       started_at=time.time(), updated_at=time.time())
+        return self.get(job_id)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=time.time())
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def prune(self, max_age=JOB_RETENTION):
+        """Supprime les jobs terminés depuis plus de max_age secondes"""
+        limit = time.time() - max_age
+        with self._lock:
+            for job_id in [
+                job_id for job_id, job in self._jobs.items()
+                if job['status'] in (DONE, FAILED) and job['updated_at'] < limit
+            ]:
+                del self._jobs[job_id]
+
+    def pending(self):
+        return self._queue.qsize()
+
+
+# ========================================
+# BACKEND SQLITE
+# ========================================
+
+class SQLiteJobBackend:
+    """
+    File persistante SQLite, partagée par tous les workers d'une machine.
+    Un job réservé porte un bail de `lease` secondes : s'il est toujours
+    'running' au-delà (worker tué, redémarré ou en timeout), il est remis
+    en file, puis passé en échec après max_attempts tentatives.
+    """
+
+    COLUMNS = ['id', 'ticker', 'options', 'status', 'payload', 'error',
+               'attempts', 'started_at', 'created_at', 'updated_at']
+
+    def __init__(self, path=JOB_DB_PATH, maxsize=JOB_QUEUE_SIZE, poll_interval=0.2,
+                 lease=JOB_LEASE, max_attempts=JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    ticker TEXT NOT NULL,
+                    options TEXT,
+                    status TEXT NOT NULL,
+                    payload TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    started_at REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+            # Bases créées avant l'ajout du bail
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'attempts' not in existing:
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            if 'started_at' not in existing:
+                conn.execute("ALTER TABLE jobs ADD COLUMN started_at REAL")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def submit(self, job):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+            if pending >= self.maxsize:
+                conn.execute("ROLLBACK")
+                raise JobQueueFull()
+            conn.execute(
+                "INSERT INTO jobs (id, ticker, options, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job['id'], job['ticker'], json.dumps(job['options']), QUEUED,
+                 job['created_at'], job['updated_at'])
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _reclaim(self, conn):
+        """Remet en file (ou en échec) les jobs dont le bail a expiré"""
+        now = time.time()
+        expired = now - self.lease
+        failed = conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+            "WHERE status = ? AND COALESCE(started_at, updated_at) < ? AND attempts >= ?",
+            (FAILED, f"Job interrompu {self.max_attempts} fois", now, RUNNING, expired, self.max_attempts)
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE jobs SET status = ?, started_at = NULL, updated_at = ? "
+            "WHERE status = ? AND COALESCE(started_at, updated_at) < ?",
+            (QUEUED, now, RUNNING, expired)
+        ).rowcount
+        if failed or requeued:
+            logger.warning(f"♻️  Bail expiré : {requeued} job(s) remis en file, {failed} en échec")
+
+    def claim(self, timeout=1.0):
+        """Réserve atomiquement le plus ancien job en attente (après reprise des baux expirés)"""
+        deadline = time.time() + timeout
+        while True:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._reclaim(conn)
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        (RUNNING, now, now, row[0])
+                    )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+            if row is not None:
+                return self.get(row[0])
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def renew(self, job_id):
+        """Prolonge le bail d'un job toujours en cours"""
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE jobs SET started_at = ? WHERE id = ? AND status = ?",
+                         (time.time(), job_id, RUNNING))
+        finally:
+            conn.close()
+
+    def update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+
+        job = dict(zip(self.COLUMNS, row))
+        job['options'] = json.loads(job['options'] or '{}')
+        return job
+
+    def prune(self, max_age=JOB_RETENTION):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, time.time() - max_age)
+            )
+        finally:
+            conn.close()
+
+    def pending(self):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+
+# ========================================
+# GESTIONNAIRE DE JOBS
+# ========================================
+
+class JobManager:
+    """
+    Pool de threads qui consomme la file.
+    runner(ticker, **options) -> (payload_json, success, cache_hit)
+    """
+
+    def __init__(self, runner, backend=None, workers=JOB_WORKERS):
+        self.runner = runner
+        self.backend = backend or MemoryJobBackend()
+        self.workers = workers
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def start(self):
+        """Démarre les threads (au premier job, donc après le fork gunicorn)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"analysis-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, ticker, **options):
+        """Ajoute un job ; lève JobQueueFull si la file est pleine"""
+        self.start()
+        self.backend.prune()
+        job = _new_job(ticker, options)
+        self.backend.submit(job)
+        logger.info(f"📨 Job {job['id'][:8]} en file pour {ticker}")
+        return job['id']
+
+    def get(self, job_id):
+        return self.backend.get(job_id)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job = self.backend.claim(timeout=1.0)
+            if job is None:
+                continue
+            renewing = self._renew_lease(job['id'])
+            try:
+                payload, success, _ = self.runner(job['ticker'], **job['options'])
+                if success:
+                    self.backend.update(job['id'], status=DONE, payload=payload)
+                else:
+                    error = json.loads(payload).get('error', "Erreur lors de l'analyse")
+                    self.backend.update(job['id'], status=FAILED, error=error)
+            except Exception as e:
+                logger.error(f"❌ Job {job['id'][:8]} en échec: {e}")
+                self.backend.update(job['id'], status=FAILED, error=str(e))
+            finally:
+                renewing.set()
+
+    def _renew_lease(self, job_id):
+        """
+        Prolonge le bail du job tous les tiers de bail tant que le runner
+        travaille (analyses groupées plus longues que le bail).
+        Retourne l'Event qui arrête le renouvellement.
+        """
+        done = threading.Event()
+        lease = self.backend.lease
+        if lease:
+            def renew():
+                while not done.wait(lease / 3):
+                    self.backend.renew(job_id)
+            threading.Thread(target=renew, name=f"job-lease-{job_id[:8]}", daemon=True).start()
+        return done
+
+
+# ========================================
+# INSTANCE PARTAGÉE
+# ========================================
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def create_backend(name=JOB_BACKEND, workers=WEB_CONCURRENCY):
+    """
+    Backend 'sqlite' ou 'memory'. La file mémoire est refusée avec plusieurs
+    workers : un job créé par l'un serait introuvable (404) depuis les autres.
+    """
+    if name == 'memory' and workers > 1:
+        logger.warning(f"⚠️  JOB_BACKEND=memory refusé avec {workers} workers gunicorn → SQLite")
+        name = 'sqlite'
+    if name == 'sqlite':
+        return SQLiteJobBackend()
+    return MemoryJobBackend()
+
+
+def run_job(ticker, batch=False, **options):
+    """
+    Runner du gestionnaire partagé : analyse d'un ticker, ou analyse
+    groupée si batch=True (ticker contient alors 'AAPL,MSFT,...').
+    """
+    if batch:
+        from batch import run_batch_job
+        return run_batch_job(ticker, **options)
+    from analysis import analyze_stock_cached
+    return analyze_stock_cached(ticker, **options)
+
+
+def get_job_manager():
+    """Retourne le gestionnaire de jobs partagé (créé au premier appel)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(run_job, create_backend())
+        return _manager
+
+
+def set_job_manager(manager):
+    """Remplace le gestionnaire partagé (tests)"""
+    global _manager
+    with _manager_lock:
+        _manager = manager
@@ -0,0 +1,338 @@
+"""
+Test de charge des routes Flask avec des cours synthétiques (sans yfinance)
+create_app() prépare app.app dans un dossier jetable : base utilisateurs,
+store de cours alimenté par synthetic.py, jobs SQLite partagés entre
+workers, et N utilisateurs approuvés (loadtest0, loadtest1, ...).
+Chaque utilisateur virtuel se connecte puis enchaîne les routes tirées
+selon --mix ; le rapport JSON donne débit, latences p50/p95/p99 et taux
+d'erreur par route.
+
+    python loadtest.py                                    # serveur local (threads) + charge
+    python loadtest.py -c 32 -d 60 --mix analyze=1,dashboard=4
+    gunicorn -w 4 --threads 8 'loadtest:create_app()'     # serveur de test seul
+    python loadtest.py --url http://127.0.0.1:8000 -c 64  # charge contre ce serveur
+
+'analyze' suit le job (202) jusqu'au résultat. Avec peu de tickers
+(--tickers), le cache de résultats absorbe presque toutes les analyses :
+augmenter --tickers ou RESULT_CACHE_MAX_ENTRIES=0 côté serveur pour
+mesurer le calcul.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+LOADTEST_DIR = os.environ.get('LOADTEST_DIR', os.path.join(tempfile.gettempdir(), 'trading-loadtest'))
+LOADTEST_BARS = int(os.environ.get('LOADTEST_BARS', 5000))
+LOADTEST_USERS = int(os.environ.get('LOADTEST_USERS', 50))
+LOADTEST_PASSWORD = 'loadtest'
+
+ROUTES = ('login', 'dashboard', 'analyze', 'analyze_stats')
+DEFAULT_MIX = 'login=1,dashboard=4,analyze=1,analyze_stats=2'
+
+# Attente entre deux consultations d'un job d'analyse (s)
+POLL_INTERVAL = 0.05
+
+
+# ========================================
+# SERVEUR DE TEST
+# ========================================
+
+def create_app(directory=None, bars=LOADTEST_BARS, users=LOADTEST_USERS):
+    """
+    app.app configurée pour le test de charge (aussi utilisable comme
+    fabrique gunicorn). À appeler avant tout import de app : l'URL de la
+    base est lue à l'import.
+    """
+    directory = os.path.abspath(directory or LOADTEST_DIR)
+    os.makedirs(directory, exist_ok=True)
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(directory, 'users.db')}")
+    os.environ.setdefault('JOB_BACKEND', 'sqlite')
+    os.environ.setdefault('JOB_DB_PATH', os.path.join(directory, 'jobs.db'))
+
+    import price_store
+    import volatility
+    from synthetic import synthetic_fetcher
+
+    price_store.set_price_store(price_store.PriceStore(
+        os.path.join(directory, 'prices.db'), fetcher=synthetic_fetcher(bars),
+        archive_path=os.path.join(directory, 'archive')
+    ))
+    volatility.set_volatility_store(
+        volatility.VolatilityStateStore(os.path.join(directory, 'volatility.db'))
+    )
+
+    from app import app
+    seed_users(users)
+    return app
+
+
+def seed_users(count=LOADTEST_USERS):
+    """Crée les utilisateurs approuvés loadtest0..count-1 s'ils n'existent pas"""
+    from app import app, db, User
+
+    with app.app_context():
+        db.create_all()
+        existing = {name for (name,) in db.session.query(User.username).filter(User.username.like('loadtest%'))}
+        for i in range(count):
+            username = f"loadtest{i}"
+            if username in existing:
+                continue
+            user = User(username=username, email=f"{username}@example.com", is_approved=True)
+            user.set_password(LOADTEST_PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+
+
+def serve_in_thread(app):
+    """Serveur werkzeug multi-thread sur un port libre : (url, arrêt)"""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # une ligne par requête sinon
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+# ========================================
+# CLIENT HTTP
+# ========================================
+
+class Client:
+    """Connexion HTTP d'un utilisateur virtuel (cookies de session conservés)"""
+
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.cookies = {}
+        self._conn = None
+
+    def request(self, method, path, form=None):
+        """Retourne (statut, en-têtes, corps) ; les redirections ne sont pas suivies"""
+        headers = {'Accept-Encoding': 'gzip'}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self._conn.request(method, path, body, headers)
+            response = self._conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.close()
+            raise
+
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                if morsel.value:
+                    self.cookies[name] = morsel.value
+                else:
+                    self.cookies.pop(name, None)
+        return response.status, response.headers, data
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ========================================
+# SCÉNARIOS
+# ========================================
+
+def do_login(client, username):
+    client.cookies.clear()
+    status, headers, _ = client.request('POST', '/login', {'username': username, 'password': LOADTEST_PASSWORD})
+    return status == 302 and '/dashboard' in (headers.get('Location') or '')
+
+
+def do_dashboard(client):
+    status, _, _ = client.request('GET', '/dashboard')
+    return status == 200
+
+
+def do_analyze(client, ticker, deadline):
+    """POST /analyze puis suivi du job jusqu'au résultat (ou deadline)"""
+    status, _, data = client.request('POST', '/analyze', {'ticker': ticker})
+    if status != 202:
+        return status == 200
+
+    status_url = json.loads(data)['status_url']
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        status, _, _ = client.request('GET', status_url)
+        if status != 202:
+            return status == 200
+    return False
+
+
+def do_analyze_stats(client, ticker):
+    status, _, _ = client.request('POST', '/analyze', {'ticker': ticker, 'mode': 'stats'})
+    return status == 200
+
+
+def parse_mix(raw):
+    """'analyze=1,dashboard=4' → {'analyze': 1.0, 'dashboard': 4.0}"""
+    mix = {}
+    for part in raw.split(','):
+        if not part.strip():
+            continue
+        route, _, weight = part.partition('=')
+        route = route.strip()
+        if route not in ROUTES:
+            raise ValueError(f"Route inconnue '{route}' (valeurs possibles : {', '.join(ROUTES)})")
+        mix[route] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Mélange de routes vide")
+    return mix
+
+
+# ========================================
+# GÉNÉRATION DE CHARGE
+# ========================================
+
+def _virtual_user(index, base_url, mix, tickers, users, stop, budget, samples, timeout):
+    rng = random.Random(index)
+    client = Client(base_url, timeout)
+    username = f"loadtest{index % users}"
+    routes, weights = list(mix), list(mix.values())
+    logged_in = False
+
+    while not stop.is_set() and budget():
+        route = 'login' if not logged_in else rng.choices(routes, weights)[0]
+        ticker = rng.choice(tickers)
+        start = time.monotonic()
+        try:
+            if route == 'login':
+                ok = logged_in = do_login(client, username)
+            elif route == 'dashboard':
+                ok = do_dashboard(client)
+            elif route == 'analyze':
+                ok = do_analyze(client, ticker, start + timeout)
+            else:
+                ok = do_analyze_stats(client, ticker)
+        except (http.client.HTTPException, OSError, ValueError):
+            ok = False
+        samples.append((route, time.monotonic() - start, ok))
+    client.close()
+
+
+def run_load(base_url, concurrency=8, duration=10.0, mix=DEFAULT_MIX, tickers=5,
+             users=LOADTEST_USERS, max_requests=None, timeout=60):
+    """
+    Lance `concurrency` utilisateurs virtuels pendant `duration` secondes
+    (ou jusqu'à max_requests requêtes) et retourne le rapport.
+    """
+    mix = parse_mix(mix) if isinstance(mix, str) else mix
+    symbols = [f"SYN{i}" for i in range(tickers)]
+    samples = []
+    stop = threading.Event()
+    budget = (lambda: True) if max_requests is None else (lambda: len(samples) < max_requests)
+
+    threads = [
+        threading.Thread(target=_virtual_user, daemon=True,
+                         args=(i, base_url, mix, symbols, users, stop, budget, samples, timeout))
+        for i in range(concurrency)
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    deadline = start + duration
+    while any(thread.is_alive() for thread in threads) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    return build_report(samples, elapsed, {'url': base_url, 'concurrency': concurrency, 'mix': mix,
+                                           'tickers': tickers})
+
+
+def build_report(samples, elapsed, settings):
+    """Débit, latences (ms) et erreurs par route, puis total"""
+    import numpy as np
+
+    def summary(rows):
+        latencies = np.array([seconds for _, seconds, _ in rows]) * 1000
+        errors = sum(1 for _, _, ok in rows if not ok)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(rows) else (0, 0, 0)
+        return {
+            'requests': len(rows),
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0,
+            'throughput_rps': round(len(rows) / elapsed, 2) if elapsed else 0,
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(float(latencies.max()), 2) if len(rows) else 0,
+        }
+
+    samples = list(samples)
+    routes = sorted({route for route, _, _ in samples})
+    return dict(settings, duration_s=round(elapsed, 2), total=summary(samples), routes={
+        route: summary([s for s in samples if s[0] == route]) for route in routes
+    })
+
+
+# ========================================
+# LIGNE DE COMMANDE
+# ========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge des routes Flask (données synthétiques)")
+    parser.add_argument('--url', help="serveur à tester (défaut : serveur local démarré par ce script)")
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help="utilisateurs virtuels simultanés")
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help="durée du test (s)")
+    parser.add_argument('-n', '--requests', type=int, help="arrêt après ce nombre de requêtes")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="poids des routes (route=poids,...)")
+    parser.add_argument('--tickers', type=int, default=5, help="nombre de tickers synthétiques")
+    parser.add_argument('--users', type=int, default=LOADTEST_USERS, help="utilisateurs créés sur le serveur")
+    parser.add_argument('--timeout', type=float, default=60, help="délai max d'une requête ou d'un job (s)")
+    parser.add_argument('-o', '--output', help="écrit le rapport JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    # Lu à l'import de app : journaux de l'analyse limités aux avertissements
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    shutdown = None
+    url = args.url
+    if url is None:
+        url, shutdown = serve_in_thread(create_app(users=args.users))
+    print(f"🚦 {args.concurrency} utilisateur(s) virtuel(s) sur {url}", file=sys.stderr)
+
+    try:
+        report = run_load(url, args.concurrency, args.duration, args.mix, args.tickers,
+                          args.users, args.requests, args.timeout)
+    finally:
+        if shutdown:
+            shutdown()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text + '\n')
+    else:
+        print(text)
+    return 1 if report['total']['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Journalisation et métriques de l'application
+- configure_logging() : niveau global via LOG_LEVEL (DEBUG, INFO, WARNING, ERROR, OFF)
+- compteurs et histogrammes thread-safe, exposés au format texte Prometheus
+  par la route /metrics
+- timed(stage) : chronomètre une étape du pipeline (téléchargement,
+  graphiques, statistiques, sérialisation)
+
+Les métriques vivent dans la mémoire du processus : avec plusieurs
+workers gunicorn, chaque scrape de /metrics décrit le worker qui répond.
+Module sans dépendance lourde : importé dès le chargement de app.py.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s | %(message)s'
+
+# Bornes (s) des histogrammes de durée : de la milliseconde à la minute
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Bornes (octets) des tailles de réponse : de 1 Ko à 64 Mo
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+
+
+# ========================================
+# JOURNALISATION
+# ========================================
+
+def configure_logging(level=None):
+    """
+    Fixe le niveau du logger racine ; un handler n'est ajouté que si aucun
+    n'est déjà installé (par gunicorn ou l'application hôte).
+    level='OFF' coupe tous les journaux.
+    """
+    level = (level or LOG_LEVEL).upper()
+    if level == 'OFF':
+        logging.disable(logging.CRITICAL)
+        return
+    logging.disable(logging.NOTSET)
+    logging.basicConfig(format=LOG_FORMAT)
+    logging.getLogger().setLevel(getattr(logging, level, logging.INFO))
+
+
+# ========================================
+# MÉTRIQUES
+# ========================================
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + body + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} : labels attendus {self.labelnames}, reçus {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    """Compteur monotone, un total par combinaison de labels"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """Histogramme à bornes fixes (compte cumulé par borne, somme, nombre)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe la durée (s) du bloc, y compris s'il lève une exception"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """{'count', 'sum'} pour une combinaison de labels (zéros si jamais observée)"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {'count': 0, 'sum': 0.0}
+            return {'count': sum(state['counts']), 'sum': state['sum']}
+
+    def _samples(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state['counts']):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Ensemble des métriques exposées par /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée : {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def clear(self):
+        """Remet toutes les valeurs à zéro (tests)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def render(self):
+        """Exposition au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'analysis_stage_seconds',
+    "Durée des étapes d'analyse (téléchargement, graphiques, stats, sérialisation)",
+    ('stage',)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'analysis_cache_requests_total',
+    "Consultations des caches d'analyse (result, result_encoded : hit/miss ; decomposition : hit/tail/miss)",
+    ('cache', 'result')
+)
+YFINANCE_REQUESTS = REGISTRY.counter(
+    'yfinance_requests_total',
+    "Appels à yfinance (history, download)",
+    ('kind',)
+)
+YFINANCE_RETRIES = REGISTRY.counter(
+    'yfinance_retries_total',
+    "Replis sur une période plus courte après un historique complet vide"
+)
+PAYLOAD_BYTES = REGISTRY.histogram(
+    'http_response_payload_bytes',
+    "Taille des réponses JSON envoyées (après compression éventuelle)",
+    ('endpoint', 'encoding'),
+    buckets=SIZE_BUCKETS
+)
+
+
+def timed(stage):
+    """with timed('download'): ... → observé dans analysis_stage_seconds"""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def render():
+    return REGISTRY.render()
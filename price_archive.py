@@ -0,0 +1,202 @@
+"""
+Archive des cours en colonnes, ouverte par mmap (sans copie)
+Un dossier par ticker : un fichier binaire NumPy par colonne
+(days int64, close float64, volume float32) et un petit index JSON.
+Les workers gunicorn qui ouvrent le même ticker partagent les pages
+du cache disque au lieu de garder chacun leur propre DataFrame.
+L'index n'est écrit qu'après les colonnes, sous verrou exclusif ; les
+lecteurs prennent un verrou partagé : ils ne voient jamais que des barres
+complètes. Les octets déjà mappés ne sont jamais réécrits : une série
+ouverte reste identique pendant toute une analyse.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+
+from price_series import PriceSeries
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1
+
+# Symboles acceptés comme nom de dossier : ni séparateur, ni '.' / '..'
+# (AAPL, BRK-B, ^GSPC, EURUSD=X, 0700.HK, ...)
+TICKER_PATTERN = re.compile(r'^[A-Z0-9^][A-Z0-9.^=&_-]{0,31}$')
+
+# Colonnes archivées (nom d'attribut PriceSeries, type sur disque)
+COLUMNS = (
+    ('days', np.dtype('<i8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f4')),
+)
+
+
+class PriceArchive:
+    """Archive mmap des PriceSeries, un dossier par ticker sous root"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, ticker):
+        if not TICKER_PATTERN.match(ticker):
+            raise ValueError(f"Symbole invalide pour l'archive : {ticker!r}")
+        return os.path.join(self.root, ticker)
+
+    def _column_path(self, ticker, name):
+        return os.path.join(self._dir(ticker), f"{name}.bin")
+
+    def _index_path(self, ticker):
+        return os.path.join(self._dir(ticker), 'index.json')
+
+    @contextmanager
+    def _lock(self, ticker, shared=False):
+        """Verrou du ticker entre processus : exclusif (écriture) ou partagé (lecture)"""
+        os.makedirs(self._dir(ticker), exist_ok=True)
+        with open(os.path.join(self._dir(ticker), '.lock'), 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+
+    # ---------- Index ----------
+
+    def read_index(self, ticker):
+        """Index du ticker ({'count', 'last_day', 'last_bar', 'last_close', ...}) ou None"""
+        try:
+            with open(self._index_path(ticker)) as handle:
+                index = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return index if index.get('format') == ARCHIVE_FORMAT else None
+
+    def _write_index(self, ticker, count, last_day, last_close):
+        index = {
+            'format': ARCHIVE_FORMAT,
+            'count': int(count),
+            'columns': {name: dtype.str for name, dtype in COLUMNS},
+            'last_day': int(last_day),
+            'last_bar': str(np.datetime64(int(last_day), 'D')),
+            'last_close': float(last_close),
+        }
+        tmp = self._index_path(ticker) + '.tmp'
+        with open(tmp, 'w') as handle:
+            json.dump(index, handle)
+        os.replace(tmp, self._index_path(ticker))
+        return index
+
+    # ---------- Lecture ----------
+
+    def open(self, ticker):
+        """
+        PriceSeries dont les colonnes sont des vues mmap en lecture seule,
+        ou None si le ticker n'est pas archivé ou si l'archive est
+        incohérente (fichier tronqué, dernière barre différente de l'index).
+        Lu sous verrou partagé : jamais entre l'écriture des colonnes et
+        celle de l'index.
+        """
+        if not TICKER_PATTERN.match(ticker) or not os.path.isdir(self._dir(ticker)):
+            return None
+        with self._lock(ticker, shared=True):
+            return self._open(ticker)
+
+    def _open(self, ticker):
+        index = self.read_index(ticker)
+        if index is None or index['count'] < 1:
+            return None
+
+        count = index['count']
+        columns = {}
+        for name, dtype in COLUMNS:
+            path = self._column_path(ticker, name)
+            if not os.path.exists(path) or os.path.getsize(path) < count * dtype.itemsize:
+                logger.warning(f"⚠️  Archive {ticker} incohérente : colonne '{name}' tronquée")
+                return None
+            columns[name] = np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+        days, close = columns['days'], columns['close']
+        if days[-1] != index['last_day'] or close[-1] != index['last_close'] \
+                or (count > 1 and days[-2] >= days[-1]):
+            logger.warning(f"⚠️  Archive {ticker} incohérente : dernière barre différente de l'index")
+            return None
+        return PriceSeries(days, close, columns['volume'])
+
+    # ---------- Écriture ----------
+
+    def write(self, ticker, prices):
+        """Réécrit toute l'archive du ticker (les mmaps déjà ouverts restent valides)"""
+        with self._lock(ticker):
+            # Sans index, l'archive est ignorée tant qu'elle n'est pas complète
+            try:
+                os.remove(self._index_path(ticker))
+            except FileNotFoundError:
+                pass
+            for name, dtype in COLUMNS:
+                path = self._column_path(ticker, name)
+                np.asarray(getattr(prices, name), dtype=dtype).tofile(path + '.tmp')
+                os.replace(path + '.tmp', path)
+            return self._write_index(ticker, len(prices), prices.days[-1], prices.close[-1])
+
+    def append(self, ticker, prices):
+        """
+        Ajoute les barres postérieures à la dernière barre archivée.
+        Retourne le nombre de barres ajoutées (0 si le ticker n'est pas archivé).
+        """
+        with self._lock(ticker):
+            index = self.read_index(ticker)
+            if index is None:
+                return 0
+
+            new = np.asarray(prices.days) > index['last_day']
+            added = int(new.sum())
+            if added == 0:
+                return 0
+
+            count = index['count']
+            for name, dtype in COLUMNS:
+                with open(self._column_path(ticker, name), 'r+b') as handle:
+                    # Reste d'un ajout interrompu : coupé avant d'écrire
+                    # (jamais sous la longueur mappée par les lecteurs)
+                    handle.truncate(count * dtype.itemsize)
+                    handle.seek(0, os.SEEK_END)
+                    handle.write(np.asarray(getattr(prices, name)[new], dtype=dtype).tobytes())
+
+            self._write_index(ticker, count + added, prices.days[new][-1], prices.close[new][-1])
+            return added
+
+    def replace_tail(self, ticker, prices):
+        """
+        Remplace la dernière barre archivée (barre en cours, révisée à
+        chaque rafraîchissement) puis ajoute les suivantes. prices doit
+        commencer à la date de cette barre. Chaque colonne est copiée dans
+        un nouveau fichier puis substituée par os.replace : les mmaps déjà
+        ouverts gardent l'ancienne barre jusqu'à la fin de leur analyse.
+        Retourne le nombre de barres écrites (0 si rien ne correspond).
+        """
+        with self._lock(ticker):
+            index = self.read_index(ticker)
+            if index is None or len(prices) == 0 or int(prices.days[0]) != index['last_day']:
+                return 0
+
+            kept = index['count'] - 1
+            for name, dtype in COLUMNS:
+                path = self._column_path(ticker, name)
+                shutil.copyfile(path, path + '.tmp')
+                with open(path + '.tmp', 'r+b') as handle:
+                    handle.truncate(kept * dtype.itemsize)
+                    handle.seek(0, os.SEEK_END)
+                    handle.write(np.asarray(getattr(prices, name), dtype=dtype).tobytes())
+                os.replace(path + '.tmp', path)
+
+            self._write_index(ticker, kept + len(prices), prices.days[-1], prices.close[-1])
+            return len(prices)
@@ -0,0 +1,109 @@
+"""
+Conteneur compact des cours d'un ticker pour le pipeline d'analyse
+- dates en jours depuis l'epoch (int64), clôtures float64, volumes float32
+- __slots__ : ni DataFrame, ni dict par instance, ni chaînes de dates
+- libellés de dates (jj-mm-aaaa) formatés seulement pour les points tracés
+
+Mesure mémoire contre l'ancien triplet DataFrame + Series : python price_series.py
+"""
+
+import numpy as np
+
+# Caractères de 'AAAA-MM-JJ' réordonnés en 'JJ-MM-AAAA'
+_LABEL_ORDER = [8, 9, 7, 5, 6, 4, 0, 1, 2, 3]
+
+
+class PriceSeries:
+    """Historique journalier nettoyé d'un ticker, en tableaux NumPy"""
+
+    __slots__ = ('days', 'close', 'volume')
+
+    def __init__(self, days, close, volume=None):
+        # Sans copie si les types correspondent (colonnes mmap de l'archive)
+        self.days = np.asarray(days, dtype=np.int64)
+        self.close = np.asarray(close, dtype=np.float64)
+        if volume is None:
+            volume = np.zeros(len(self.close))
+        self.volume = np.asarray(volume, dtype=np.float32)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Depuis un DataFrame avec colonnes Date, Close (et Volume)"""
+        # Copies : ne pas retenir les blocs du DataFrame source
+        dates = np.array(frame['Date'], dtype='datetime64[D]')
+        close = np.array(frame['Close'], dtype=np.float64)
+        volume = np.array(frame['Volume'], dtype=np.float32) if 'Volume' in frame else None
+        return cls(dates.view(np.int64), close, volume)
+
+    def __len__(self):
+        return len(self.close)
+
+    @property
+    def dates(self):
+        """Dates en datetime64[D] (vue, sans copie)"""
+        return self.days.view('datetime64[D]')
+
+    @property
+    def last_bar(self):
+        """Date de la dernière barre (AAAA-MM-JJ)"""
+        return str(self.dates[-1])
+
+    @property
+    def nbytes(self):
+        return self.days.nbytes + self.close.nbytes + self.volume.nbytes
+
+    def date_labels(self, idx=slice(None)):
+        """Libellés 'jj-mm-aaaa' des barres idx (positions ou tranche)"""
+        iso = np.datetime_as_string(self.dates[idx], unit='D')
+        if iso.ndim == 0:
+            iso = iso.reshape(1)
+        chars = iso.astype('U10').view('U1').reshape(-1, 10)[:, _LABEL_ORDER]
+        return np.ascontiguousarray(chars).view('U10').ravel()
+
+    def date_label(self, i):
+        return self.date_labels([i])[0]
+
+
+# ========================================
+# MESURE MÉMOIRE
+# ========================================
+
+if __name__ == "__main__":
+    import tracemalloc
+
+    import pandas as pd
+
+    def legacy_triplet(frame):
+        """Triplet porté par le pipeline avant PriceSeries"""
+        data = frame.reset_index()
+        close_prices = pd.Series(data['Close'].values, dtype=np.float64)
+        volumes = pd.Series(data['Volume'].values, dtype=np.float64)
+        data['Date'] = pd.to_datetime(data['Date'])
+        data['Date_str'] = data['Date'].dt.strftime('%d-%m-%Y')
+        return data, close_prices, volumes
+
+    def retained(build, frame):
+        """Mémoire encore allouée après construction (objet conservé)"""
+        tracemalloc.start()
+        value = build(frame)
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del value
+        return current / 1e6
+
+    print("=" * 60)
+    print("💾 MÉMOIRE PAR TICKER (objet conservé)")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    for n in (2_500, 10_000, 25_000):
+        dates = pd.date_range('1950-01-01', periods=n, freq='D', name='Date')
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        frame = pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+                              'Volume': rng.integers(0, 10**7, n).astype(float)}, index=dates)
+
+        legacy = retained(legacy_triplet, frame)
+        compact = retained(lambda f: PriceSeries.from_frame(f.reset_index()), frame)
+        print(f"\n📏 {n} barres")
+        print(f"   DataFrame + Series : {legacy:7.2f} Mo")
+        print(f"   PriceSeries        : {compact:7.2f} Mo  ({legacy / compact:.0f}x moins)")
@@ -0,0 +1,402 @@
+"""
+Stockage local des cours OHLCV (SQLite)
+Évite de retélécharger tout l'historique à chaque analyse :
+seule la fin de série depuis la dernière barre stockée est récupérée.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from price_archive import PriceArchive
+from price_series import PriceSeries
+from providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.environ.get('PRICE_STORE_PATH', os.path.join('cache', 'prices.db'))
+
+# Archive mmap des séries (défaut : dossier 'archive' à côté de la base)
+DEFAULT_ARCHIVE_PATH = os.environ.get('PRICE_ARCHIVE_PATH')
+
+# Délai minimum entre deux synchronisations d'un même ticker (secondes)
+DEFAULT_REFRESH_INTERVAL = int(os.environ.get('PRICE_STORE_REFRESH', 900))
+
+# Écart relatif toléré sur la barre de recouvrement avant resynchronisation complète
+# (les cours ajustés changent rétroactivement après un dividende ou un split)
+ADJUSTMENT_TOLERANCE = 0.005
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+# ========================================
+# STORE SQLITE
+# ========================================
+
+class PriceStore:
+    """
+    Base SQLite des barres journalières, une ligne par (ticker, date).
+    Les cours viennent d'un fournisseur (providers.py, défaut : get_provider()).
+    Un fetcher simple reste injectable : fetcher(ticker, start=None) -> DataFrame
+    indexé par date avec les colonnes Open/High/Low/Close/Volume.
+    bulk_fetcher(tickers, start=None) -> {ticker: DataFrame} est optionnel ;
+    sans lui, sync_many synchronise les tickers un par un.
+    Les séries prêtes pour l'analyse sont servies par une archive mmap
+    tenue à jour depuis la base (get_series).
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, fetcher=None, refresh_interval=DEFAULT_REFRESH_INTERVAL,
+                 bulk_fetcher=None, archive_path=DEFAULT_ARCHIVE_PATH, provider=None):
+        self.path = path
+        self.provider = provider
+        if fetcher is None:
+            self.provider = provider or get_provider()
+            fetcher = self.provider.fetch
+            if bulk_fetcher is None:
+                bulk_fetcher = self.provider.fetch_many
+        self.fetcher = fetcher
+        self.bulk_fetcher = bulk_fetcher
+        self.refresh_interval = refresh_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+        self.archive = PriceArchive(archive_path or os.path.join(directory, 'archive'))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_schema(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    PRIMARY KEY (ticker, date)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    ticker TEXT PRIMARY KEY,
+                    last_sync REAL NOT NULL
+                )
+            """)
+
+    # ---------- Lecture ----------
+
+    def last_bar_date(self, ticker):
+        """Date (YYYY-MM-DD) de la dernière barre stockée, ou None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(date) FROM bars WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _last_close_date(self, ticker):
+        """Date de la dernière barre ayant une clôture, ou None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(date) FROM bars WHERE ticker = ? AND close IS NOT NULL", (ticker,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _bar_close(self, ticker, date):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT close FROM bars WHERE ticker = ? AND date = ?", (ticker, date)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, ticker, start=None):
+        """
+        Retourne l'historique stocké (DataFrame indexé par Date) ou None
+        start : uniquement les barres depuis cette date (YYYY-MM-DD, incluse)
+        """
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT date, open, high, low, close, volume FROM bars "
+                "WHERE ticker = ? AND date >= ? ORDER BY date",
+                conn,
+                params=(ticker, start or '')
+            )
+        if df.empty:
+            return None
+
+        df.columns = ['Date'] + COLUMNS
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df.set_index('Date')
+
+    # ---------- Écriture ----------
+
+    def write(self, ticker, data, replace=False):
+        """Insère (ou met à jour) les barres d'un DataFrame yfinance"""
+        if data is None or data.empty:
+            return 0
+
+        frame = data.copy()
+        for col in COLUMNS:
+            if col not in frame.columns:
+                frame[col] = 0 if col == 'Volume' else frame.get('Close')
+        dates = pd.DatetimeIndex(frame.index).strftime('%Y-%m-%d')
+        rows = [
+            (ticker, d, *(None if pd.isna(v) else float(v) for v in values))
+            for d, values in zip(dates, frame[COLUMNS].itertuples(index=False, name=None))
+        ]
+
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (ticker, date, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def _mark_synced(self, ticker):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (ticker, last_sync) VALUES (?, ?)",
+                (ticker, time.time())
+            )
+
+    def is_fresh(self, ticker):
+        """True si le ticker a été synchronisé il y a moins de refresh_interval"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_sync FROM sync_state WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] < self.refresh_interval
+
+    # ---------- Synchronisation ----------
+
+    def sync(self, ticker):
+        """
+        Met à jour le ticker : historique complet s'il est inconnu,
+        sinon uniquement les barres depuis la dernière date stockée.
+        Retourne la date de la dernière barre (ou None si aucune donnée).
+        """
+        ticker = ticker.upper().strip()
+        last = self.last_bar_date(ticker)
+
+        if last is not None and self.is_fresh(ticker):
+            return last
+
+        if last is None:
+            logger.info(f"📦 Store vide pour {ticker} → historique complet")
+            self.write(ticker, self.fetcher(ticker), replace=True)
+        else:
+            logger.info(f"📦 Store {ticker} → mise à jour depuis {last}")
+            try:
+                tail = self.fetcher(ticker, start=last)
+            except Exception as e:
+                # Le store reste utilisable même si la mise à jour échoue
+                logger.warning(f"⚠️  Mise à jour impossible ({e}), données stockées conservées")
+                return last
+
+            if self._needs_full_resync(ticker, last, tail):
+                logger.info("🔁 Cours ajustés modifiés → resynchronisation complète")
+                self.write(ticker, self.fetcher(ticker), replace=True)
+            else:
+                self.write(ticker, tail)
+
+        last = self.last_bar_date(ticker)
+        if last is not None:
+            self._mark_synced(ticker)
+        return last
+
+    def sync_many(self, tickers):
+        """
+        Synchronise plusieurs tickers avec un téléchargement groupé :
+        un appel pour les tickers inconnus, un pour les fins de série.
+        Retourne {ticker: date de la dernière barre ou None}.
+        """
+        tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t.strip()))
+        result = {}
+        new = []
+        stale = {}
+
+        for ticker in tickers:
+            last = self.last_bar_date(ticker)
+            if last is None:
+                new.append(ticker)
+            elif self.is_fresh(ticker):
+                result[ticker] = last
+            else:
+                stale[ticker] = last
+
+        if self.bulk_fetcher is None:
+            for ticker in new + list(stale):
+                result[ticker] = self.sync(ticker)
+            return result
+
+        if new:
+            logger.info(f"📦 Téléchargement groupé de {len(new)} historique(s) complet(s)")
+            try:
+                frames = self.bulk_fetcher(new)
+            except Exception as e:
+                logger.warning(f"⚠️  Téléchargement groupé impossible ({e})")
+                frames = {}
+            for ticker in new:
+                self.write(ticker, frames.get(ticker), replace=True)
+
+        if stale:
+            start = min(stale.values())
+            logger.info(f"📦 Mise à jour groupée de {len(stale)} ticker(s) depuis {start}")
+            try:
+                frames = self.bulk_fetcher(list(stale), start=start)
+            except Exception as e:
+                logger.warning(f"⚠️  Mise à jour groupée impossible ({e}), données stockées conservées")
+                frames = {}
+            for ticker, last in stale.items():
+                tail = frames.get(ticker)
+                if tail is not None:
+                    tail = tail[pd.DatetimeIndex(tail.index).strftime('%Y-%m-%d') >= last]
+                if self._needs_full_resync(ticker, last, tail):
+                    self.write(ticker, self.fetcher(ticker), replace=True)
+                else:
+                    self.write(ticker, tail)
+
+        for ticker in new + list(stale):
+            last = self.last_bar_date(ticker)
+            if last is not None:
+                self._mark_synced(ticker)
+            result[ticker] = last
+        return result
+
+    def _needs_full_resync(self, ticker, last, tail):
+        """Détecte un réajustement rétroactif via la barre de recouvrement"""
+        if tail is None or tail.empty:
+            return False
+
+        dates = pd.DatetimeIndex(tail.index).strftime('%Y-%m-%d')
+        if dates[0] != last or 'Close' not in tail.columns:
+            return False
+
+        stored = self._bar_close(ticker, last)
+        fetched = float(tail['Close'].iloc[0])
+        if not stored:
+            return False
+        return abs(fetched - stored) / stored > ADJUSTMENT_TOLERANCE
+
+    def lookup(self, ticker):
+        """
+        Métadonnées du ticker sans télécharger son historique : depuis la
+        base s'il y est déjà, sinon via provider.lookup. None si inconnu.
+        Sans fournisseur (fetcher simple), le ticker est synchronisé.
+        """
+        ticker = ticker.upper().strip()
+        last = self.last_bar_date(ticker)
+        if last is None and self.provider is not None:
+            return self.provider.lookup(ticker)
+        if last is None:
+            last = self.sync(ticker)
+        return None if last is None else {'symbol': ticker, 'last_bar': last}
+
+    def get(self, ticker):
+        """Synchronise puis retourne l'historique complet du ticker"""
+        ticker = ticker.upper().strip()
+        self.sync(ticker)
+        return self.load(ticker)
+
+    # ---------- Séries archivées ----------
+
+    def get_series(self, ticker):
+        """
+        Synchronise puis retourne l'historique nettoyé en PriceSeries,
+        ouvert sans copie depuis l'archive mmap. L'archive suit la base :
+        dernière barre remplacée (sans toucher aux séries déjà ouvertes)
+        et nouvelles barres ajoutées, reconstruction complète si
+        l'avant-dernière barre archivée a changé (cours réajustés) ou si
+        l'archive est incohérente. None si le ticker n'a aucune donnée.
+        """
+        ticker = ticker.upper().strip()
+        if self.sync(ticker) is None:
+            return None
+        last = self._last_close_date(ticker)
+        if last is None:
+            return None
+
+        try:
+            return self._archived_series(ticker, last)
+        except Exception as e:
+            logger.warning(f"⚠️  Archive indisponible pour {ticker} ({e}), lecture SQLite")
+            return _to_series(self.load(ticker))
+
+    def _archived_series(self, ticker, last):
+        prices = self.archive.open(ticker)
+        if prices is not None and prices.last_bar > last:
+            prices = None
+        elif prices is not None and (prices.last_bar < last
+                                     or self._bar_close(ticker, last) != prices.close[-1]):
+            prices = self._refresh_archive(ticker, prices)
+
+        if prices is None or prices.last_bar != last:
+            prices = _to_series(self.load(ticker))
+            if prices is None:
+                return None
+            self.archive.write(ticker, prices)
+            logger.info(f"📦 Archive {ticker} reconstruite ({len(prices)} barres)")
+            prices = self.archive.open(ticker)
+        return prices
+
+    def _refresh_archive(self, ticker, archived):
+        """
+        Met l'archive à jour depuis son avant-dernière barre, terminée donc
+        stable. Si elle n'a pas bougé, la dernière barre archivée (barre en
+        cours, révisée en séance) est remplacée et les nouvelles barres
+        ajoutées. Sinon (cours réajustés) : None → reconstruction.
+        """
+        if len(archived) < 2:
+            return None
+        tail = _to_series(self.load(ticker, start=str(archived.dates[-2])))
+        if tail is None or len(tail) < 2 or tail.days[0] != archived.days[-2] \
+                or tail.days[1] != archived.days[-1]:
+            return None
+        stable = archived.close[-2]
+        if abs(tail.close[0] - stable) > ADJUSTMENT_TOLERANCE * abs(stable):
+            return None
+
+        written = self.archive.replace_tail(ticker, PriceSeries(tail.days[1:], tail.close[1:], tail.volume[1:]))
+        logger.info(f"📦 Archive {ticker} → dernière barre remplacée, {written - 1} barre(s) ajoutée(s)")
+        return self.archive.open(ticker)
+
+
+def _to_series(frame):
+    """DataFrame du store → PriceSeries (barres sans clôture retirées), ou None"""
+    if frame is None:
+        return None
+    frame = frame[frame['Close'].notna()]
+    if frame.empty:
+        return None
+    frame = frame.reset_index()
+    frame['Volume'] = frame['Volume'].fillna(0)
+    return PriceSeries.from_frame(frame)
+
+
+# ========================================
+# INSTANCE PARTAGÉE
+# ========================================
+
+_store = None
+
+
+def get_price_store():
+    """Retourne le store partagé (créé au premier appel)"""
+    global _store
+    if _store is None:
+        _store = PriceStore()
+    return _store
+
+
+def set_price_store(store):
+    """Remplace le store partagé (tests, fetcher factice)"""
+    global _store
+    _store = store
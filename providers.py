@@ -0,0 +1,356 @@
+"""
+Fournisseurs de cours journaliers pour le store (PriceStore)
+- 'yfinance' : Yahoo Finance, session HTTP partagée (pool de connexions),
+               budget de temps global par téléchargement, symboles
+               inconnus mémorisés (cache négatif)
+- 'file'     : un fichier CSV ou Parquet par ticker (hors ligne, tests)
+Tous retournent des DataFrames indexés par date avec les colonnes
+Open/High/Low/Close/Volume (vides si le symbole n'a pas de données).
+
+MARKET_DATA_PROVIDER choisit le fournisseur par défaut.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from observability import YFINANCE_REQUESTS, YFINANCE_RETRIES
+from price_archive import TICKER_PATTERN
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_PROVIDER = os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+
+# Dossier des fichiers <TICKER>.csv / <TICKER>.parquet du fournisseur 'file'
+MARKET_DATA_PATH = os.environ.get('MARKET_DATA_PATH', os.path.join('cache', 'market_data'))
+
+# Budget total d'un téléchargement d'historique, replis compris (s),
+# et délai maximum de chaque appel HTTP (s)
+PROVIDER_DEADLINE = float(os.environ.get('PROVIDER_DEADLINE', 20))
+PROVIDER_TIMEOUT = float(os.environ.get('PROVIDER_TIMEOUT', 10))
+
+# Connexions HTTP gardées ouvertes vers Yahoo, par worker
+PROVIDER_POOL_SIZE = int(os.environ.get('PROVIDER_POOL_SIZE', 10))
+
+# Durée pendant laquelle un symbole sans données n'est plus redemandé (s).
+# Une panne réseau ressemble à un symbole inconnu pour yfinance : la durée
+# reste courte pour que les vrais symboles reviennent vite.
+NEGATIVE_CACHE_TTL = int(os.environ.get('PROVIDER_NEGATIVE_TTL', 600))
+
+# En dessous, un repli ne vaut plus la peine d'être tenté (s)
+MIN_ATTEMPT_SECONDS = 1.0
+
+# Historique jugé exploitable par l'analyse
+MIN_HISTORY_BARS = 100
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _enough(data):
+    return data is not None and not data.empty and len(data) > MIN_HISTORY_BARS
+
+
+def _empty_frame():
+    return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+
+
+class MarketDataProvider:
+    """
+    Interface d'un fournisseur :
+    - fetch(ticker, start=None) : historique complet, ou barres depuis start (incluse)
+    - fetch_many(tickers, start=None) : {ticker: DataFrame} (tickers sans données absents)
+    - lookup(ticker) : métadonnées {'symbol', ...} sans l'historique, ou None si inconnu
+    """
+
+    name = None
+
+    def fetch(self, ticker, start=None):
+        raise NotImplementedError
+
+    def fetch_many(self, tickers, start=None):
+        """Un appel à fetch par ticker (à remplacer si la source sait grouper)"""
+        frames = {}
+        for ticker in tickers:
+            data = self.fetch(ticker, start)
+            if data is not None and not data.empty:
+                frames[ticker] = data
+        return frames
+
+    def lookup(self, ticker):
+        raise NotImplementedError
+
+
+class NegativeCache:
+    """Symboles sans données, oubliés après ttl secondes (thread-safe)"""
+
+    def __init__(self, ttl=NEGATIVE_CACHE_TTL):
+        self.ttl = ttl
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def add(self, ticker):
+        if self.ttl > 0:
+            with self._lock:
+                self._expires[ticker] = time.monotonic() + self.ttl
+
+    def __contains__(self, ticker):
+        with self._lock:
+            expires_at = self._expires.get(ticker)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._expires[ticker]
+                return False
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._expires.clear()
+
+
+# ========================================
+# YFINANCE
+# ========================================
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Yahoo Finance via yfinance (importé au premier téléchargement).
+    Historique complet : period='max', puis replis sur 20 et 5 ans, le
+    tout borné par `deadline` secondes au lieu de 3 × timeout.
+    """
+
+    name = 'yfinance'
+
+    def __init__(self, deadline=PROVIDER_DEADLINE, timeout=PROVIDER_TIMEOUT,
+                 pool_size=PROVIDER_POOL_SIZE, negative_ttl=NEGATIVE_CACHE_TTL):
+        self.deadline = deadline
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.unknown = NegativeCache(negative_ttl)
+        self._yf = None
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    def _yfinance(self):
+        """yfinance, importé au premier téléchargement (import lourd)"""
+        if self._yf is None:
+            import yfinance as yf
+            yf.set_tz_cache_location("cache")
+            self._yf = yf
+        return self._yf
+
+    def session(self):
+        """
+        Session HTTP du processus, avec pool de connexions keep-alive.
+        Recréée après un fork : les sockets ne sont pas partagées entre workers.
+        """
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session, self._session_pid = session, os.getpid()
+            return self._session
+
+    def _ticker(self, ticker):
+        return self._yfinance().Ticker(ticker, session=self.session())
+
+    def fetch(self, ticker, start=None):
+        ticker_obj = self._ticker(ticker)
+
+        if start is not None:
+            YFINANCE_REQUESTS.inc(kind='history')
+            return ticker_obj.history(start=start, auto_adjust=True, actions=False, timeout=self.timeout)
+
+        if ticker in self.unknown:
+            logger.info(f"🚫 {ticker} sans données récemment, téléchargement évité")
+            return _empty_frame()
+
+        end_date = datetime.now()
+        attempts = [
+            ("period='max'", {'period': 'max'}),
+            ("20 dernières années", {'start': end_date - timedelta(days=365*20), 'end': end_date}),
+            ("5 dernières années", {'start': end_date - timedelta(days=365*5), 'end': end_date}),
+        ]
+        deadline = time.monotonic() + self.deadline
+        data = None
+        for attempt, (label, period) in enumerate(attempts, 1):
+            remaining = deadline - time.monotonic()
+            if remaining < MIN_ATTEMPT_SECONDS:
+                logger.warning(f"⚠️  Budget de {self.deadline:.0f} s épuisé pour {ticker} après {attempt - 1} tentative(s)")
+                break
+            if attempt > 1:
+                YFINANCE_RETRIES.inc()
+            logger.debug(f"Tentative {attempt}: {label}...")
+            YFINANCE_REQUESTS.inc(kind='history')
+            data = ticker_obj.history(auto_adjust=True, actions=False,
+                                      timeout=min(self.timeout, remaining), **period)
+            if _enough(data):
+                return data
+
+        if data is None or data.empty:
+            self.unknown.add(ticker)
+            return _empty_frame()
+        return data
+
+    def fetch_many(self, tickers, start=None):
+        """Téléchargement groupé en un seul appel yfinance"""
+        tickers = [t for t in tickers if start is not None or t not in self.unknown]
+        if not tickers:
+            return {}
+
+        period = {'start': start} if start is not None else {'period': 'max'}
+        YFINANCE_REQUESTS.inc(kind='download')
+        frame = self._yfinance().download(
+            list(tickers),
+            group_by='ticker',
+            auto_adjust=True,
+            actions=False,
+            threads=True,
+            progress=False,
+            timeout=self.timeout,
+            session=self.session(),
+            **period
+        )
+
+        frames = {}
+        for ticker in tickers:
+            if isinstance(frame.columns, pd.MultiIndex):
+                if ticker not in frame.columns.get_level_values(0):
+                    continue
+                data = frame[ticker]
+            elif len(tickers) == 1:
+                data = frame
+            else:
+                continue
+
+            data = data.dropna(how='all')
+            if not data.empty:
+                frames[ticker] = data
+        return frames
+
+    def lookup(self, ticker):
+        """Une requête de 5 jours au lieu de tout l'historique"""
+        if ticker in self.unknown:
+            return None
+
+        ticker_obj = self._ticker(ticker)
+        YFINANCE_REQUESTS.inc(kind='lookup')
+        data = ticker_obj.history(period='5d', auto_adjust=True, actions=False, timeout=self.timeout)
+        if data is None or data.empty:
+            self.unknown.add(ticker)
+            return None
+
+        try:
+            meta = ticker_obj.get_history_metadata() or {}
+        except Exception:
+            meta = {}
+        return {
+            'symbol': ticker,
+            'last_bar': pd.Timestamp(data.index[-1]).strftime('%Y-%m-%d'),
+            'currency': meta.get('currency'),
+            'exchange': meta.get('exchangeName'),
+            'instrument': meta.get('instrumentType'),
+        }
+
+
+# ========================================
+# FICHIERS LOCAUX (CSV / PARQUET)
+# ========================================
+
+class FileProvider(MarketDataProvider):
+    """
+    Un fichier par ticker dans root : <TICKER>.parquet ou <TICKER>.csv,
+    avec une colonne (ou un index) Date et les colonnes OHLCV.
+    Les fichiers lus sont gardés en mémoire tant que leur date de
+    modification ne change pas. Parquet nécessite pyarrow ou fastparquet.
+    """
+
+    name = 'file'
+    EXTENSIONS = ('.parquet', '.csv')
+
+    def __init__(self, root=MARKET_DATA_PATH):
+        self.root = root
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def path(self, ticker):
+        """Chemin du fichier du ticker, ou None (symbole inconnu ou hors motif)"""
+        if not TICKER_PATTERN.match(ticker):
+            return None
+        base = os.path.join(self.root, ticker)
+        for extension in self.EXTENSIONS:
+            if os.path.exists(base + extension):
+                return base + extension
+        return None
+
+    def _read(self, path):
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path)
+        if 'Date' in frame.columns:
+            frame = frame.set_index('Date')
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.index), name='Date').tz_localize(None)
+        frame = frame.sort_index()
+
+        with self._lock:
+            self._frames[path] = (mtime, frame)
+        return frame
+
+    def fetch(self, ticker, start=None):
+        path = self.path(ticker)
+        if path is None:
+            return _empty_frame()
+        frame = self._read(path)
+        return frame if start is None else frame[frame.index >= pd.Timestamp(start)]
+
+    def lookup(self, ticker):
+        path = self.path(ticker)
+        return None if path is None else {'symbol': ticker, 'path': path}
+
+
+# ========================================
+# INSTANCE PARTAGÉE
+# ========================================
+
+PROVIDERS = {'yfinance': YFinanceProvider, 'file': FileProvider}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def create_provider(name=MARKET_DATA_PROVIDER):
+    if name not in PROVIDERS:
+        raise ValueError(f"Fournisseur inconnu '{name}' (valeurs possibles : {', '.join(PROVIDERS)})")
+    return PROVIDERS[name]()
+
+
+def get_provider():
+    """Retourne le fournisseur partagé (créé au premier appel)"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider()
+    return _provider
+
+
+def set_provider(provider):
+    """Remplace le fournisseur partagé (tests, données hors ligne)"""
+    global _provider
+    _provider = provider
@@ -0,0 +1,142 @@
+"""
+Cache des résultats d'analyse
+LRU en mémoire avec expiration (TTL) et plafond mémoire.
+Les valeurs sont les réponses JSON déjà sérialisées ; leurs variantes
+compressées (gzip, brotli) sont gardées avec l'entrée.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from observability import CACHE_REQUESTS
+from serialization import compress
+
+DEFAULT_TTL = int(os.environ.get('RESULT_CACHE_TTL', 900))
+DEFAULT_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 128))
+DEFAULT_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+
+class ResultCache:
+    """
+    Cache LRU thread-safe.
+    Une entrée est évincée quand elle expire, quand le nombre d'entrées
+    dépasse max_entries ou quand la taille totale dépasse max_bytes
+    (variantes compressées comprises).
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clé -> (expiration, taille, valeur, {encodage: bytes})
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Retourne la valeur en cache ou None (entrée absente ou expirée)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache='result', result='miss')
+                return None
+
+            expires_at, _, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache='result', result='miss')
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache='result', result='hit')
+            return value
+
+    def set(self, key, value):
+        """Ajoute une valeur (str ou bytes) et évince les plus anciennes si besoin"""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl, size, value, {})
+            self._bytes += size
+            self._evict()
+
+    def get_encoded(self, key, encoding):
+        """
+        Corps compressé (bytes) d'une entrée pour `encoding` ('gzip', 'br'),
+        ou None si l'entrée est absente ou expirée. La compression n'a lieu
+        qu'au premier appel par encodage ; les suivants servent les octets gardés.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+
+            body = entry[3].get(encoding)
+            if body is not None:
+                self._entries.move_to_end(key)
+                CACHE_REQUESTS.inc(cache='result_encoded', result='hit')
+                return body
+            value = entry[2]
+
+        # Hors verrou : ~40 ms pour 2 Mo en gzip niveau 1
+        CACHE_REQUESTS.inc(cache='result_encoded', result='miss')
+        body = compress(value.encode() if isinstance(value, str) else value, encoding)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is value and encoding not in entry[3]:
+                expires_at, size, _, encoded = entry
+                encoded[encoding] = body
+                self._entries[key] = (expires_at, size + len(body), value, encoded)
+                self._bytes += len(body)
+                self._evict()
+        return body
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+
+# ========================================
+# INSTANCE PARTAGÉE
+# ========================================
+
+_cache = None
+
+
+def get_result_cache():
+    """Retourne le cache partagé (créé au premier appel)"""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
@@ -0,0 +1,66 @@
+"""
+Sérialisation et compression des réponses d'analyse
+Les figures restent des dicts Python (avec tableaux NumPy) jusqu'à la
+réponse finale, encodée une seule fois puis compressée (gzip / brotli).
+"""
+
+import gzip
+import os
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import orjson  # noqa: F401
+    JSON_ENGINE = 'orjson'
+except ImportError:
+    JSON_ENGINE = 'json'
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Niveau de compression gzip (1 = rapide, 9 = compact) et qualité brotli (0-11).
+# Sur ~2 Mo de JSON, le niveau 1 réduit déjà la taille de 60 % en ~40 ms ;
+# les niveaux élevés gagnent ~10 % de plus pour 3 à 20 fois plus de CPU.
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 1))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 4))
+
+# En dessous de cette taille, la compression ne vaut pas son coût
+MIN_COMPRESS_SIZE = 1024
+
+
+def dumps(obj):
+    """
+    Encode en JSON un résultat contenant des figures Plotly, des tableaux
+    NumPy ou des Series pandas (NaN → null), en une seule passe.
+    """
+    import plotly.io.json as plotly_json
+    return plotly_json.to_json_plotly(obj, engine=JSON_ENGINE)
+
+
+def choose_encoding(accept_encodings):
+    """
+    Encodage supporté ('br', 'gzip') de plus haute qualité pour le client,
+    ou None. accept_encodings : request.accept_encodings, ou l'en-tête
+    Accept-Encoding brut. q=0 refuse un encodage ; à qualité égale,
+    brotli est préféré.
+    """
+    if accept_encodings is None or isinstance(accept_encodings, str):
+        accept_encodings = parse_accept_header(accept_encodings)
+
+    best, best_quality = None, 0
+    for encoding in ('br', 'gzip') if brotli is not None else ('gzip',):
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body, encoding):
+    """Compresse un corps de réponse (bytes) selon l'encodage choisi"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
@@ -0,0 +1,64 @@
+"""
+Coalescence des appels concurrents ("single-flight")
+Quand plusieurs threads demandent le même calcul en même temps,
+un seul l'exécute et les autres attendent puis partagent son résultat.
+"""
+
+import threading
+
+
+class _Call:
+    """Calcul en cours pour une clé"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Groupe de calculs dédupliqués par clé"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Exécute fn(*args, **kwargs) sauf si un calcul pour key est déjà en cours,
+        auquel cas attend sa fin. Retourne (résultat, partagé).
+        Une exception du calcul est relancée chez tous les appelants.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self):
+        """Nombre de calculs en cours"""
+        with self._lock:
+            return len(self._calls)
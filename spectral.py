@@ -0,0 +1,111 @@
+"""
+Analyse spectrale des rendements
+- spectre moyenné (Welch, ou périodogramme si l'historique est court),
+  FFT réelle sur une longueur rapide (next_fast_len)
+- pics dominants : maxima locaux, top-k par argpartition, interpolation parabolique
+- spectre glissant (STFT) pour la carte temps-fréquence « corona »
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import next_fast_len, rfft, rfftfreq
+from scipy.signal import get_window, periodogram, welch
+
+# Bande de périodes étudiée (jours)
+MIN_PERIOD = 2
+MAX_PERIOD = 500
+
+# Longueur des segments de Welch : assez longue pour résoudre MAX_PERIOD
+WELCH_SEGMENT = 1024
+
+# Spectre glissant : fenêtre, pas minimal (≈ 1 mois), nombre maximal de
+# fenêtres (le pas s'allonge sur les longs historiques) et bande affichée
+STFT_WINDOW = 512
+STFT_STEP = 21
+STFT_MAX_FRAMES = 300
+CORONA_MIN_PERIOD = 10
+CORONA_MAX_PERIOD = 250
+
+# Dynamique de la corona (dB sous le maximum de chaque colonne)
+CORONA_FLOOR_DB = -20
+
+
+def power_spectrum(returns, segment=WELCH_SEGMENT):
+    """
+    Densité spectrale de puissance des rendements (fréquences en cycles/jour).
+    Welch (segments de `segment` jours, recouvrement 50 %, fenêtre de Hann)
+    dès que l'historique couvre deux segments ; périodogramme sinon.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    n = len(x)
+
+    if n >= 2 * segment:
+        return welch(x, window='hann', nperseg=segment, nfft=next_fast_len(segment),
+                     detrend='constant', scaling='spectrum')
+    return periodogram(x, window='hann', nfft=next_fast_len(n),
+                       detrend='constant', scaling='spectrum')
+
+
+def top_peaks(freqs, power, k=5, min_period=MIN_PERIOD, max_period=MAX_PERIOD):
+    """
+    k pics les plus puissants dans la bande de périodes : maxima locaux
+    sélectionnés par argpartition (sans trier tout le spectre), puis
+    position et hauteur affinées par interpolation parabolique.
+    Retourne (périodes, puissances) triées par puissance décroissante.
+    """
+    freqs = np.asarray(freqs, dtype=np.float64)
+    power = np.asarray(power, dtype=np.float64)
+    if len(power) < 3:
+        return np.array([]), np.array([])
+
+    center = power[1:-1]
+    is_peak = (center > power[:-2]) & (center >= power[2:])
+    in_band = (freqs[1:-1] >= 1 / max_period) & (freqs[1:-1] <= 1 / min_period)
+    candidates = np.flatnonzero(is_peak & in_band) + 1
+    if len(candidates) == 0:
+        return np.array([]), np.array([])
+
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(power[candidates], -k)[-k:]]
+    candidates = candidates[np.argsort(power[candidates])[::-1]]
+
+    left, mid, right = power[candidates - 1], power[candidates], power[candidates + 1]
+    curvature = left - 2 * mid + right
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = np.where(curvature != 0, 0.5 * (left - right) / curvature, 0.0)
+    delta = np.clip(delta, -0.5, 0.5)
+
+    step = freqs[1] - freqs[0]
+    peak_freqs = freqs[candidates] + delta * step
+    peak_powers = mid - 0.25 * (left - right) * delta
+    return 1 / peak_freqs, peak_powers
+
+
+def sliding_spectrum(returns, window=STFT_WINDOW, step=STFT_STEP, max_frames=STFT_MAX_FRAMES,
+                     min_period=CORONA_MIN_PERIOD, max_period=CORONA_MAX_PERIOD):
+    """
+    Spectre à court terme : FFT réelle de chaque fenêtre glissante (vue sans
+    copie, fenêtre de Hann), restreint à la bande de périodes.
+    Retourne (fins de fenêtre, périodes, puissances [fenêtres × périodes]).
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    window = min(window, len(x))
+    step = max(step, -(-(len(x) - window + 1) // max_frames))
+    frames = sliding_window_view(x, window)[::step]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+
+    nfft = next_fast_len(window)
+    spectra = np.abs(rfft(frames * get_window('hann', window), n=nfft, axis=1)) ** 2
+    freqs = rfftfreq(nfft)
+
+    band = (freqs >= 1 / max_period) & (freqs <= 1 / min_period)
+    ends = np.arange(window - 1, len(x), step)
+    return ends, 1 / freqs[band], spectra[:, band]
+
+
+def corona_levels(power, floor_db=CORONA_FLOOR_DB):
+    """Puissance de chaque fenêtre en dB sous son maximum, bornée à floor_db (0,1 dB près)"""
+    peak = power.max(axis=1, keepdims=True)
+    with np.errstate(divide='ignore'):
+        levels = 10 * np.log10(power / np.where(peak > 0, peak, 1))
+    return np.round(np.clip(levels, floor_db, 0), 1)
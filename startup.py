@@ -0,0 +1,146 @@
+"""
+Démarrage des workers avec la pile d'analyse préchargée
+warm_up() importe les modules d'analyse et exécute les étapes sur une
+petite série synthétique, ce qui déclenche aussi les imports différés
+(validateurs plotly, statsmodels pour la STL, orjson). Appelée une fois
+dans le master gunicorn (gunicorn.conf.py) avant le fork : les workers,
+y compris ceux relancés après max_requests, héritent des modules en
+copie sur écriture au lieu de les réimporter.
+
+Benchmark du temps jusqu'à la première analyse : python startup.py
+"""
+
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# 'full' : toutes les étapes (STL comprise), 'stats' : statistiques seules
+# (statsmodels reste différé jusqu'à la première décomposition), 'off'
+PRELOAD_ANALYSIS = os.environ.get('PRELOAD_ANALYSIS', 'full')
+
+WARM_UP_BARS = 600
+
+
+def _synthetic_prices(n=WARM_UP_BARS, seed=0):
+    import numpy as np
+    from price_series import PriceSeries
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return PriceSeries(np.arange(n) + 15000, close, np.full(n, 1000.0))
+
+
+def warm_up(mode=None):
+    """
+    Précharge la pile d'analyse dans le processus courant, sans ticker :
+    ni store, ni état de volatilité, ni pool d'exécution ne sont touchés.
+    Retourne la durée (s).
+    """
+    mode = mode or PRELOAD_ANALYSIS
+    if mode == 'off':
+        return 0.0
+
+    start = time.perf_counter()
+    import analysis
+    from features import FeatureFrame
+    from serialization import dumps
+
+    prices = _synthetic_prices()
+    if mode == 'full':
+        features = FeatureFrame(prices)
+        dumps([
+            analysis.run_stage(stage['name'], prices, None, features=features)
+            for stage in analysis.ANALYSIS_STAGES
+        ])
+        analysis.get_decomposition_cache().clear()
+    else:
+        dumps(analysis.compute_market_stats(prices))
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"🔥 Pile d'analyse préchargée ({mode}) en {elapsed:.2f} s")
+    return elapsed
+
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def _first_analysis(bars=5000):
+    """Durée (s) de la première analyse complète d'un ticker (store synthétique)"""
+    import contextlib
+    import io
+    import tempfile
+
+    import pandas as pd
+
+    import price_store
+    import volatility
+    from analysis import analyze_market_cycles
+
+    prices = _synthetic_prices(bars, seed=1)
+    history = pd.DataFrame({'Close': prices.close, 'Volume': prices.volume},
+                           index=pd.DatetimeIndex(prices.dates))
+    tmp = tempfile.mkdtemp()
+    price_store.set_price_store(price_store.PriceStore(
+        os.path.join(tmp, 'prices.db'), fetcher=lambda ticker, start=None: history
+    ))
+    volatility.set_volatility_store(volatility.VolatilityStateStore(os.path.join(tmp, 'volatility.db')))
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = analyze_market_cycles('SYNTH', executor='serial')
+    assert result.get('success')
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    import json
+    import subprocess
+    import sys
+
+    if sys.argv[1:] == ['--cold']:
+        # Worker sans préchargement : imports au premier appel de /analyze
+        start = time.perf_counter()
+        import app  # noqa: F401
+        import analysis  # noqa: F401
+        imports = time.perf_counter() - start
+        print(json.dumps({'imports': imports, 'first': _first_analysis()}))
+        sys.exit(0)
+
+    print("=" * 60)
+    print("⏱️  BENCHMARK DÉMARRAGE (temps jusqu'à la première analyse)")
+    print("=" * 60)
+
+    runs = 3
+    cold = [
+        json.loads(subprocess.run([sys.executable, __file__, '--cold'], capture_output=True,
+                                  text=True, check=True).stdout.splitlines()[-1])
+        for _ in range(runs)
+    ]
+    cold_total = sorted(c['imports'] + c['first'] for c in cold)[runs // 2]
+    print(f"\n❄️  Sans préchargement (médiane de {runs})")
+    print(f"   imports        : {sorted(c['imports'] for c in cold)[runs // 2]:6.2f} s")
+    print(f"   1re analyse    : {cold_total:6.2f} s (imports compris)")
+
+    # Master gunicorn simulé : préchargement puis fork d'un worker par mesure
+    import app  # noqa: F401
+    preload = warm_up('full')
+    warm = []
+    for _ in range(runs):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            os.write(write_fd, str(_first_analysis()).encode())
+            os._exit(0)
+        os.close(write_fd)
+        warm.append(float(os.read(read_fd, 64)))
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+    warm_first = sorted(warm)[runs // 2]
+    print(f"\n🔥 Préchargé dans le master (médiane de {runs})")
+    print(f"   préchargement  : {preload:6.2f} s (une fois, avant le fork)")
+    print(f"   1re analyse    : {warm_first:6.2f} s (worker forké)")
+    print(f"\n   Gain par worker : {cold_total - warm_first:.2f} s")
@@ -0,0 +1,74 @@
+"""
+Cours OHLCV synthétiques et déterministes (sans réseau)
+Mouvement brownien géométrique auquel s'ajoutent des cycles sinusoïdaux
+sur le log-prix (Kitchin, annuel, trimestriel par défaut) : les étapes
+d'analyse trouvent de vrais cycles à détecter. Même (barres, graine) →
+même série, d'une machine à l'autre.
+
+Utilisé par le benchmark (benchmark.py) et comme fetcher hors ligne du store.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Dernière barre des séries générées
+SYNTHETIC_END = '2024-12-31'
+
+# Au-delà, les jours ouvrés remonteraient avant 1677 (limite des Timestamp
+# pandas) : calendrier quotidien
+MAX_BUSINESS_BARS = 80_000
+
+# (longueur en barres, amplitude sur le log-prix)
+DEFAULT_CYCLES = ((894, 0.08), (252, 0.03), (63, 0.015))
+
+
+def synthetic_ohlcv(bars, seed=0, cycles=DEFAULT_CYCLES, drift=0.07, volatility=0.2, start_price=100.0):
+    """
+    DataFrame indexé par 'Date' (colonnes Open/High/Low/Close/Volume),
+    au format des fetchers du store. drift et volatility sont annualisés.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1 / 252
+    t = np.arange(bars)
+
+    log_returns = (drift - volatility ** 2 / 2) * dt + volatility * np.sqrt(dt) * rng.standard_normal(bars)
+    log_close = np.log(start_price) + np.cumsum(log_returns)
+    for length, amplitude in cycles:
+        log_close += amplitude * np.sin(2 * np.pi * t / length + rng.uniform(0, 2 * np.pi))
+    close = np.exp(log_close)
+
+    # Ouverture proche de la clôture de la veille, mèches au-delà du corps
+    open_ = np.exp(np.r_[log_close[0], log_close[:-1]] + rng.normal(0, 0.002, bars))
+    wick = np.abs(rng.normal(0, 0.005, (2, bars)))
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+    volume = np.round(rng.lognormal(13, 0.5, bars) * (1 + 20 * np.abs(log_returns)))
+
+    freq = 'B' if bars <= MAX_BUSINESS_BARS else 'D'
+    dates = pd.date_range(end=SYNTHETIC_END, periods=bars, freq=freq, name='Date')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                        index=dates)
+
+
+def ticker_seed(ticker):
+    """Graine stable d'un ticker (indépendante de PYTHONHASHSEED)"""
+    return zlib.crc32(ticker.upper().encode())
+
+
+def synthetic_fetcher(bars=5000, seed=None):
+    """
+    Fetcher hors ligne pour PriceStore : fetcher(ticker, start=None).
+    Une série par ticker (graine dérivée du symbole, sauf seed imposée),
+    générée une fois puis découpée depuis start.
+    """
+    frames = {}
+
+    def fetch(ticker, start=None):
+        if ticker not in frames:
+            frames[ticker] = synthetic_ohlcv(bars, ticker_seed(ticker) if seed is None else seed)
+        frame = frames[ticker]
+        return frame if start is None else frame[frame.index >= pd.Timestamp(start)]
+
+    return fetch
@@ -95,6 +95,1122 @@ def test_analysis():
         return False
 
 
+def test_price_store():
+    """Teste le store local avec un fetcher factice (sans réseau)"""
+    print("🔍 Test du store de cours...")
+    
+    try:
+        import tempfile
+        import os
+        import pandas as pd
+        import numpy as np
+        from price_store import PriceStore
+        
+        dates = pd.bdate_range('2020-01-01', periods=300)
+        history = pd.DataFrame({
+            'Open': np.linspace(100, 200, 300),
+            'High': np.linspace(101, 201, 300),
+            'Low': np.linspace(99, 199, 300),
+            'Close': np.linspace(100, 200, 300),
+            'Volume': np.full(300, 1000.0)
+        }, index=dates)
+        calls = []
+        
+        def fake_fetcher(ticker, start=None):
+            calls.append(start)
+            if start is None:
+                return history.iloc[:250]
+            return history[history.index >= pd.Timestamp(start)]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PriceStore(os.path.join(tmp, 'prices.db'), fetcher=fake_fetcher, refresh_interval=0)
+            
+            first = store.get('test')
+            assert len(first) == 250 and calls == [None]
+            print("  ✅ Historique complet au premier appel")
+            
+            second = store.get('TEST')
+            assert len(second) == 300
+            assert calls[1] == '2020-12-15'
+            print("  ✅ Seule la fin de série est téléchargée ensuite")
+            
+            store.refresh_interval = 3600
+            store.get('TEST')
+            assert len(calls) == 2
+            print("  ✅ Ticker récent servi sans téléchargement")
+        
+        print("✅ Store de cours fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_providers():
+    """Teste les fournisseurs de cours (fichiers locaux, budget yfinance, cache négatif)"""
+    print("🔍 Test des fournisseurs de cours...")
+    
+    try:
+        import os
+        import tempfile
+        import time
+        from providers import FileProvider, YFinanceProvider
+        from price_store import PriceStore, set_price_store, get_price_store
+        from analysis import validate_ticker
+        from synthetic import synthetic_ohlcv
+        
+        tmp = tempfile.mkdtemp()
+        synthetic_ohlcv(300, seed=1).reset_index().to_csv(os.path.join(tmp, 'CSVT.csv'), index=False)
+        provider = FileProvider(tmp)
+        assert len(provider.fetch('CSVT')) == 300 and provider.fetch('NOPE').empty
+        assert provider.path('../CSVT') is None and provider.fetch('../' + os.path.basename(tmp) + '/CSVT').empty
+        assert len(provider.fetch('CSVT', start=str(provider.fetch('CSVT').index[-5].date()))) == 5
+        
+        previous = get_price_store()
+        store = PriceStore(os.path.join(tmp, 'prices.db'), provider=provider)
+        set_price_store(store)
+        try:
+            assert validate_ticker('csvt') and not validate_ticker('NOPE')
+            assert store.last_bar_date('CSVT') is None
+            assert len(store.get_series('CSVT')) == 300
+        finally:
+            set_price_store(previous)
+        print("  ✅ Fournisseur CSV hors ligne, validation sans téléchargement")
+        
+        calls = []
+        
+        class FakeTicker:
+            def __init__(self, ticker, session=None):
+                self.session = session
+            
+            def history(self, timeout=10, **options):
+                calls.append((self.session, timeout))
+                time.sleep(min(timeout, 0.3))
+                return synthetic_ohlcv(300).iloc[:0]
+        
+        class FakeYFinance:
+            Ticker = FakeTicker
+        
+        yf_provider = YFinanceProvider(deadline=1.5)
+        yf_provider._yf = FakeYFinance
+        assert yf_provider.fetch('BAD').empty
+        assert len(calls) == 2 and all(session is yf_provider.session() for session, _ in calls)
+        assert all(timeout <= 1.5 for _, timeout in calls)
+        assert yf_provider.fetch('BAD').empty and yf_provider.lookup('BAD') is None
+        assert len(calls) == 2
+        print("  ✅ Replis bornés par le budget de temps, session partagée")
+        print("  ✅ Symbole inconnu mémorisé (aucun nouvel appel)")
+        
+        print("✅ Fournisseurs de cours fonctionnels\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_price_archive():
+    """Teste l'archive mmap des séries (ajout, réajustement, cohérence)"""
+    print("🔍 Test de l'archive des cours...")
+    
+    try:
+        import tempfile
+        import os
+        import numpy as np
+        import pandas as pd
+        from price_store import PriceStore
+        
+        rng = np.random.default_rng(3)
+        dates = pd.bdate_range('2015-01-01', periods=600)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        history = pd.DataFrame({
+            'Open': close, 'High': close, 'Low': close, 'Close': close,
+            'Volume': np.full(len(dates), 1000.0)
+        }, index=dates)
+        source = {'history': history.iloc[:-10]}
+        
+        def fetcher(ticker, start=None):
+            data = source['history']
+            return data if start is None else data[data.index >= pd.Timestamp(start)]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PriceStore(os.path.join(tmp, 'prices.db'), fetcher=fetcher, refresh_interval=0)
+            
+            prices = store.get_series('ARCH')
+            assert len(prices) == 590 and not prices.close.flags.owndata
+            assert np.allclose(prices.close, close[:-10])
+            print("  ✅ Série ouverte en mmap depuis l'archive")
+            
+            source['history'] = history
+            prices = store.get_series('ARCH')
+            assert store.archive.read_index('ARCH')['count'] == 600
+            assert np.allclose(prices.close, close)
+            print("  ✅ Nouvelles barres ajoutées à l'archive")
+            
+            rewrites = []
+            write = store.archive.write
+            store.archive.write = lambda ticker, series: rewrites.append(ticker) or write(ticker, series)
+            for move in (1.02, 0.97):
+                before = store.get_series('ARCH')
+                last_close = float(before.close[-1])
+                revised = history.copy()
+                revised.iloc[-1] *= move
+                source['history'] = revised
+                prices = store.get_series('ARCH')
+                assert prices.close[-1] == revised['Close'].iloc[-1] and len(prices) == 600
+                assert before.close[-1] == last_close
+            assert rewrites == [] and np.allclose(prices.close[:-1], close[:-1])
+            print("  ✅ Barre en cours remplacée sans reconstruction ni changer les séries ouvertes")
+            
+            source['history'] = history * 0.9
+            prices = store.get_series('ARCH')
+            assert np.allclose(prices.close, close * 0.9) and rewrites == ['ARCH']
+            print("  ✅ Archive reconstruite après réajustement des cours")
+            
+            for ticker in ('../ARCH', 'A/B', '.', ''):
+                try:
+                    store.archive.write(ticker, prices)
+                    raise AssertionError(f"symbole accepté : {ticker!r}")
+                except ValueError:
+                    pass
+            assert store.archive.open('../ARCH') is None
+            print("  ✅ Symboles hors motif refusés (pas de chemin hors de l'archive)")
+            
+            with open(os.path.join(tmp, 'archive', 'ARCH', 'close.bin'), 'r+b') as handle:
+                handle.truncate(100)
+            assert store.archive.open('ARCH') is None
+            assert np.allclose(store.get_series('ARCH').close, close * 0.9)
+            print("  ✅ Archive tronquée détectée puis reconstruite")
+        
+        print("✅ Archive des cours fonctionnelle\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_result_cache():
+    """Teste le cache LRU des résultats (TTL, éviction, plafond mémoire)"""
+    print("🔍 Test du cache de résultats...")
+    
+    try:
+        import time
+        from result_cache import ResultCache
+        
+        cache = ResultCache(ttl=60, max_entries=2, max_bytes=10)
+        cache.set('a', 'xxx')
+        cache.set('b', 'yyy')
+        cache.get('a')
+        cache.set('c', 'zzz')
+        assert cache.get('b') is None and cache.get('a') == 'xxx'
+        print("  ✅ Éviction LRU")
+        
+        cache.set('d', 'dddddddd')
+        assert cache.size_bytes <= 10 and cache.get('d') == 'dddddddd'
+        print("  ✅ Plafond mémoire respecté")
+        
+        cache.ttl = 0
+        cache.set('e', 'e')
+        time.sleep(0.01)
+        assert cache.get('e') is None
+        print("  ✅ Expiration TTL")
+        
+        import gzip
+        from unittest import mock
+        import result_cache
+        
+        cache = ResultCache(ttl=60, max_entries=2, max_bytes=10_000)
+        cache.set('a', '{"x":1}' * 200)
+        with mock.patch.object(result_cache, 'compress', wraps=result_cache.compress) as spy:
+            body = cache.get_encoded('a', 'gzip')
+            assert cache.get_encoded('a', 'gzip') is body and spy.call_count == 1
+        assert gzip.decompress(body).decode() == cache.get('a')
+        assert cache.size_bytes == 1400 + len(body)
+        assert cache.get_encoded('absent', 'gzip') is None
+        print("  ✅ Variante compressée gardée avec l'entrée (une seule compression)")
+        
+        print("✅ Cache de résultats fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_singleflight():
+    """Teste la coalescence des appels concurrents"""
+    print("🔍 Test du single-flight...")
+    
+    try:
+        import threading
+        import time
+        from singleflight import SingleFlight
+        
+        group = SingleFlight()
+        calls = []
+        results = []
+        
+        def slow_analysis(ticker):
+            calls.append(ticker)
+            time.sleep(0.2)
+            return f"résultat {ticker}"
+        
+        def worker():
+            results.append(group.do('AAPL', slow_analysis, 'AAPL'))
+        
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert len(calls) == 1
+        assert all(r[0] == 'résultat AAPL' for r in results)
+        assert sum(1 for r in results if not r[1]) == 1
+        assert group.in_flight() == 0
+        print("  ✅ 5 requêtes simultanées → 1 seul calcul")
+        
+        print("✅ Single-flight fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_analysis_executor():
+    """Teste que les modes série et thread produisent la même analyse (hors ligne)"""
+    print("🔍 Test des modes d'exécution de l'analyse...")
+    
+    try:
+        import tempfile
+        import os
+        import json
+        import pandas as pd
+        import numpy as np
+        import logging
+        import price_store
+        import volatility
+        from analysis import analyze_market_cycles, analyze_market_stats
+        from serialization import dumps
+        
+        rng = np.random.default_rng(42)
+        dates = pd.bdate_range('2010-01-01', periods=2000)
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates))))
+        history = pd.DataFrame({
+            'Open': close, 'High': close, 'Low': close, 'Close': close,
+            'Volume': np.full(len(dates), 1000.0)
+        }, index=dates)
+        
+        previous = price_store.get_price_store()
+        previous_volatility = volatility.get_volatility_store()
+        with tempfile.TemporaryDirectory() as tmp:
+            volatility.set_volatility_store(volatility.VolatilityStateStore(os.path.join(tmp, 'volatility.db')))
+            price_store.set_price_store(price_store.PriceStore(
+                os.path.join(tmp, 'prices.db'),
+                fetcher=lambda ticker, start=None: history
+            ))
+            try:
+                serial = analyze_market_cycles('SYNTH', executor='serial')
+                threaded = analyze_market_cycles('SYNTH', executor='thread')
+                stats_only = analyze_market_stats('SYNTH')
+                
+                warnings = []
+                handler = logging.Handler(logging.WARNING)
+                handler.emit = lambda record: warnings.append(record.getMessage())
+                logging.getLogger('analysis').addHandler(handler)
+                try:
+                    long_cycle = analyze_market_stats('SYNTH', cycles=[2500])
+                finally:
+                    logging.getLogger('analysis').removeHandler(handler)
+            finally:
+                price_store.set_price_store(previous)
+                volatility.set_volatility_store(previous_volatility)
+        
+        assert serial.get('success') and threaded.get('success')
+        assert json.loads(dumps(serial)) == json.loads(dumps(threaded))
+        print("  ✅ Résultats identiques en série et en parallèle")
+        
+        assert 'graphs' not in stats_only
+        for section in ('kitchin', 'annual', 'volatility'):
+            assert stats_only['stats'][section] == serial['stats'][section]
+        assert 'hurst' in stats_only['stats']['hurst']
+        assert len(stats_only['stats']['fft']['dominant_cycles']) == 5
+        print("  ✅ Mode statistiques identique, sans graphiques")
+        
+        assert serial['stats']['history'] == {'bars': 2000, 'window': 894, 'limited': False}
+        assert long_cycle['stats']['history']['limited']
+        assert any('Historique limité' in message for message in warnings)
+        print("  ✅ Historique plus court que le cycle → avertissement et indicateur")
+        
+        print("✅ Modes d'exécution fonctionnels\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_jobs():
+    """Teste la file de jobs asynchrones et la contre-pression"""
+    print("🔍 Test des jobs d'analyse...")
+    
+    try:
+        import json
+        import os
+        import tempfile
+        import threading
+        import time
+        import volatility
+        from jobs import JobManager, MemoryJobBackend, SQLiteJobBackend, JobQueueFull, DONE, FAILED, RUNNING, _new_job
+        
+        # Aucun job ne doit écrire dans le vrai cache/volatility.db
+        previous_volatility = volatility.get_volatility_store()
+        tmp = tempfile.TemporaryDirectory()
+        volatility.set_volatility_store(volatility.VolatilityStateStore(os.path.join(tmp.name, 'volatility.db')))
+        release = threading.Event()
+        
+        def fake_runner(ticker):
+            release.wait(5)
+            return json.dumps({'success': True, 'ticker': ticker}), True, False
+        
+        manager = JobManager(fake_runner, MemoryJobBackend(maxsize=1), workers=1)
+        first = manager.submit('AAPL')
+        while manager.backend.pending():
+            time.sleep(0.01)
+        manager.submit('MSFT')
+        
+        try:
+            manager.submit('TSLA')
+            raise AssertionError("la file aurait dû être pleine")
+        except JobQueueFull:
+            print("  ✅ File pleine → JobQueueFull")
+        
+        release.set()
+        deadline = time.time() + 5
+        while manager.get(first)['status'] != DONE and time.time() < deadline:
+            time.sleep(0.01)
+        assert json.loads(manager.get(first)['payload'])['ticker'] == 'AAPL'
+        print("  ✅ Résultat disponible une fois le job terminé")
+        
+        manager.stop()
+        
+        # Worker mort en plein calcul : le bail expire, le job est repris
+        backend = SQLiteJobBackend(os.path.join(tmp.name, 'jobs.db'), lease=0.1, max_attempts=2)
+        backend.submit(_new_job('AAPL', {}))
+        claimed = backend.claim(timeout=0)
+        assert claimed['status'] == RUNNING and claimed['attempts'] == 1
+        assert backend.claim(timeout=0) is None
+        time.sleep(0.15)
+        reclaimed = backend.claim(timeout=0)
+        assert reclaimed['id'] == claimed['id'] and reclaimed['attempts'] == 2
+        time.sleep(0.15)
+        assert backend.claim(timeout=0) is None
+        assert backend.get(claimed['id'])['status'] == FAILED
+        print("  ✅ Bail expiré → job remis en file, puis en échec après 2 tentatives")
+        
+        # Job plus long que le bail : renouvelé tant que le runner travaille
+        def slow_runner(ticker):
+            time.sleep(0.5)
+            return json.dumps({'success': True, 'ticker': ticker}), True, False
+        
+        manager = JobManager(slow_runner, SQLiteJobBackend(os.path.join(tmp.name, 'lease.db'), lease=0.2), workers=2)
+        slow = manager.submit('MSFT')
+        deadline = time.time() + 5
+        while manager.get(slow)['status'] != DONE and time.time() < deadline:
+            time.sleep(0.02)
+        manager.stop()
+        assert manager.get(slow)['attempts'] == 1
+        print("  ✅ Bail renouvelé pendant un job long (pas de double exécution)")
+        
+        print("✅ Jobs fonctionnels\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+    
+    finally:
+        if 'previous_volatility' in locals():
+            volatility.set_volatility_store(previous_volatility)
+            tmp.cleanup()
+
+
+def test_stream():
+    """Teste que les flux SSE simultanés partagent un seul calcul via les jobs"""
+    print("🔍 Test du streaming d'analyse...")
+    
+    try:
+        import tempfile
+        import os
+        import threading
+        import analysis
+        import jobs
+        import price_store
+        import volatility
+        from synthetic import synthetic_fetcher
+        
+        runs = []
+        iter_stages = analysis.iter_analysis_stages
+        
+        def counting_stages(*args, **kwargs):
+            runs.append(args[1])
+            yield from iter_stages(*args, **kwargs)
+        
+        previous = price_store.get_price_store()
+        previous_volatility = volatility.get_volatility_store()
+        previous_manager = jobs.get_job_manager()
+        with tempfile.TemporaryDirectory() as tmp:
+            price_store.set_price_store(price_store.PriceStore(
+                os.path.join(tmp, 'prices.db'), fetcher=synthetic_fetcher(1500)
+            ))
+            volatility.set_volatility_store(volatility.VolatilityStateStore(os.path.join(tmp, 'volatility.db')))
+            manager = jobs.JobManager(analysis.analyze_stock_cached, jobs.MemoryJobBackend(), workers=4)
+            jobs.set_job_manager(manager)
+            analysis.iter_analysis_stages = counting_stages
+            try:
+                streams = [None] * 4
+                
+                def consume(i):
+                    streams[i] = list(analysis.stream_analysis('STREAM'))
+                
+                threads = [threading.Thread(target=consume, args=(i,)) for i in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join(60)
+                cached = list(analysis.stream_analysis('STREAM'))
+                
+                pending = list(analysis.stream_analysis('LENT', timeout=0))
+            finally:
+                analysis.iter_analysis_stages = iter_stages
+                manager.stop()  # attend la fin du job 'LENT'
+                jobs.set_job_manager(previous_manager)
+                price_store.set_price_store(previous)
+                volatility.set_volatility_store(previous_volatility)
+        
+        assert runs.count('STREAM') == 1, runs
+        for events in streams + [cached]:
+            names = [event for event, _ in events]
+            assert names == ['stage'] * len(analysis.ANALYSIS_STAGES) + ['summary'], names
+            assert {data['stage'] for _, data in events[:-1]} == set(analysis.STAGES_BY_NAME)
+            assert events[-1][1]['ticker'] == 'STREAM'
+        print("  ✅ 4 flux simultanés → un seul calcul, résultat mis en cache")
+        
+        assert [event for event, _ in pending] == ['pending']
+        assert pending[0][1]['job_id']
+        print("  ✅ Flux trop long → événement 'pending' avec le job à suivre")
+        
+        print("✅ Streaming fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_batch():
+    """Teste l'analyse groupée avec un téléchargement groupé factice"""
+    print("🔍 Test de l'analyse groupée...")
+    
+    try:
+        import tempfile
+        import os
+        import pandas as pd
+        import numpy as np
+        import json
+        import price_store
+        import volatility
+        from batch import analyze_batch, dumps_batch
+        
+        rng = np.random.default_rng(7)
+        dates = pd.bdate_range('2012-01-01', periods=1500)
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, len(dates))))
+        history = pd.DataFrame({
+            'Open': close, 'High': close, 'Low': close, 'Close': close,
+            'Volume': np.full(len(dates), 500.0)
+        }, index=dates)
+        bulk_calls = []
+        
+        def fake_bulk(tickers, start=None):
+            bulk_calls.append(list(tickers))
+            return {t: history for t in tickers if t != 'INCONNU'}
+        
+        previous = price_store.get_price_store()
+        previous_volatility = volatility.get_volatility_store()
+        with tempfile.TemporaryDirectory() as tmp:
+            volatility.set_volatility_store(volatility.VolatilityStateStore(os.path.join(tmp, 'volatility.db')))
+            price_store.set_price_store(price_store.PriceStore(
+                os.path.join(tmp, 'prices.db'),
+                fetcher=lambda ticker, start=None: None,
+                bulk_fetcher=fake_bulk
+            ))
+            try:
+                result = analyze_batch(['aapl', 'msft', 'inconnu'], executor='serial')
+                with_figures = analyze_batch(['aapl', 'inconnu'], figures=True, executor='serial')
+            finally:
+                price_store.set_price_store(previous)
+                volatility.set_volatility_store(previous_volatility)
+        
+        assert bulk_calls == [['AAPL', 'MSFT', 'INCONNU'], ['INCONNU']]
+        print("  ✅ Un seul téléchargement groupé")
+        
+        rows = {row['ticker']: row for row in result['results']}
+        assert rows['AAPL']['success'] and not rows['INCONNU']['success']
+        assert set(rows['MSFT']) >= {'kitchin_day', 'deviation', 'volatility_level', 'dominant_cycles'}
+        print("  ✅ Tableau de statistiques sans graphiques")
+        
+        decoded = json.loads(dumps_batch(with_figures))
+        assert decoded['succeeded'] == 1 and decoded['count'] == 2
+        assert decoded['results'][0]['full_analysis']['graphs']['price_volume']
+        assert json.loads(dumps_batch(result)) == json.loads(json.dumps(result))
+        print("  ✅ Analyses complètes insérées sans décodage ni réencodage")
+        
+        print("✅ Analyse groupée fonctionnelle\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_serialization():
+    """Teste l'encodage JSON en une passe et la compression des réponses"""
+    print("🔍 Test de la sérialisation...")
+    
+    try:
+        import gzip
+        import json
+        import numpy as np
+        from serialization import dumps, choose_encoding, compress
+        
+        body = dumps({'graph': {'x': np.arange(3), 'y': np.array([1.5, np.nan, 2.0])}})
+        assert json.loads(body) == {'graph': {'x': [0, 1, 2], 'y': [1.5, None, 2.0]}}
+        print("  ✅ Tableaux NumPy encodés directement (NaN → null)")
+        
+        assert choose_encoding('gzip, deflate') == 'gzip'
+        assert choose_encoding('identity') is None
+        assert choose_encoding('gzip;q=0') is None
+        assert choose_encoding('gzip;q=0, *;q=0.5') in ('br', None)
+        assert choose_encoding('br;q=0.1, gzip;q=0.9') == 'gzip'
+        assert choose_encoding('*') == choose_encoding('br, gzip')
+        raw = body.encode() * 100
+        assert gzip.decompress(compress(raw, 'gzip')) == raw
+        print("  ✅ Compression gzip, encodage choisi selon les qualités (q=0 respecté)")
+        
+        print("✅ Sérialisation fonctionnelle\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_downsampling():
+    """Teste le sous-échantillonnage LTTB des longues séries"""
+    print("🔍 Test du sous-échantillonnage...")
+    
+    try:
+        import numpy as np
+        from downsampling import lttb_indices, select_points
+        
+        values = np.sin(np.linspace(0, 20, 10000))
+        values[5000] = 10
+        idx = lttb_indices(values, 200)
+        assert len(idx) == 200 and idx[0] == 0 and idx[-1] == 9999
+        assert 5000 in idx
+        print("  ✅ 10 000 → 200 points, pic conservé")
+        
+        mask = np.zeros(10000, dtype=bool)
+        mask[100:150] = True
+        assert list(select_points(values, 2000, mask)) == list(range(100, 150))
+        assert len(select_points(values, 0)) == 10000
+        print("  ✅ Plage de dates en pleine résolution")
+        
+        print("✅ Sous-échantillonnage fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_hurst():
+    """Teste les estimateurs vectorisés du coefficient de Hurst"""
+    print("🔍 Test des estimateurs de Hurst...")
+    
+    try:
+        import numpy as np
+        from hurst import hurst_exponent, rolling_hurst, _legacy_hurst
+        
+        rng = np.random.default_rng(0)
+        log_prices = np.cumsum(rng.normal(0, 0.01, 5000)) + 4.6
+        
+        fast = hurst_exponent(log_prices, 'variance')['hurst']
+        assert abs(fast - _legacy_hurst(log_prices)) < 1e-9
+        print(f"  ✅ Variance des lags identique à la boucle (H={fast:.3f})")
+        
+        for method in ('rs', 'dfa'):
+            h = hurst_exponent(log_prices, method)['hurst']
+            assert 0.35 < h < 0.65, f"{method}: H={h}"
+        print("  ✅ R/S et DFA ≈ 0.5 sur une marche aléatoire")
+        
+        window = 252
+        rolling = rolling_hurst(log_prices, window)
+        lags = np.unique(np.geomspace(2, window // 4, 12).astype(int))
+        segment = log_prices[-window:]
+        tau = [np.std(segment[lag:] - segment[:-lag]) for lag in lags]
+        expected = np.polyfit(np.log(lags), np.log(tau), 1)[0]
+        assert np.isnan(rolling[window - 2]) and abs(rolling[-1] - expected) < 1e-9
+        print("  ✅ Hurst glissant identique au calcul fenêtre par fenêtre")
+        
+        print("✅ Estimateurs de Hurst fonctionnels\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_kitchin_cycle():
+    """Teste le repliement vectorisé des cycles de Kitchin"""
+    print("🔍 Test du cycle de Kitchin...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from analysis import calculate_kitchin_cycle
+        from price_series import PriceSeries
+        
+        n = 894 * 4 + 100
+        close = pd.Series(100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, n))))
+        prices = PriceSeries.from_frame(pd.DataFrame({'Date': pd.date_range('2000-01-01', periods=n),
+                                                      'Close': close}))
+        result = calculate_kitchin_cycle(prices)
+        
+        cycles = [(close.iloc[i:i+894] / close.iloc[i] * 100).values for i in range(0, n - 894, 894)]
+        assert np.allclose(result['avg_cycle'], np.mean(cycles, axis=0))
+        print(f"  ✅ Moyenne identique sur {len(cycles)} cycles")
+        
+        bands = result['bands']
+        assert len(bands['lower']) == 894
+        assert np.all(bands['lower'] <= result['avg_cycle'] + 1e-9)
+        assert np.all(result['avg_cycle'] <= bands['upper'] + 1e-9)
+        print("  ✅ Enveloppe de dispersion autour de la moyenne")
+        
+        from analysis import calculate_cycles
+        from cycles import parse_cycle_lengths
+        
+        assert parse_cycle_lengths('894, 365 365') == (894, 365)
+        for bad in ('abc', '2', ','.join(['30'] * 3 + [str(i) for i in range(40, 50)])):
+            try:
+                parse_cycle_lengths(bad)
+                raise AssertionError(f"'{bad}' accepté")
+            except ValueError:
+                pass
+        
+        from cycles import _default_cycle_lengths
+        assert _default_cycle_lengths('') == _default_cycle_lengths('  ') == (894,)
+        assert _default_cycle_lengths('894 365') == _default_cycle_lengths('894,365') == (894, 365)
+        for bad in ('abc', '2'):
+            try:
+                _default_cycle_lengths(bad)
+                raise AssertionError(f"CYCLE_LENGTHS='{bad}' accepté")
+            except ValueError as e:
+                assert 'CYCLE_LENGTHS invalide' in str(e)
+        print("  ✅ CYCLE_LENGTHS validé comme les longueurs d'une requête")
+        
+        multi = calculate_cycles(prices, '894,365,42')
+        assert list(multi) == [894, 365, 42]
+        assert multi[894]['stats'] == result['stats']
+        single = calculate_cycles(prices, [42])[42]
+        assert np.allclose(multi[42]['avg_cycle'], single['avg_cycle'])
+        print("  ✅ Plusieurs longueurs de cycle en un appel")
+        
+        print("✅ Cycle de Kitchin fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_online_volatility():
+    """Teste la volatilité en ligne et son état persisté par ticker"""
+    print("🔍 Test de la volatilité en ligne...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        import pandas as pd
+        from volatility import OnlineVolatility, VolatilityStateStore
+        
+        n = 3000
+        rng = np.random.default_rng(2)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+        dates = pd.bdate_range('2010-01-01', periods=n)
+        
+        rolling = pd.Series(closes).pct_change().dropna().rolling(30).std() * np.sqrt(252) * 100
+        stats = OnlineVolatility.from_history(dates, closes).stats()
+        assert stats['current_vol'] == round(rolling.iloc[-1], 2)
+        assert stats['mean_vol'] == round(rolling.mean(), 2)
+        assert stats['proj_12m'] == round(rolling.iloc[-60:].mean(), 2)
+        assert abs(stats['median_vol'] - rolling.median()) <= 0.01 * rolling.median()
+        print("  ✅ Statistiques identiques au calcul pandas (médiane à 1 %)")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            store = VolatilityStateStore(f"{tmp}/volatility.db")
+            store.update('TEST', dates[:2000], closes[:2000])
+            engine = store.update('TEST', dates, closes)
+            assert engine.stats() == stats
+            assert store.load('TEST').last_date == dates[-2].isoformat()
+            print("  ✅ Mise à jour incrémentale égale au recalcul complet")
+            
+            # Dernière barre révisée en séance : pas de reconstruction
+            rebuilds = []
+            from_history = OnlineVolatility.from_history
+            OnlineVolatility.from_history = classmethod(
+                lambda cls, *args, **kw: rebuilds.append(1) or from_history(*args, **kw)
+            )
+            try:
+                live = closes.copy()
+                for last in (closes[-1] * 1.01, closes[-1] * 0.98):
+                    live[-1] = last
+                    engine = store.update('TEST', dates, live)
+                    assert engine.last_close == last
+            finally:
+                OnlineVolatility.from_history = from_history
+            assert rebuilds == []
+            assert engine.stats() == OnlineVolatility.from_history(dates, live).stats()
+            print("  ✅ Barre en cours révisée sans reconstruction de l'état")
+            
+            adjusted = closes * 0.97
+            engine = store.update('TEST', dates, adjusted)
+            assert engine.last_close == adjusted[-1]
+            print("  ✅ État reconstruit après réajustement des cours")
+        
+        print("✅ Volatilité en ligne fonctionnelle\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_volatility_outlook():
+    """Teste la structure par terme, l'EWMA et la prévision GARCH(1,1)"""
+    print("🔍 Test des projections de volatilité...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from volatility import (
+            ANNUALIZATION, rolling_volatility, ewma_volatility,
+            garch_forecast, volatility_outlook
+        )
+        
+        # Rendements simulés selon un GARCH(1,1) connu
+        rng = np.random.default_rng(5)
+        omega, alpha, beta = 1e-6, 0.07, 0.91
+        h = omega / (1 - alpha - beta)
+        returns = np.empty(6000)
+        for t in range(len(returns)):
+            returns[t] = np.sqrt(h) * rng.standard_normal()
+            h = omega + alpha * returns[t] ** 2 + beta * h
+        
+        for window in (10, 30, 252):
+            expected = pd.Series(returns).rolling(window).std().values * ANNUALIZATION
+            assert np.allclose(rolling_volatility(returns, window), expected, equal_nan=True)
+        print("  ✅ Fenêtres 10/30/252j identiques à pandas")
+        
+        variance = np.var(returns[:30])
+        for r in returns[:100]:
+            variance = 0.94 * variance + 0.06 * r ** 2
+        assert abs(ewma_volatility(returns)[99] - np.sqrt(variance) * ANNUALIZATION) < 1e-9
+        print("  ✅ EWMA conforme à la récurrence")
+        
+        garch = garch_forecast(returns)
+        assert abs(garch['alpha'] - alpha) < 0.04 and abs(garch['beta'] - beta) < 0.05
+        print(f"  ✅ GARCH(1,1) estimé : alpha={garch['alpha']}, beta={garch['beta']}")
+        
+        outlook = volatility_outlook(returns[:100])
+        assert [t['window'] for t in outlook['term_structure']] == [10, 30, 60, 90]
+        assert outlook['garch'] is None
+        print("  ✅ Historique court : pas de GARCH, fenêtres disponibles seulement")
+        
+        print("✅ Projections de volatilité fonctionnelles\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_spectral():
+    """Teste le moteur spectral (Welch, pics interpolés, spectre glissant)"""
+    print("🔍 Test de l'analyse spectrale...")
+    
+    try:
+        import numpy as np
+        from spectral import power_spectrum, top_peaks, sliding_spectrum, corona_levels
+        
+        rng = np.random.default_rng(0)
+        t = np.arange(12000)
+        returns = rng.normal(0, 0.01, len(t)) + 0.004 * np.sin(2 * np.pi * t / 63) \
+            + 0.003 * np.sin(2 * np.pi * t / 21.5)
+        
+        freqs, power = power_spectrum(returns)
+        periods, powers = top_peaks(freqs, power, k=5)
+        assert len(periods) == 5 and np.all(np.diff(powers) <= 0)
+        assert abs(periods[0] - 63) < 1.5 and abs(periods[1] - 21.5) < 0.5
+        print(f"  ✅ Cycles dominants retrouvés : {periods[0]:.1f}j, {periods[1]:.1f}j")
+        
+        ends, corona_periods, corona_power = sliding_spectrum(returns)
+        assert corona_power.shape == (len(ends), len(corona_periods))
+        assert len(ends) <= 300 and ends[-1] < len(returns)
+        levels = corona_levels(corona_power)
+        assert levels.max() == 0 and levels.min() >= -20
+        print(f"  ✅ Corona : {len(ends)} fenêtres × {len(corona_periods)} périodes")
+        
+        print("✅ Analyse spectrale fonctionnelle\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_decomposition():
+    """Teste la décomposition saisonnière (moyennes mobiles, STL, cache)"""
+    print("🔍 Test de la décomposition saisonnière...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from statsmodels.tsa.seasonal import seasonal_decompose
+        from decomposition import ma_decompose, DecompositionCache
+        
+        rng = np.random.default_rng(0)
+        x = rng.normal(0, 1, 3005) + np.sin(np.arange(3005) * 2 * np.pi / 63)
+        
+        reference = seasonal_decompose(pd.Series(x), model='additive', period=63, extrapolate_trend='freq')
+        fast = ma_decompose(x, 63)
+        for name in ('trend', 'seasonal', 'resid'):
+            assert np.allclose(fast[name], getattr(reference, name).values)
+        print("  ✅ Moyennes mobiles identiques à seasonal_decompose")
+        
+        cache = DecompositionCache()
+        first = cache.get('TEST', '2020-01-01', x[:-5], 63, 'stl')
+        assert cache.get('TEST', '2020-01-01', x[:-5], 63, 'stl') is first
+        updated = cache.get('TEST', '2020-01-08', x, 63, 'stl')
+        assert (cache.misses, cache.hits, cache.tail_updates) == (1, 1, 1)
+        assert len(updated['trend']) == len(x)
+        assert np.array_equal(updated['seasonal'][:2000], first['seasonal'][:2000])
+        assert np.allclose(updated['trend'] + updated['seasonal'] + updated['resid'], x)
+        print("  ✅ STL en cache, seule la fin de série est recalculée")
+        
+        # Barre en cours révisée, avec ou sans nouvelle barre : pas de STL complète
+        revised = x.copy()
+        revised[-1] += 0.5
+        same_day = cache.get('TEST', '2020-01-08', revised, 63, 'stl')
+        next_day = cache.get('TEST', '2020-01-09', np.append(x, 0.1), 63, 'stl')
+        assert (cache.misses, cache.tail_updates) == (1, 3)
+        assert np.allclose(same_day['trend'] + same_day['seasonal'] + same_day['resid'], revised)
+        assert np.allclose(next_day['trend'] + next_day['seasonal'] + next_day['resid'], np.append(x, 0.1))
+        print("  ✅ Dernière barre révisée → fin de série seule recalculée")
+        
+        print("✅ Décomposition fonctionnelle\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_feature_frame():
+    """Teste le FeatureFrame (séries dérivées calculées une fois)"""
+    print("🔍 Test des séries dérivées partagées...")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from features import FeatureFrame
+        from price_series import PriceSeries
+        from analysis import calculate_annual_cycle
+        
+        rng = np.random.default_rng(0)
+        dates = pd.Series(pd.bdate_range('2010-01-01', periods=1500))
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        data = pd.DataFrame({'Date': dates, 'Close': closes})
+        close_prices = pd.Series(closes)
+        prices = PriceSeries.from_frame(data)
+        
+        features = FeatureFrame(prices)
+        assert np.allclose(features.returns, close_prices.pct_change().dropna().values)
+        assert features.returns is features.returns
+        assert features.rolling_volatility(30) is features.rolling_volatility(30)
+        assert np.allclose(features.log_returns, np.diff(np.log(closes)))
+        print("  ✅ Rendements mémorisés et identiques à pct_change")
+        
+        frame = data.assign(Month=dates.dt.month, Year=dates.dt.year,
+                            Returns=close_prices.pct_change() * 100)
+        expected = frame[frame['Year'] >= frame['Year'].max() - 10].groupby('Month')['Returns'].mean()
+        monthly = calculate_annual_cycle(prices, features)['monthly_returns']
+        assert list(monthly.index) == list(expected.index)
+        assert np.allclose(monthly.values, expected.values)
+        print("  ✅ Saisonnalité mensuelle identique, sans copie du DataFrame")
+        
+        print("✅ Séries dérivées fonctionnelles\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_startup():
+    """Teste les imports différés et le préchargement de l'analyse"""
+    print("🔍 Test du démarrage des workers...")
+    
+    try:
+        check = (
+            "import sys, startup, analysis; "
+            "assert 'yfinance' not in sys.modules and 'statsmodels' not in sys.modules; "
+            "startup.warm_up('stats'); "
+            "assert 'statsmodels' not in sys.modules; "
+            "startup.warm_up('full'); "
+            "assert 'statsmodels' in sys.modules"
+        )
+        completed = subprocess.run([sys.executable, '-c', check], capture_output=True, text=True)
+        assert completed.returncode == 0, completed.stderr.strip().splitlines()[-1]
+        print("  ✅ yfinance et statsmodels différés jusqu'à leur premier usage")
+        print("  ✅ Préchargement complet sans ticker ni store")
+        
+        print("✅ Démarrage fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_benchmark():
+    """Teste les cours synthétiques et le benchmark du pipeline"""
+    print("🔍 Test du benchmark...")
+    
+    try:
+        from synthetic import synthetic_ohlcv, synthetic_fetcher
+        from benchmark import bench_size, compare
+        
+        frame = synthetic_ohlcv(2000, seed=3)
+        assert frame.equals(synthetic_ohlcv(2000, seed=3))
+        assert (frame['Low'] <= frame[['Open', 'Close']].min(axis=1)).all()
+        assert (frame['High'] >= frame[['Open', 'Close']].max(axis=1)).all()
+        assert len(synthetic_ohlcv(100_000)) == 100_000
+        fetch = synthetic_fetcher(500)
+        tail = fetch('AAA', start=str(fetch('AAA').index[-10].date()))
+        assert len(tail) == 10 and not fetch('AAA').equals(fetch('BBB'))
+        print("  ✅ Cours synthétiques déterministes et cohérents (OHLC)")
+        
+        report = {'results': {'400': bench_size(400, repeat=1)}}
+        entry = report['results']['400']
+        assert set(entry) == {'stages', 'pipeline', 'stats', 'serialization'}
+        assert all(v['payload_bytes'] > 0 and v['peak_mb'] > 0 for v in entry['stages'].values())
+        serialized = entry['serialization']
+        assert serialized['gzip']['payload_bytes'] < serialized['dumps']['payload_bytes']
+        assert serialized['cached_gzip']['payload_bytes'] == serialized['gzip']['payload_bytes']
+        assert serialized['legacy']['payload_bytes'] > 0
+        assert compare(report, report) == []
+        slower = {'results': {'400': {'pipeline': dict(entry['pipeline'], seconds=entry['pipeline']['seconds'] * 2 + 1)}}}
+        regressions = compare(slower, report)
+        assert [(r['target'], r['metric']) for r in regressions] == [('pipeline', 'seconds')]
+        print("  ✅ Durée, mémoire et taille mesurées ; régression détectée")
+        
+        print("✅ Benchmark fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_metrics():
+    """Teste les métriques Prometheus et le chronométrage des étapes"""
+    print("🔍 Test des métriques...")
+    
+    try:
+        from observability import Registry, STAGE_SECONDS, PROMETHEUS_CONTENT_TYPE
+        from analysis import ANALYSIS_STAGES, iter_analysis_stages
+        from startup import _synthetic_prices
+        
+        registry = Registry()
+        requests_total = registry.counter('test_requests_total', "Requêtes", ('route',))
+        latency = registry.histogram('test_latency_seconds', "Latence", buckets=(0.1, 1))
+        requests_total.inc(route='/a')
+        requests_total.inc(2, route='/a')
+        latency.observe(0.05)
+        latency.observe(0.5)
+        text = registry.render()
+        assert 'test_requests_total{route="/a"} 3' in text
+        assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+        assert 'test_latency_seconds_count 2' in text
+        print("  ✅ Format texte Prometheus (compteurs, histogrammes cumulés)")
+        
+        before = STAGE_SECONDS.snapshot(stage='fft')['count']
+        stages = [name for name, _ in iter_analysis_stages(_synthetic_prices(), None, executor='serial')]
+        assert len(stages) == len(ANALYSIS_STAGES)
+        assert STAGE_SECONDS.snapshot(stage='fft')['count'] == before + 1
+        print("  ✅ Durée de chaque étape enregistrée")
+        
+        from app import app
+        response = app.test_client().get('/metrics')
+        assert response.status_code == 200
+        assert response.headers['Content-Type'] == PROMETHEUS_CONTENT_TYPE
+        assert 'analysis_stage_seconds_bucket{stage="fft"' in response.get_data(as_text=True)
+        print("  ✅ Route /metrics")
+        
+        print("✅ Métriques fonctionnelles\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
+def test_loadtest():
+    """Teste le générateur de charge sur un serveur local (cours synthétiques)"""
+    print("🔍 Test du test de charge...")
+    
+    try:
+        import json
+        import os
+        import tempfile
+        
+        env = dict(os.environ, LOADTEST_DIR=tempfile.mkdtemp(), LOADTEST_BARS='600')
+        completed = subprocess.run(
+            [sys.executable, 'loadtest.py', '-c', '3', '-n', '24', '--users', '3', '--tickers', '2',
+             '--mix', 'dashboard=2,analyze=1,analyze_stats=1'],
+            capture_output=True, text=True, env=env, timeout=300
+        )
+        assert completed.returncode == 0, completed.stderr.strip().splitlines()[-1]
+        report = json.loads(completed.stdout)
+        assert report['total']['requests'] >= 24 and report['total']['errors'] == 0
+        assert set(report['routes']) == {'login', 'dashboard', 'analyze', 'analyze_stats'}
+        assert all(r['p50_ms'] <= r['p95_ms'] <= r['p99_ms'] for r in report['routes'].values())
+        print("  ✅ Utilisateurs connectés, routes sans erreur")
+        print("  ✅ Débit et latences p50/p95/p99 par route")
+        
+        print("✅ Test de charge fonctionnel\n")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Erreur: {e}\n")
+        return False
+
+
 def test_routes():
     """Teste les routes principales"""
     print("🔍 Test des routes Flask...")
@@ -135,6 +1251,28 @@ def main():
         test_imports(),
         test_database(),
         test_analysis(),
+        test_price_store(),
+        test_providers(),
+        test_price_archive(),
+        test_result_cache(),
+        test_singleflight(),
+        test_analysis_executor(),
+        test_jobs(),
+        test_stream(),
+        test_batch(),
+        test_serialization(),
+        test_downsampling(),
+        test_hurst(),
+        test_kitchin_cycle(),
+        test_online_volatility(),
+        test_volatility_outlook(),
+        test_spectral(),
+        test_decomposition(),
+        test_feature_frame(),
+        test_startup(),
+        test_metrics(),
+        test_benchmark(),
+        test_loadtest(),
         test_routes()
     ]
     
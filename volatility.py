@@ -0,0 +1,502 @@
+"""
+Volatilité glissante en ligne
+L'état (fenêtre de rendements, variance de Welford, sketch de quantiles)
+est persisté par ticker : à l'arrivée de nouvelles barres, volatilité
+courante, médiane, moyenne et projection se mettent à jour en O(nouvelles barres).
+Structure par terme, EWMA et GARCH(1,1) partagent un seul tableau de rendements.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = os.environ.get('VOL_STATE_PATH', os.path.join('cache', 'volatility.db'))
+
+VOL_WINDOW = 30
+PROJECTION_WINDOW = 60
+ANNUALIZATION = math.sqrt(252) * 100
+
+# Précision relative du sketch de quantiles (médiane à ±0,5 %)
+SKETCH_ACCURACY = 0.005
+
+# Écart relatif toléré sur la dernière clôture connue avant reconstruction
+# (cours ajustés rétroactivement après un dividende ou un split)
+STATE_TOLERANCE = 1e-6
+
+
+def volatility_label(current_vol, median_vol):
+    """Niveau de la volatilité courante par rapport à sa médiane historique"""
+    if current_vol > median_vol * 1.5:
+        return "High"
+    elif current_vol < median_vol * 0.7:
+        return "Low"
+    return "Normal"
+
+
+# ========================================
+# SKETCH DE QUANTILES
+# ========================================
+
+class QuantileSketch:
+    """
+    Sketch à bacs logarithmiques (type DDSketch) : chaque valeur positive
+    tombe dans le bac ceil(log_gamma(x)), ce qui garantit une erreur
+    relative bornée sur tout quantile avec quelques centaines de bacs.
+    """
+
+    def __init__(self, relative_accuracy=SKETCH_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > 0]
+        keys, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return float('nan')
+
+        rank = q * (self.count - 1)
+        cumulated = self.zero_count
+        if rank < cumulated:
+            return 0.0
+        for key in sorted(self.bins):
+            cumulated += self.bins[key]
+            if cumulated > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'bins': {str(k): v for k, v in self.bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state['relative_accuracy'])
+        sketch.bins = {int(k): v for k, v in state['bins'].items()}
+        sketch.zero_count = state['zero_count']
+        sketch.count = state['count']
+        return sketch
+
+
+# ========================================
+# VOLATILITÉ EN LIGNE
+# ========================================
+
+class OnlineVolatility:
+    """
+    Volatilité glissante (écart-type des rendements sur `window` barres,
+    annualisé en %) mise à jour barre par barre.
+    La variance de la fenêtre suit la récurrence de Welford (ajout du
+    nouveau rendement, retrait du plus ancien), recalculée exactement
+    à chaque tour de fenêtre pour borner la dérive numérique.
+    """
+
+    def __init__(self, window=VOL_WINDOW):
+        self.window = window
+        self.last_date = None
+        self.last_close = None
+        self.buffer = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+        self.current = None
+        self.vol_sum = 0.0
+        self.vol_count = 0
+        self.recent = deque(maxlen=PROJECTION_WINDOW)
+        self.sketch = QuantileSketch()
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_history(cls, dates, closes, window=VOL_WINDOW):
+        """
+        État complet calculé en une passe vectorisée sur tout l'historique
+        (dates=None : état non destiné à être mis à jour ni persisté)
+        """
+        engine = cls(window)
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) == 0:
+            return engine
+
+        returns = closes[1:] / closes[:-1] - 1
+        rolling_vol = pd.Series(returns).rolling(window=window).std().to_numpy() * ANNUALIZATION
+        valid = rolling_vol[~np.isnan(rolling_vol)]
+
+        engine.buffer.extend(returns[-window:].tolist())
+        engine._recompute()
+        engine.vol_sum = float(valid.sum())
+        engine.vol_count = len(valid)
+        engine.recent.extend(valid[-PROJECTION_WINDOW:].tolist())
+        engine.sketch.add_many(valid)
+        engine.current = float(valid[-1]) if len(valid) else None
+        if dates is not None:
+            engine.last_date = pd.Timestamp(dates[-1]).isoformat()
+        engine.last_close = float(closes[-1])
+        return engine
+
+    def _recompute(self):
+        values = np.asarray(self.buffer, dtype=np.float64)
+        self.mean = float(values.mean()) if len(values) else 0.0
+        self.m2 = float(((values - self.mean) ** 2).sum()) if len(values) else 0.0
+        self.updates = 0
+
+    # ---------- Mise à jour ----------
+
+    def push(self, date, close):
+        """Ajoute une barre (date postérieure à last_date)"""
+        if self.last_close is not None:
+            x = close / self.last_close - 1
+            n = len(self.buffer)
+
+            if n < self.window:
+                delta = x - self.mean
+                self.mean += delta / (n + 1)
+                self.m2 += delta * (x - self.mean)
+            else:
+                old = self.buffer[0]
+                new_mean = self.mean + (x - old) / self.window
+                self.m2 += (x - old) * (x - new_mean + old - self.mean)
+                self.mean = new_mean
+            self.buffer.append(x)
+
+            self.updates += 1
+            if self.updates >= self.window:
+                self._recompute()
+
+            if len(self.buffer) == self.window:
+                vol = math.sqrt(max(self.m2, 0.0) / (self.window - 1)) * ANNUALIZATION
+                self.current = vol
+                self.vol_sum += vol
+                self.vol_count += 1
+                self.recent.append(vol)
+                self.sketch.add(vol)
+
+        self.last_date = pd.Timestamp(date).isoformat()
+        self.last_close = float(close)
+
+    def update(self, dates, closes):
+        """Ajoute les barres postérieures à last_date ; retourne leur nombre"""
+        dates = pd.DatetimeIndex(dates)
+        start = 0 if self.last_date is None else dates.searchsorted(pd.Timestamp(self.last_date), side='right')
+        for date, close in zip(dates[start:], np.asarray(closes, dtype=np.float64)[start:]):
+            self.push(date, close)
+        return len(dates) - start
+
+    # ---------- Résultats ----------
+
+    def stats(self):
+        """Mêmes statistiques que calculate_volatility (volatilités en %)"""
+        if self.current is None:
+            return {'current_vol': 0, 'proj_12m': 0, 'label': 'N/A'}
+
+        current_vol = round(self.current, 2)
+        median_vol = round(self.sketch.quantile(0.5), 2)
+        return {
+            'current_vol': current_vol,
+            'median_vol': median_vol,
+            'mean_vol': round(self.vol_sum / self.vol_count, 2),
+            'proj_12m': round(sum(self.recent) / len(self.recent), 2),
+            'label': volatility_label(current_vol, median_vol)
+        }
+
+    def to_dict(self):
+        return {
+            'window': self.window,
+            'last_date': self.last_date,
+            'last_close': self.last_close,
+            'buffer': list(self.buffer),
+            'mean': self.mean,
+            'm2': self.m2,
+            'updates': self.updates,
+            'current': self.current,
+            'vol_sum': self.vol_sum,
+            'vol_count': self.vol_count,
+            'recent': list(self.recent),
+            'sketch': self.sketch.to_dict()
+        }
+
+    def copy(self):
+        return OnlineVolatility.from_dict(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, state):
+        engine = cls(state['window'])
+        engine.last_date = state['last_date']
+        engine.last_close = state['last_close']
+        engine.buffer.extend(state['buffer'])
+        engine.mean = state['mean']
+        engine.m2 = state['m2']
+        engine.updates = state['updates']
+        engine.current = state['current']
+        engine.vol_sum = state['vol_sum']
+        engine.vol_count = state['vol_count']
+        engine.recent.extend(state['recent'])
+        engine.sketch = QuantileSketch.from_dict(state['sketch'])
+        return engine
+
+
+# ========================================
+# ÉTAT PERSISTÉ PAR TICKER
+# ========================================
+
+class VolatilityStateStore:
+    """Table SQLite ticker → état OnlineVolatility (JSON)"""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS vol_state (
+                    ticker TEXT NOT NULL,
+                    vol_window INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    PRIMARY KEY (ticker, vol_window)
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def load(self, ticker, window=VOL_WINDOW):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM vol_state WHERE ticker = ? AND vol_window = ?", (ticker, window)
+            ).fetchone()
+        return OnlineVolatility.from_dict(json.loads(row[0])) if row else None
+
+    def save(self, ticker, engine):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO vol_state (ticker, vol_window, state) VALUES (?, ?, ?)",
+                (ticker, engine.window, json.dumps(engine.to_dict()))
+            )
+
+    def update(self, ticker, dates, closes, window=VOL_WINDOW):
+        """
+        Charge l'état du ticker, ajoute uniquement les nouvelles barres et
+        le sauvegarde. Seules les barres terminées (toutes sauf la dernière)
+        sont persistées : la dernière barre, révisée à chaque rafraîchissement
+        en séance, est appliquée sur une copie de l'état à chaque lecture.
+        L'état est reconstruit sur tout l'historique s'il n'existe pas ou si
+        la dernière clôture persistée a changé (cours réajustés).
+        """
+        dates = pd.DatetimeIndex(dates)
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) < 2:
+            return OnlineVolatility.from_history(dates, closes, window)
+
+        completed_dates, completed_closes = dates[:-1], closes[:-1]
+        engine = self.load(ticker, window)
+
+        if engine is not None and not self._matches(engine, completed_dates, completed_closes):
+            logger.info(f"🔁 Historique de {ticker} modifié → état de volatilité reconstruit")
+            engine = None
+
+        if engine is None:
+            engine = OnlineVolatility.from_history(completed_dates, completed_closes, window)
+            self.save(ticker, engine)
+        elif engine.update(completed_dates, completed_closes):
+            self.save(ticker, engine)
+
+        live = engine.copy()
+        live.push(dates[-1], closes[-1])
+        return live
+
+    @staticmethod
+    def _matches(engine, dates, closes):
+        """La barre last_date de l'état existe avec la même clôture"""
+        if engine.last_date is None:
+            return False
+        position = dates.searchsorted(pd.Timestamp(engine.last_date))
+        if position >= len(dates) or dates[position] != pd.Timestamp(engine.last_date):
+            return False
+        return abs(closes[position] - engine.last_close) <= STATE_TOLERANCE * abs(engine.last_close)
+
+
+# ========================================
+# STRUCTURE PAR TERME, EWMA ET GARCH(1,1)
+# ========================================
+
+# Fenêtres de la structure par terme (séances)
+TERM_WINDOWS = (10, 30, 60, 90, 252)
+
+# Facteur de décroissance EWMA (RiskMetrics, données journalières)
+EWMA_LAMBDA = 0.94
+
+# GARCH estimé sur les ~10 dernières années au plus : coût borné
+GARCH_MAX_OBS = 2520
+PROJECTION_HORIZON = 252
+
+
+def simple_returns(closes):
+    """Rendements simples r[t] = close[t+1] / close[t] - 1 (tableau unique partagé)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    return closes[1:] / closes[:-1] - 1
+
+
+def rolling_volatility(returns, window):
+    """
+    Volatilité glissante annualisée (%) en une passe : sommes cumulées des
+    rendements et de leurs carrés (équivalent à pandas rolling(window).std()).
+    Les window-1 premières valeurs valent NaN.
+    """
+    x = returns - returns.mean()
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+
+    c1 = np.concatenate(([0.0], np.cumsum(x)))
+    c2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    s1 = c1[window:] - c1[:-window]
+    s2 = c2[window:] - c2[:-window]
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    out[window - 1:] = np.sqrt(np.maximum(var, 0.0)) * ANNUALIZATION
+    return out
+
+
+def term_structure(returns, windows=TERM_WINDOWS):
+    """Dernière volatilité annualisée (%) de chaque fenêtre"""
+    structure = []
+    for window in windows:
+        if len(returns) >= window:
+            structure.append({'window': window, 'vol': round(float(rolling_volatility(returns, window)[-1]), 2)})
+    return structure
+
+
+def ewma_volatility(returns, lam=EWMA_LAMBDA):
+    """
+    Volatilité EWMA annualisée (%) : v[t] = lam * v[t-1] + (1 - lam) * r[t]²,
+    résolue comme un filtre linéaire (une passe, sans boucle Python)
+    """
+    if len(returns) == 0:
+        return np.array([])
+    v0 = float(np.var(returns[:30]))
+    variance = lfilter([1 - lam], [1, -lam], returns * returns, zi=[lam * v0])[0]
+    return np.sqrt(variance) * ANNUALIZATION
+
+
+def _garch_variances(r2, alpha, beta, target):
+    """
+    Variances conditionnelles h[t] = omega + alpha * r[t-1]² + beta * h[t-1],
+    avec omega fixé par ciblage de variance et h[0] = target
+    """
+    omega = target * (1 - alpha - beta)
+    inputs = omega + alpha * np.concatenate(([target], r2[:-1]))
+    return lfilter([1.0], [1.0, -beta], inputs, zi=[beta * target])[0]
+
+
+def garch_forecast(returns, horizon=PROJECTION_HORIZON):
+    """
+    GARCH(1,1) gaussien estimé par maximum de vraisemblance (ciblage de
+    variance), puis volatilité annualisée moyenne (%) prévue sur `horizon`
+    séances. Retourne None si l'historique est trop court ou l'estimation échoue.
+    """
+    r = np.asarray(returns[-GARCH_MAX_OBS:], dtype=np.float64)
+    if len(r) < 250:
+        return None
+
+    r = r - r.mean()
+    r2 = r * r
+    target = float(r2.mean())
+    if target <= 0:
+        return None
+
+    def neg_log_likelihood(params):
+        h = _garch_variances(r2, params[0], params[1], target)
+        return 0.5 * float(np.sum(np.log(h) + r2 / h))
+
+    fit = minimize(
+        neg_log_likelihood,
+        x0=[0.08, 0.90],
+        method='SLSQP',
+        bounds=[(1e-6, 0.5), (0.0, 0.999)],
+        constraints=[{'type': 'ineq', 'fun': lambda p: 0.999 - p[0] - p[1]}]
+    )
+    if not fit.success:
+        return None
+
+    alpha, beta = (float(v) for v in fit.x)
+    persistence = alpha + beta
+    h = _garch_variances(r2, alpha, beta, target)
+    next_var = target * (1 - persistence) + alpha * r2[-1] + beta * h[-1]
+
+    # Moyenne des variances prévues : target + (h1 - target) * p^(k-1), k = 1..horizon
+    decay = (1 - persistence ** horizon) / ((1 - persistence) * horizon)
+    mean_var = target + (next_var - target) * decay
+
+    return {
+        'omega': target * (1 - persistence),
+        'alpha': round(alpha, 4),
+        'beta': round(beta, 4),
+        'persistence': round(persistence, 4),
+        'next_day_vol': round(float(np.sqrt(next_var)) * ANNUALIZATION, 2),
+        'forecast_vol': round(float(np.sqrt(mean_var)) * ANNUALIZATION, 2)
+    }
+
+
+def volatility_outlook(returns):
+    """Structure par terme, EWMA et prévision GARCH à partir d'un seul tableau de rendements"""
+    ewma = ewma_volatility(returns)
+    return {
+        'term_structure': term_structure(returns),
+        'ewma_vol': round(float(ewma[-1]), 2) if len(ewma) else None,
+        'garch': garch_forecast(returns)
+    }
+
+
+# ========================================
+# INSTANCE PARTAGÉE
+# ========================================
+
+_state_store = None
+
+
+def get_volatility_store():
+    """Retourne le store d'états partagé (créé au premier appel)"""
+    global _state_store
+    if _state_store is None:
+        _state_store = VolatilityStateStore()
+    return _state_store
+
+
+def set_volatility_store(store):
+    """Remplace le store d'états partagé (tests)"""
+    global _state_store
+    _state_store = store